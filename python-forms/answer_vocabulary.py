@@ -0,0 +1,117 @@
+"""
+Answer Vocabulary - Process-wide interning of answer values and shared answer lists
+
+Answer values ("no", "yes", "none_of_the_above", medication names), disqualify
+messages and question texts repeat across every screener. Each parsed copy is a
+separate string object, so a worker holding every clinic's forms grows with the
+number of duplicates rather than the number of distinct values.
+
+The vocabulary keeps one canonical object per distinct string and per distinct
+answer list, and one compiled answer profile (typed, sorted options plus the
+answer-type lookup) per (safe, flag, disqualify) combination. Loading another
+form that reuses "no"/"yes" lists costs a dict lookup instead of new objects.
+
+Each table is capped at max_entries. Once a table is full, new values are
+returned as they are (still correct, just not shared), so a long-running worker
+that sees ever-changing free text cannot grow the vocabulary without bound.
+
+Usage:
+    from answer_vocabulary import VOCABULARY
+    VOCABULARY.intern("none_of_the_above")
+    VOCABULARY.stats()
+"""
+
+import sys
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+
+# Entries per table; far above the distinct values of every clinic's forms combined
+MAX_ENTRIES = 100_000
+
+
+class AnswerVocabulary:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._strings: Dict[str, str] = {}
+        self._tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._profiles: Dict[Tuple, Tuple] = {}
+        self._stats = {"requests": 0, "hits": 0, "bytes_saved": 0, "profile_requests": 0, "profile_hits": 0,
+                       "overflow": 0}
+
+    def intern(self, value: Optional[str]) -> Optional[str]:
+        """Return the canonical object for a string (non-strings are returned unchanged)"""
+        if not isinstance(value, str):
+            return value
+        self._stats["requests"] += 1
+        canonical = self._strings.get(value)
+        if canonical is None:
+            self._store(self._strings, value, value)
+            return value
+        if canonical is not value:
+            self._stats["hits"] += 1
+            self._stats["bytes_saved"] += sys.getsizeof(value)
+        return canonical
+
+    def answer_tuple(self, values: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        """Return a shared tuple of interned answer values, preserving order"""
+        key = tuple(self.intern(v) for v in values or ())
+        canonical = self._tuples.get(key)
+        if canonical is None:
+            self._store(self._tuples, key, key)
+            return key
+        return canonical
+
+    def answer_profile(self, safe: Tuple[str, ...], flag: Tuple[str, ...], disqualify: Tuple[str, ...],
+                       build) -> Tuple[Tuple, Mapping[str, str]]:
+        """
+        Return the shared (options, answer_types) for an answer-list combination.
+
+        build(safe, flag, disqualify) compiles the profile on a miss; answer_types is
+        returned read-only because every question with the same lists shares it.
+        """
+        key = (safe, flag, disqualify)
+        self._stats["profile_requests"] += 1
+        profile = self._profiles.get(key)
+        if profile is not None:
+            self._stats["profile_hits"] += 1
+            return profile
+
+        options, answer_types = build(safe, flag, disqualify)
+        profile = (options, MappingProxyType(answer_types))
+        self._store(self._profiles, key, profile)
+        return profile
+
+    def _store(self, table: Dict, key, value) -> None:
+        if len(table) < self.max_entries:
+            table[key] = value
+        else:
+            self._stats["overflow"] += 1
+
+    def clear(self) -> None:
+        """Drop every interned value and reset the statistics"""
+        self._strings.clear()
+        self._tuples.clear()
+        self._profiles.clear()
+        for key in self._stats:
+            self._stats[key] = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return memory statistics: distinct values held, their size, and duplicates avoided"""
+        return {
+            **self._stats,
+            "strings": len(self._strings),
+            "string_bytes": sum(sys.getsizeof(s) for s in self._strings),
+            "answer_lists": len(self._tuples),
+            "answer_profiles": len(self._profiles)
+        }
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._strings
+
+
+# Shared by the loader and the form model for the lifetime of the process
+VOCABULARY = AnswerVocabulary()
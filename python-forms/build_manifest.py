@@ -0,0 +1,176 @@
+"""
+Build Manifest - Incremental rebuilds of the live forms
+
+Every *-screener-live.html depends on its screener JSON, the shared sections in
+surveys/all-forms/ and the generator code. The manifest (surveys/.build-manifest.json)
+records, per screener, the sha256 of each of those inputs, the render options and
+the output file it produced:
+
+    "weightloss/GLP1-screener.json": {
+        "output": "weightloss/GLP1-screener-live.html",
+        "inputs": {"all-forms/medical-history.json": "<sha256>", ...},
+        "generator": "<fingerprint>",
+        "options": "{\"minify\": true}",
+        "outputs": {"weightloss/GLP1-screener-live.html": {"mtime_ns": ..., "size": ...},
+                    "weightloss/GLP1-screener-live.html.gz": {...}, "assets/form-<hash>.css": {...}, ...}
+    }
+
+"outputs" covers every file the build produced: the form, its precompressed
+siblings and stamp, and (with external assets) the linked css/js bundles with
+their siblings plus the asset manifest.json. A form is rebuilt only when one of
+its inputs changes (an edit to a shared section therefore rebuilds every form) or
+when any of those outputs is missing or was modified.
+Input hashes are cached by mtime/size, so a no-op rebuild of the catalog reads
+no JSON at all, only stat() calls.
+
+Usage:
+    manifest = BuildManifest()
+    if not manifest.is_current(source_path, options):
+        ... generate and write output_path ...
+        manifest.record(source_path, output_path, options)
+    manifest.save()
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from file_utils import sha256_bytes, sha256_file, write_if_changed
+from precompress import ENCODINGS, STAMP_SUFFIX
+
+BUILD_MANIFEST_FILENAME = ".build-manifest.json"
+MANIFEST_VERSION = 2
+SHARED_SECTIONS_DIR = "all-forms"
+
+# Bump to force every form to be rebuilt (e.g. after changing how outputs are written)
+GENERATOR_VERSION = 1
+
+# Modules whose code ends up in the rendered HTML; editing any of them invalidates every output
+GENERATOR_SOURCES = (
+    'enhanced_form_generator.py', 'html_templates.py', 'form_model.py', 'answer_vocabulary.py',
+    'form_data_loader.py', 'question_registry.py', 'form_minifier.py', 'form_assets.py', 'render_context.py',
+    'show_conditions.py'
+)
+
+
+@lru_cache(maxsize=1)
+def generator_fingerprint() -> str:
+    """Hash of GENERATOR_VERSION and the generator sources; computed once per process"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    digests = [str(GENERATOR_VERSION)]
+    for filename in GENERATOR_SOURCES:
+        digests.append(sha256_file(os.path.join(here, filename)) or "missing")
+    return sha256_bytes("\n".join(digests).encode('utf-8'))
+
+
+def build_flags(external_assets: bool = False, minify: bool = False, max_bytes: Optional[int] = None,
+                delegate_events: bool = False, lazy_sections: bool = False) -> Dict:
+    """The generate_form.py output flags a form was built with, as recorded in the manifest"""
+    return {"external_assets": external_assets, "minify": minify, "max_bytes": max_bytes,
+            "delegate_events": delegate_events, "lazy_sections": lazy_sections}
+
+
+def options_key(options: Optional[Dict]) -> str:
+    """Canonical string for the render options an output was built with"""
+    return json.dumps(options or {}, sort_keys=True)
+
+
+class BuildManifest:
+    def __init__(self, surveys_path: str = os.path.join("..", "surveys")):
+        self.surveys_path = surveys_path
+        self.path = os.path.join(surveys_path, BUILD_MANIFEST_FILENAME)
+        self._data = self._read()
+        self._stat_cache: Dict[str, Optional[os.stat_result]] = {}
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": MANIFEST_VERSION, "inputs": {}, "outputs": {}}
+
+    def _rel(self, path: str) -> str:
+        """Key for a path: relative to the surveys tree when inside it, else absolute"""
+        rel = os.path.relpath(os.path.abspath(path), os.path.abspath(self.surveys_path))
+        return os.path.abspath(path) if rel.startswith('..') else rel.replace(os.sep, '/')
+
+    def _abs(self, key: str) -> str:
+        return key if os.path.isabs(key) else os.path.join(self.surveys_path, key)
+
+    def _stat(self, key: str) -> Optional[os.stat_result]:
+        if key not in self._stat_cache:
+            try:
+                self._stat_cache[key] = os.stat(self._abs(key))
+            except OSError:
+                self._stat_cache[key] = None
+        return self._stat_cache[key]
+
+    def input_hash(self, key: str) -> Optional[str]:
+        """sha256 of an input, re-hashed only when its mtime or size changed (None if missing)"""
+        st = self._stat(key)
+        if st is None:
+            self._data["inputs"].pop(key, None)
+            return None
+        cached = self._data["inputs"].get(key)
+        if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            return cached["sha256"]
+        digest = sha256_file(self._abs(key))
+        self._data["inputs"][key] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest}
+        return digest
+
+    def shared_inputs(self) -> List[str]:
+        """Keys of the shared section files every form is rendered with"""
+        shared_dir = os.path.join(self.surveys_path, SHARED_SECTIONS_DIR)
+        try:
+            names = sorted(n for n in os.listdir(shared_dir) if n.endswith('.json'))
+        except OSError:
+            return []
+        return [f"{SHARED_SECTIONS_DIR}/{name}" for name in names]
+
+    def is_current(self, source_path: str, options: Optional[Dict] = None) -> bool:
+        """True if the output built from source_path is up to date with its inputs and options"""
+        entry = self._data["outputs"].get(self._rel(source_path))
+        if not entry or entry["generator"] != generator_fingerprint() or entry["options"] != options_key(options):
+            return False
+        if set(self.shared_inputs()) - set(entry["inputs"]):
+            return False  # a new shared section was added
+
+        for key, recorded in entry["outputs"].items():
+            output = self._stat(key)
+            if output is None or output.st_mtime_ns != recorded["mtime_ns"] or output.st_size != recorded["size"]:
+                return False
+        return all(self.input_hash(key) == digest for key, digest in entry["inputs"].items())
+
+    def record(self, source_path: str, output_path: str, options: Optional[Dict] = None,
+               extra_inputs: List[str] = (), extra_outputs: List[str] = ()) -> None:
+        """
+        Record that output_path was just built from source_path (plus any other files it read).
+
+        extra_outputs are further files the build wrote or links, e.g. the asset bundles;
+        each output's precompressed siblings are recorded along with it.
+        """
+        outputs = {}
+        for path in (output_path, *extra_outputs):
+            for candidate in (path, *(path + suffix for _, suffix in ENCODINGS), path + STAMP_SUFFIX):
+                key = self._rel(candidate)
+                self._stat_cache.pop(key, None)
+                st = self._stat(key)
+                if st is not None or candidate == path:
+                    outputs[key] = {"mtime_ns": st.st_mtime_ns if st else None, "size": st.st_size if st else None}
+        keys = [self._rel(source_path), *(self._rel(p) for p in extra_inputs), *self.shared_inputs()]
+
+        self._data["outputs"][self._rel(source_path)] = {
+            "output": self._rel(output_path),
+            "inputs": {key: self.input_hash(key) for key in dict.fromkeys(keys)},
+            "generator": generator_fingerprint(),
+            "options": options_key(options),
+            "outputs": outputs
+        }
+
+    def save(self) -> bool:
+        """Atomically write the manifest if it changed; returns True if written"""
+        return write_if_changed(self.path, json.dumps(self._data, indent=2, sort_keys=True).encode('utf-8'))
@@ -6,129 +6,107 @@ This file contains the complete enhanced form generator with all fixes applied.
 
 import json
 import re
-from typing import Dict, List, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Any, Optional, Sequence, Union
 from dataclasses import dataclass
 
+from form_assets import publish_assets
+from form_minifier import SizeReport, finish_document, stream_document
+from form_model import Form, Question, as_question, as_questions
+from html_templates import compile_template
+from render_context import RenderContext
+from show_conditions import CONDITION_RULES, REFERENCE_ANSWER, reference_target, triggering_values
 
-@dataclass
-class FormSection:
-    title: str
-    questions: List[Dict]
-    order: int
-    is_standard: bool  # True for standard sections, False for assessment
 
+# Upper bound on cached script blocks; each is ~50 KB and one exists per form/consult type
+ASSET_CACHE_SIZE = 64
 
-class EnhancedFormGenerator:
-    def __init__(self):
-        self.current_form_data = None
-        self.form_responses = {}
-        self.disqualification_triggered = False
-        self.question_id_counter = 0
+# Upper bound on cached section fragments: the shared sections plus recent assessments
+FRAGMENT_CACHE_SIZE = 256
 
-        # Supported question types from your data
-        self.question_types = [
-            'text', 'email', 'phone', 'date', 'radio', 'checkbox',
-            'file', 'height_feet', 'height_inches', 'weight_pounds', 'formula'
-        ]
 
-        # Sync-only states (from your data)
-        self.sync_only_states = [
-            'AR', 'DC', 'DE', 'ID', 'KS', 'LA', 'MS', 'NM',
-            'RI', 'WV', 'NC', 'SC', 'ME'
-        ]
+class _BlockCache:
+    """
+    Bounded LRU cache of generated CSS/JS blocks with hit/miss counters
 
-    def generate_notion_form(self, notion_form_data: Dict, options: Dict = None) -> str:
-        """
-        Generate 5-section form from Notion JSON data structure
+    Safe to share between the threads of a threaded server: lookups and inserts
+    hold a lock, builds run outside it (two threads may build the same block once,
+    the second result is simply dropped).
+    """
 
-        Args:
-            notion_form_data: Your exact JSON structure from Notion
-            options: Additional options
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-        Returns:
-            Complete HTML form with 5 sections + state selector
-        """
-        if options is None:
-            options = {}
+    def get_or_build(self, key: tuple, build) -> str:
+        with self._lock:
+            block = self._entries.get(key)
+            if block is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return block
+            self.misses += 1
 
-        try:
-            self.current_form_data = notion_form_data
+        block = build()
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                return existing
+            self._entries[key] = block
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return block
 
-            # Extract form metadata
-            form_name = notion_form_data.get('name', 'Medical Screening')
-            form_category = notion_form_data.get('property_category', 'general')
-            consult_type = notion_form_data.get('property_consult_type', 'async')
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
 
-            # Build 5-section structure
-            sections = self.build_five_section_structure(notion_form_data)
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self._entries), "maxsize": self.maxsize}
 
-            # Generate complete form HTML
-            form_html = self.build_complete_form_html(
-                form_name, form_category, consult_type, sections, options
-            )
 
-            return form_html
+# Process-wide, like the loader's section cache: API handlers build a new generator per request
+_STYLE_CACHE = _BlockCache(1)
+_SCRIPT_CACHE = _BlockCache(ASSET_CACHE_SIZE)
 
-        except Exception as error:
-            print(f'Error generating Notion form: {error}')
-            raise error
+# Rendered sections keyed by their content and position. Patient Profile, Medical
+# History and Verification compile to equal questions in every screener, so a batch
+# build renders them once per process and splices the cached HTML into each form.
+_FRAGMENT_CACHE = _BlockCache(FRAGMENT_CACHE_SIZE)
 
-    def build_five_section_structure(self, notion_data: Dict) -> List[FormSection]:
-        """Build the required 5-section structure"""
-        sections = []
-        notion_sections = notion_data.get('sections', {})
-
-        # Section 1: Patient Profile (standard)
-        if 'Patient Profile' in notion_sections:
-            sections.append(FormSection(
-                title='Patient Profile',
-                questions=notion_sections['Patient Profile'],
-                order=1,
-                is_standard=True
-            ))
-
-        # Section 2: Assessment (unique per form)
-        if 'Assessment' in notion_sections:
-            sections.append(FormSection(
-                title='Assessment',
-                questions=notion_sections['Assessment'],
-                order=2,
-                is_standard=False
-            ))
-
-        # Section 3: Medical History (standard)
-        if 'Medical History' in notion_sections:
-            sections.append(FormSection(
-                title='Medical History',
-                questions=notion_sections['Medical History'],
-                order=3,
-                is_standard=True
-            ))
-
-        # Section 4: Verification (standard)
-        if 'Verification' in notion_sections:
-            sections.append(FormSection(
-                title='Verification',
-                questions=notion_sections['Verification'],
-                order=4,
-                is_standard=True
-            ))
 
-        # Note: State is now handled in Verification section via address
+def asset_cache_info() -> Dict[str, Dict[str, int]]:
+    """Return hit/miss statistics of the cached style and script blocks"""
+    return {"styles": _STYLE_CACHE.info(), "scripts": _SCRIPT_CACHE.info()}
 
-        return sections
 
-    def build_complete_form_html(self, form_name: str, category: str, consult_type: str,
-                                sections: List[FormSection], options: Dict) -> str:
-        """Build the complete form HTML with modern styling"""
+def clear_asset_cache() -> None:
+    """Drop all cached style and script blocks and reset their counters"""
+    _STYLE_CACHE.clear()
+    _SCRIPT_CACHE.clear()
 
-        # Generate CSS styles
-        styles = self.generate_modern_styles()
 
-        # Generate JavaScript for conditional logic and form handling
-        javascript = self.generate_form_javascript(category, consult_type, form_name, len(sections))
+def fragment_cache_info() -> Dict[str, int]:
+    """Return hit/miss statistics of the cached section fragments"""
+    return _FRAGMENT_CACHE.info()
+
+
+def clear_fragment_cache() -> None:
+    """Drop all cached section fragments and reset their counters"""
+    _FRAGMENT_CACHE.clear()
 
-        html = f'''
+
+# Markup templates, compiled once and rendered into a single output buffer (see html_templates.py)
+_DOCUMENT_OPEN_SOURCE = '''
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -153,8 +131,10 @@ class EnhancedFormGenerator:
 
         <!-- Survey Container (changes per section) -->
         <div class="survey-container">
-            <form id="medicalForm" class="medical-form" data-category="{category}" data-consult-type="{consult_type}">
-                {self.generate_all_sections(sections)}
+            <form id="medicalForm" class="medical-form" data-category="{category}" data-consult-type="{consult_type}"{form_attrs}>
+                '''
+
+_DOCUMENT_CLOSE_SOURCE = '''
 
                 <!-- Navigation Buttons -->
                 <div class="form-navigation">
@@ -166,68 +146,35 @@ class EnhancedFormGenerator:
         </div>
     </div>
 
+    <script type="application/json" id="show-conditions">{show_conditions}</script>
+    <script type="application/json" id="field-bindings">{field_bindings}</script>
+    <script type="application/json" id="field-manifest">{field_manifest}</script>
     <script>{javascript}</script>
 </body>
 </html>
         '''
 
-        return html
+_DOCUMENT_OPEN = compile_template(_DOCUMENT_OPEN_SOURCE)
+_DOCUMENT_CLOSE = compile_template(_DOCUMENT_CLOSE_SOURCE)
 
-    def generate_all_sections(self, sections: List[FormSection]) -> str:
-        """Generate HTML for all 5 sections"""
-        html = ""
-
-        for i, section in enumerate(sections):
-            section_class = "section active" if i == 0 else "section"
+# External asset mode: the same document, linking the shared hashed bundles instead of inlining them
+_LINKED_DOCUMENT_OPEN = compile_template(_DOCUMENT_OPEN_SOURCE.replace(
+    '<style>{styles}</style>', '<link rel="stylesheet" href="{stylesheet}">'))
+_LINKED_DOCUMENT_CLOSE = compile_template(_DOCUMENT_CLOSE_SOURCE.replace(
+    '<script>{javascript}</script>', '<script>{config}</script>\n    <script src="{script}"></script>'))
 
-            html += f'''
-                <div class="{section_class}" id="section-{i + 1}">
-                    <h2 class="section-title">{section.title}</h2>
+_SECTION_OPEN = compile_template('''
+                <div class="{section_class}" id="section-{number}">
+                    <h2 class="section-title">{title}</h2>
                     <div class="questions-container">
-            '''
-
-            # Generate questions for this section
-            # Regular questions from Notion data - group height/weight
-            html += self.generate_section_questions(section.questions)
+            ''')
 
-            html += '''
+_SECTION_CLOSE = '''
                     </div>
                 </div>
             '''
 
-        return html
-
-    def generate_section_questions(self, questions: List[Dict]) -> str:
-        """Generate questions for a section, grouping height/weight together"""
-        html = ""
-        i = 0
-
-        while i < len(questions):
-            question = questions[i]
-
-            # Check if this is height_feet and next questions are height_inches, weight
-            if (question.get('questionType') == 'height_feet' and
-                i + 2 < len(questions) and
-                questions[i + 1].get('questionType') == 'height_inches' and
-                questions[i + 2].get('questionType') == 'weight_pounds'):
-
-                # Generate grouped height/weight layout
-                html += self.generate_height_weight_group(questions[i:i+3])
-                i += 3  # Skip next 2 questions as they're included in the group
-            else:
-                # Regular question
-                html += self.generate_question_html(question)
-                i += 1
-
-        return html
-
-    def generate_height_weight_group(self, height_weight_questions: List[Dict]) -> str:
-        """Generate grouped height and weight inputs in 3-column layout"""
-        feet_q = height_weight_questions[0]
-        inches_q = height_weight_questions[1]
-        weight_q = height_weight_questions[2]
-
-        html = f'''
+_HEIGHT_WEIGHT_GROUP = compile_template('''
             <div class="question-wrapper" data-question-group="height-weight">
                 <div class="question-container">
                     <label class="question-label">
@@ -236,13 +183,13 @@ class EnhancedFormGenerator:
                     </label>
                     <div class="answer-container">
                         <div class="height-weight-container">
-                            {self.generate_height_feet_input(feet_q, feet_q.get('questionId', 'height_feet'))}
-                            {self.generate_height_inches_input(inches_q, inches_q.get('questionId', 'height_inches'))}
-                            {self.generate_weight_input(weight_q, weight_q.get('questionId', 'weight'))}
+                            {feet_input}
+                            {inches_input}
+                            {weight_input}
                         </div>
                         <div class="bmi-display-section">
                             <div class="formula-display">
-                                <div id="patient-profile-bmi" class="bmi-result">
+                                <div id="{bmi_result_id}" class="bmi-result">
                                     <span class="bmi-label">BMI: </span>
                                     <span class="bmi-value" id="bmi-value">Enter height and weight above</span>
                                 </div>
@@ -251,64 +198,688 @@ class EnhancedFormGenerator:
                     </div>
                 </div>
             </div>
-        '''
-
-        return html
-
-    def generate_question_html(self, question: Dict) -> str:
-        """Generate HTML for a single question with conditional logic"""
-        question_id = question.get('questionId', f"q_{self.get_next_id()}")
-        question_text = question.get('questionText', '')
-        question_type = question.get('questionType', 'text')
-        required = question.get('required', False)
-        show_condition = question.get('showCondition', 'always')
-        disqualify_message = question.get('disqualifyMessage', '')
+        ''')
 
-        # Determine if question should be hidden by default
-        hidden_class = '' if show_condition == 'always' else 'question-hidden'
-
-        html = f'''
+_QUESTION_OPEN = compile_template('''
             <div class="question-wrapper {hidden_class}"
                  data-question-id="{question_id}"
                  data-show-condition="{show_condition}">
                 <div class="question-container">
                     <label class="question-label" for="{question_id}">
-                        {question_text}
-                        {' <span class="required-asterisk">*</span>' if required else ''}
+                        {text}
+                        {required_marker}
                     </label>
 
                     <div class="answer-container">
-                        {self.generate_input_html(question, question_id)}
+                        ''')
+
+_QUESTION_CLOSE = compile_template('''
                     </div>
 
                     <!-- Disqualification message container -->
-                    {f'<div class="disqualification-message" style="display: none;">{disqualify_message}</div>' if disqualify_message else ''}
+                    {disqualify_block}
+                </div>
+            </div>
+        ''')
+
+_REQUIRED_MARKER = ' <span class="required-asterisk">*</span>'
+
+_DISQUALIFY_BLOCK = compile_template('<div class="disqualification-message" style="display: none;">{message}</div>')
+
+_CHOICE_OPTION = compile_template('''
+                <label class="{kind}-option">
+                    <input type="{kind}"
+                           name="{question_id}"
+                           value="{value}"
+                           data-answer-type="{answer_type}"
+                           autocomplete="off"{handler}>
+                    <span class="{kind}-checkmark"></span>
+                    {label}
+                </label>
+            ''')
+
+_CHOICE_TYPES = ('radio', 'checkbox')
+
+_TEXT_INPUT = compile_template('''
+            <input type="{input_type}"
+                   id="{question_id}"
+                   name="{question_id}"
+                   class="form-input"
+                   autocomplete="{autocomplete}"
+                   {phone_attrs}
+                   {required}>
+        ''')
+
+_DATE_INPUT = compile_template('''
+            <input type="date"
+                   id="{question_id}"
+                   name="{question_id}"
+                   class="form-input date-input"
+                   {required}
+                   {handler}>
+        ''')
+
+_FILE_INPUT = compile_template('''
+            <div class="file-input-container">
+                <input type="file"
+                       id="{question_id}"
+                       name="{question_id}"
+                       class="file-input"
+                       accept="image/*,.pdf"
+                       {handler}>
+                <label for="{question_id}" class="file-input-label">
+                    <span class="file-input-text" id="{question_id}_text">Choose File</span>
+                    <span class="file-input-button">Browse</span>
+                </label>
+            </div>
+        ''')
+
+# Height feet/inches and weight: one column of the height/weight group
+_MEASUREMENT_INPUT = compile_template('''
+            <div class="{kind}-input-group">
+                <input type="number"
+                       id="{question_id}"
+                       name="{question_id}"
+                       class="form-input {kind}-input"
+                       min="{min}" max="{max}"
+                       placeholder="{placeholder}"
+                       {handler}>
+                <span class="input-suffix">{suffix}</span>
+            </div>
+        ''')
+
+_FORMULA_DISPLAY = compile_template('''
+            <div class="formula-display">
+                <div id="{question_id}" class="bmi-result">
+                    <span class="bmi-label">BMI: </span>
+                    <span class="bmi-value" id="bmi-value">Enter height and weight above</span>
                 </div>
             </div>
+        ''')
+
+_SELECT_OPEN = compile_template('''
+                <select id="{question_id}" name="{question_id}" class="{select_class}" required>
+                    ''')
+
+_SELECT_CLOSE = '''
+                </select>
+            '''
+
+_OPTION = compile_template('<option value="{value}">{label}</option>')
+
+_US_STATES = (
+    ('AL', 'Alabama'), ('AK', 'Alaska'), ('AZ', 'Arizona'), ('AR', 'Arkansas'),
+    ('CA', 'California'), ('CO', 'Colorado'), ('CT', 'Connecticut'), ('DE', 'Delaware'),
+    ('DC', 'District of Columbia'), ('FL', 'Florida'), ('GA', 'Georgia'), ('HI', 'Hawaii'),
+    ('ID', 'Idaho'), ('IL', 'Illinois'), ('IN', 'Indiana'), ('IA', 'Iowa'),
+    ('KS', 'Kansas'), ('KY', 'Kentucky'), ('LA', 'Louisiana'), ('ME', 'Maine'),
+    ('MD', 'Maryland'), ('MA', 'Massachusetts'), ('MI', 'Michigan'), ('MN', 'Minnesota'),
+    ('MS', 'Mississippi'), ('MO', 'Missouri'), ('MT', 'Montana'), ('NE', 'Nebraska'),
+    ('NV', 'Nevada'), ('NH', 'New Hampshire'), ('NJ', 'New Jersey'), ('NM', 'New Mexico'),
+    ('NY', 'New York'), ('NC', 'North Carolina'), ('ND', 'North Dakota'), ('OH', 'Ohio'),
+    ('OK', 'Oklahoma'), ('OR', 'Oregon'), ('PA', 'Pennsylvania'), ('RI', 'Rhode Island'),
+    ('SC', 'South Carolina'), ('SD', 'South Dakota'), ('TN', 'Tennessee'), ('TX', 'Texas'),
+    ('UT', 'Utah'), ('VT', 'Vermont'), ('VA', 'Virginia'), ('WA', 'Washington'),
+    ('WV', 'West Virginia'), ('WI', 'Wisconsin'), ('WY', 'Wyoming')
+)
+
+# The custom state selector (section 5) lists the 50 states without DC
+_SELECTOR_STATES = tuple(code for code, _ in _US_STATES if code != 'DC')
+
+_STATE_SELECTOR_OPEN = '''
+            <div class="question-container">
+                <label class="question-label">Select your state <span class="required-asterisk">*</span></label>
+                <div class="answer-container">
+                    <select id="state-selector" name="state" class="form-input state-select" required>
+                        <option value="">Choose your state...</option>
         '''
 
+_STATE_SELECTOR_CLOSE = '''
+                    </select>
+                </div>
+            </div>
+        '''
+
+# Inline event handler per input action. With options["delegate_events"] inputs carry
+# data-action instead (choices are recognised by data-answer-type) and the runtime
+# dispatches from a few listeners on #medicalForm.
+_INLINE_HANDLERS = {
+    'answer': 'onchange="handleAnswerChange(this)"',
+    'format-phone': 'oninput="formatPhoneInput(this)"',
+    'validate-age': 'onchange="validateAge(this)"',
+    'file-upload': 'onchange="handleFileUpload(this)"',
+    'bmi': 'onchange="calculateBMI()"',
+}
+
+
+def _delegates_events(context: Optional[RenderContext]) -> bool:
+    return context is not None and bool(context.options.get('delegate_events'))
+
+
+def _event_attribute(action: str, context: Optional[RenderContext]) -> str:
+    """The attribute that wires an input to its runtime handler"""
+    if not _delegates_events(context):
+        return _INLINE_HANDLERS[action]
+    return '' if action == 'answer' else f'data-action="{action}"'
+
+
+def _json_block(value: Any) -> str:
+    """JSON for embedding in a <script> element"""
+    return json.dumps(value).replace('</', '<\\/')  # keep a "</script>" inside a value from closing the tag
+
+
+# The BMI display rendered inside the height/weight group
+_GROUP_BMI_RESULT_ID = 'patient-profile-bmi'
+
+# Field binding key for height/weight inputs rendered on their own
+_BMI_INPUT_KEYS = {'height_feet': 'heightFeet', 'height_inches': 'heightInches', 'weight_pounds': 'weight'}
+
+# Input names in the height/weight group for questions without their own ID
+_HEIGHT_WEIGHT_DEFAULT_NAMES = {'height_feet': 'height_feet', 'height_inches': 'height_inches',
+                                'weight_pounds': 'weight'}
+
+
+def _starts_height_weight_group(questions: Sequence[Question], i: int) -> bool:
+    """True if questions[i:i + 3] are height (feet), height (inches) and weight, rendered as one group"""
+    return (questions[i].question_type == 'height_feet' and
+            i + 2 < len(questions) and
+            questions[i + 1].question_type == 'height_inches' and
+            questions[i + 2].question_type == 'weight_pounds')
+
+
+@dataclass(frozen=True)
+class _FieldRole:
+    role: str                       # key buildWebhookData reads the answer under
+    types: Sequence[str]            # question types that can fill the role
+    keywords: Sequence[str] = ()    # the question text must contain one of these (lower case), if any
+
+
+# Webhook payload roles, tried in order; each role goes to the first question that matches
+_FIELD_ROLES = (
+    _FieldRole('name', ('text',), ('name',)),
+    _FieldRole('email', ('email',)),
+    _FieldRole('phone', ('phone',)),
+    _FieldRole('dateOfBirth', ('date',)),
+    _FieldRole('gender', ('radio',), ('gender',)),
+    _FieldRole('pregnancy', ('radio',), ('pregnan',)),
+    _FieldRole('heightFeet', ('height_feet',)),
+    _FieldRole('heightInches', ('height_inches',)),
+    _FieldRole('weight', ('weight_pounds',)),
+    _FieldRole('address2', ('text',), ('address 2', 'address line 2')),
+    _FieldRole('address1', ('text',), ('address',)),
+    _FieldRole('city', ('text',), ('city',)),
+    _FieldRole('state', ('dropdown', 'text'), ('state',)),
+    _FieldRole('postalCode', ('postal_code', 'text'), ('postal', 'zip')),
+    _FieldRole('allergies', ('radio',), ('allergies',)),
+    _FieldRole('activityLevel', ('radio',), ('exercise', 'activity')),
+    _FieldRole('tobaccoUse', ('radio',), ('tobacco', 'vape')),
+    _FieldRole('mentalHealth', ('radio',), ('depression',)),
+    _FieldRole('idVerification', ('file',), ('government id', 'identity')),
+)
+
+
+@dataclass
+class FormSection:
+    title: str
+    questions: Sequence[Question]
+    order: int
+    is_standard: bool  # True for standard sections, False for assessment
+
+
+class EnhancedFormGenerator:
+    # Holds configuration only; everything about one render lives in its RenderContext,
+    # so a single instance can serve concurrent renders
+    def __init__(self):
+        # Supported question types from your data
+        self.question_types = [
+            'text', 'email', 'phone', 'date', 'radio', 'checkbox',
+            'file', 'height_feet', 'height_inches', 'weight_pounds', 'formula'
+        ]
+
+        # Sync-only states (from your data)
+        self.sync_only_states = [
+            'AR', 'DC', 'DE', 'ID', 'KS', 'LA', 'MS', 'NM',
+            'RI', 'WV', 'NC', 'SC', 'ME'
+        ]
+
+    def generate_notion_form(self, notion_form_data: Union[Form, Dict], options: Dict = None,
+                             context: Optional[RenderContext] = None) -> str:
+        """
+        Generate 5-section form from Notion JSON data structure
+
+        Args:
+            notion_form_data: A compiled Form, or the loader's form data dict
+            options: Additional options ("minify": True, "max_bytes": budget, "asset_dir": ...)
+            context: Per-render state; pass one in to read its size_report afterwards
+
+        Returns:
+            Complete HTML form with 5 sections + state selector
+
+        Raises:
+            FormBudgetError: the form is larger than options["max_bytes"]
+        """
+        context = context or RenderContext()
+        html = ''.join(self._iter_notion_document(notion_form_data, options, context))
+        if options and (options.get('minify') or options.get('max_bytes')):
+            html, context.size_report = finish_document(
+                html, options.get('minify', False), options.get('max_bytes'), context.form_data.name,
+                context.asset_bundle
+            )
         return html
 
-    def generate_input_html(self, question: Dict, question_id: str) -> str:
+    def iter_notion_form(self, notion_form_data: Union[Form, Dict], options: Dict = None,
+                         context: Optional[RenderContext] = None) -> Iterator[str]:
+        """
+        Generate the same document as generate_notion_form, chunk by chunk
+
+        Yields the head with the styles, then each section as soon as it is rendered,
+        then the closing markup with the script, so a response can be streamed while
+        later sections are still being built.
+
+        "minify" is applied per chunk (context.size_report fills in as chunks go out).
+        "max_bytes" needs the whole document and raises ValueError immediately; use
+        generate_notion_form when a budget applies.
+        """
+        options = options or {}
+        context = context or RenderContext()
+        if options.get('minify'):
+            context.size_report = SizeReport()
+        return stream_document(self._iter_notion_document(notion_form_data, options, context),
+                               options.get('minify', False), options.get('max_bytes'), context.size_report)
+
+    def _iter_notion_document(self, notion_form_data: Union[Form, Dict], options: Optional[Dict],
+                              context: RenderContext) -> Iterator[str]:
+        if options is None:
+            options = {}
+
+        try:
+            if not isinstance(notion_form_data, Form):
+                notion_form_data = Form.from_form_data(notion_form_data)
+            context.form_data = notion_form_data
+            context.options = options
+
+            # Extract form metadata
+            form_name = notion_form_data.name
+            form_category = notion_form_data.category
+            consult_type = notion_form_data.consult_type
+
+            # Build 5-section structure
+            sections = self.build_five_section_structure(notion_form_data)
+
+            # Generate complete form HTML
+            yield from self.iter_complete_form_html(
+                form_name, form_category, consult_type, sections, options, context
+            )
+
+        except Exception as error:
+            print(f'Error generating Notion form: {error}')
+            raise error
+
+    def build_five_section_structure(self, notion_data: Union[Form, Dict]) -> List[FormSection]:
+        """Build the required 5-section structure"""
+        if not isinstance(notion_data, Form):
+            notion_data = Form.from_form_data(notion_data)
+
+        sections = []
+        section_order = [
+            ('Patient Profile', True),    # Section 1: standard
+            ('Assessment', False),        # Section 2: unique per form
+            ('Medical History', True),    # Section 3: standard
+            ('Verification', True)        # Section 4: standard
+        ]
+
+        for order, (title, is_standard) in enumerate(section_order, 1):
+            section = notion_data.section(title)
+            if section is not None:
+                sections.append(FormSection(
+                    title=title,
+                    questions=section.questions,
+                    order=order,
+                    is_standard=is_standard
+                ))
+
+        # Note: State is now handled in Verification section via address
+
+        return sections
+
+    def build_complete_form_html(self, form_name: str, category: str, consult_type: str,
+                                sections: List[FormSection], options: Dict,
+                                context: Optional[RenderContext] = None) -> str:
+        """Build the complete form HTML with modern styling"""
+        return ''.join(self.iter_complete_form_html(form_name, category, consult_type, sections, options, context))
+
+    def iter_complete_form_html(self, form_name: str, category: str, consult_type: str,
+                                sections: List[FormSection], options: Dict,
+                                context: Optional[RenderContext] = None) -> Iterator[str]:
+        """
+        Yield the complete form HTML as head + styles, one chunk per section, then the script
+
+        With options["asset_dir"], the stylesheet and runtime are written there as
+        content-hashed files (see form_assets.py) and linked from options["asset_url"]
+        (default "assets/"); only the per-form config is inlined. With
+        options["lazy_sections"], only the first section is live DOM.
+        """
+        context = context or RenderContext()
+
+        # Generate CSS styles
+        styles = self.generate_modern_styles()
+        asset_dir = options.get('asset_dir') if options else None
+        form_attrs = ' data-events="delegated"' if options and options.get('delegate_events') else ''
+
+        if asset_dir:
+            bundle = context.asset_bundle = publish_assets(asset_dir, styles, self.generate_form_runtime(),
+                                                           bool(options.get('minify')))
+            asset_url = options.get('asset_url', 'assets/')
+            yield _LINKED_DOCUMENT_OPEN.render(form_name=form_name, stylesheet=asset_url + bundle.stylesheet.name,
+                                               category=category, consult_type=consult_type, form_attrs=form_attrs)
+        else:
+            yield _DOCUMENT_OPEN.render(form_name=form_name, styles=styles,
+                                        category=category, consult_type=consult_type, form_attrs=form_attrs)
+
+        # Later sections can ship as inert <template>s the runtime clones when first reached
+        lazy_sections = bool(options and options.get('lazy_sections'))
+        for i, section in enumerate(sections):
+            out: List[str] = []
+            self.write_section(out, i, section, context)
+            if lazy_sections and i > 0:
+                out.insert(0, f'<template id="section-template-{i + 1}">')
+                out.append('</template>')
+            yield ''.join(out)
+
+        # Per-form lookup tables for the runtime, kept out of the script so it stays shared
+        tables = {
+            "show_conditions": _json_block(self.build_show_conditions(sections)),
+            "field_bindings": _json_block(self.build_field_bindings(sections)),
+            "field_manifest": _json_block(self.build_field_manifest(sections))
+        }
+
+        if asset_dir:
+            config = self.generate_form_config(category, consult_type, form_name, len(sections))
+            yield _LINKED_DOCUMENT_CLOSE.render(config=config, script=asset_url + bundle.script.name, **tables)
+            return
+
+        # Generate JavaScript for conditional logic and form handling
+        javascript = self.generate_form_javascript(category, consult_type, form_name, len(sections))
+
+        yield _DOCUMENT_CLOSE.render(javascript=javascript, **tables)
+
+    def build_show_conditions(self, sections: Sequence[FormSection]) -> Dict[str, Dict[str, List]]:
+        """
+        Resolve every show condition to the inputs that trigger it
+
+        Returns {"dependents": {question_id: [[input name, value], ...]},
+                 "triggers": {input name: [question_id, ...]}}. A dependent question
+        is shown while any of its inputs is checked; the runtime re-evaluates only
+        the dependents of the input that changed. The rules live in show_conditions.py,
+        shared with the survey validator; if_SQ-N_yes resolves to the "yes" option of
+        the question whose Notion unique ID is SQ-N. Conditions that match no input
+        get an empty list and stay hidden.
+        """
+        questions = [q for section in sections for q in as_questions(section.questions)]
+        dependents: Dict[str, List[List[str]]] = {}
+        triggers: Dict[str, List[str]] = {}
+
+        for question in questions:
+            condition = question.show_condition
+            if condition == 'always' or not question.question_id:
+                continue
+
+            rule = CONDITION_RULES.get(condition)
+            target = None if rule else reference_target(condition)
+            inputs = []
+            for trigger in questions if rule or target else ():
+                if not trigger.question_id:
+                    continue
+                values = [option.value for option in trigger.options]
+                if rule:
+                    values = triggering_values(rule, trigger.text, trigger.question_type, values)
+                elif trigger.unique_id == target:
+                    values = [value for value in values if value == REFERENCE_ANSWER]
+                else:
+                    continue
+                inputs.extend([trigger.question_id, value] for value in values)
+
+            dependents[question.question_id] = inputs
+            for name, _ in inputs:
+                names = triggers.setdefault(name, [])
+                if question.question_id not in names:
+                    names.append(question.question_id)
+
+        return {"dependents": dependents, "triggers": triggers}
+
+    def build_field_manifest(self, sections: Sequence[FormSection]) -> Dict[str, List]:
+        """
+        Map each input name to [role, label, section] for buildWebhookData
+
+        The role is the payload key a question fills (see _FIELD_ROLES), or None for
+        a plain answer reported under its label. Grouped height/weight inputs use the
+        same fallback names write_height_weight_group renders.
+        """
+        manifest: Dict[str, List] = {}
+        assigned = set()
+
+        for section in sections:
+            questions = as_questions(section.questions)
+            in_group = set()
+            for i in range(len(questions)):
+                if _starts_height_weight_group(questions, i):
+                    in_group.update(range(i, i + 3))
+
+            for i, question in enumerate(questions):
+                name = question.question_id
+                if not name and i in in_group:
+                    name = _HEIGHT_WEIGHT_DEFAULT_NAMES[question.question_type]
+                if not name or question.question_type == 'formula':
+                    continue
+
+                text = question.text.lower()
+                role = next((rule.role for rule in _FIELD_ROLES
+                             if rule.role not in assigned and question.question_type in rule.types
+                             and (not rule.keywords or any(k in text for k in rule.keywords))), None)
+                if role:
+                    assigned.add(role)
+                manifest[name] = [role, question.text.strip(), section.title]
+
+        return manifest
+
+    def build_field_bindings(self, sections: Sequence[FormSection]) -> Dict[str, Any]:
+        """
+        Return the element IDs calculateBMI() reads and writes
+
+        {"heightFeet": id, "heightInches": id, "weight": id, "bmiResults": [id, ...]},
+        using the first height/weight input of each kind and every BMI display in
+        document order, with the same IDs write_section_questions renders.
+        """
+        bindings: Dict[str, Any] = {"heightFeet": None, "heightInches": None, "weight": None, "bmiResults": []}
+
+        def bind(key: str, element_id: str) -> None:
+            if element_id and bindings[key] is None:
+                bindings[key] = element_id
+
+        for section in sections:
+            questions = as_questions(section.questions)
+            i = 0
+            while i < len(questions):
+                question = questions[i]
+                if _starts_height_weight_group(questions, i):
+                    feet_q, inches_q, weight_q = questions[i:i + 3]
+                    bind("heightFeet", feet_q.question_id or _HEIGHT_WEIGHT_DEFAULT_NAMES['height_feet'])
+                    bind("heightInches", inches_q.question_id or _HEIGHT_WEIGHT_DEFAULT_NAMES['height_inches'])
+                    bind("weight", weight_q.question_id or _HEIGHT_WEIGHT_DEFAULT_NAMES['weight_pounds'])
+                    bindings["bmiResults"].append(_GROUP_BMI_RESULT_ID)
+                    i += 3
+                    continue
+
+                if question.question_type in _BMI_INPUT_KEYS:
+                    bind(_BMI_INPUT_KEYS[question.question_type], question.question_id)
+                elif question.question_type == 'formula' and question.question_id:
+                    bindings["bmiResults"].append(question.question_id)
+                i += 1
+
+        return bindings
+
+    def generate_all_sections(self, sections: List[FormSection], context: Optional[RenderContext] = None) -> str:
+        """Generate HTML for all 5 sections"""
+        out: List[str] = []
+        self.write_all_sections(out, sections, context)
+        return ''.join(out)
+
+    def write_all_sections(self, out: List[str], sections: List[FormSection],
+                           context: Optional[RenderContext] = None) -> None:
+        """Render all sections into the output buffer"""
+        context = context or RenderContext()
+        for i, section in enumerate(sections):
+            self.write_section(out, i, section, context)
+
+    def write_section(self, out: List[str], index: int, section: FormSection,
+                      context: Optional[RenderContext] = None) -> None:
+        """Render one section (the first one is shown initially), reusing its cached fragment"""
+        context = context or RenderContext()
+        questions = as_questions(section.questions)
+
+        # Questions without an ID are numbered from the render's counter, so their
+        # markup depends on what came before them and cannot be shared
+        if not all(q.question_id for q in questions):
+            self.write_section_markup(out, index, section.title, questions, context)
+            return
+
+        key = (index, section.title, questions, _delegates_events(context))
+        out.append(_FRAGMENT_CACHE.get_or_build(
+            key, lambda: self.render_section(index, section.title, questions, context)))
+
+    def render_section(self, index: int, title: str, questions: Sequence[Question],
+                       context: Optional[RenderContext] = None) -> str:
+        """Render one section to a string"""
+        out: List[str] = []
+        self.write_section_markup(out, index, title, questions, context)
+        return ''.join(out)
+
+    def write_section_markup(self, out: List[str], index: int, title: str, questions: Sequence[Question],
+                             context: Optional[RenderContext] = None) -> None:
+        """Render one section into the output buffer"""
+        section_class = "section active" if index == 0 else "section"
+        _SECTION_OPEN.render_to(out, section_class=section_class, number=str(index + 1), title=title)
+
+        # Regular questions from Notion data - group height/weight
+        self.write_section_questions(out, questions, context)
+
+        out.append(_SECTION_CLOSE)
+
+    def generate_section_questions(self, questions: Sequence[Union[Question, Dict]],
+                                   context: Optional[RenderContext] = None) -> str:
+        """Generate questions for a section, grouping height/weight together"""
+        out: List[str] = []
+        self.write_section_questions(out, questions, context)
+        return ''.join(out)
+
+    def write_section_questions(self, out: List[str], questions: Sequence[Union[Question, Dict]],
+                                context: Optional[RenderContext] = None) -> None:
+        """Render a section's questions into the output buffer, grouping height/weight together"""
+        context = context or RenderContext()
+        questions = as_questions(questions)
+        i = 0
+
+        while i < len(questions):
+            question = questions[i]
+
+            # Check if this is height_feet and next questions are height_inches, weight
+            if _starts_height_weight_group(questions, i):
+
+                # Generate grouped height/weight layout
+                self.write_height_weight_group(out, questions[i:i+3], context)
+                i += 3  # Skip next 2 questions as they're included in the group
+            else:
+                # Regular question
+                self.write_question_html(out, question, context)
+                i += 1
+
+    def generate_height_weight_group(self, height_weight_questions: Sequence[Union[Question, Dict]],
+                                     context: Optional[RenderContext] = None) -> str:
+        """Generate grouped height and weight inputs in 3-column layout"""
+        out: List[str] = []
+        self.write_height_weight_group(out, height_weight_questions, context)
+        return ''.join(out)
+
+    def write_height_weight_group(self, out: List[str], height_weight_questions: Sequence[Union[Question, Dict]],
+                                  context: Optional[RenderContext] = None) -> None:
+        """Render grouped height and weight inputs in 3-column layout into the output buffer"""
+        feet_q, inches_q, weight_q = as_questions(height_weight_questions[:3])
+
+        _HEIGHT_WEIGHT_GROUP.render_to(
+            out,
+            feet_input=self.generate_height_feet_input(
+                feet_q, feet_q.question_id or _HEIGHT_WEIGHT_DEFAULT_NAMES['height_feet'], context),
+            inches_input=self.generate_height_inches_input(
+                inches_q, inches_q.question_id or _HEIGHT_WEIGHT_DEFAULT_NAMES['height_inches'], context),
+            weight_input=self.generate_weight_input(
+                weight_q, weight_q.question_id or _HEIGHT_WEIGHT_DEFAULT_NAMES['weight_pounds'], context),
+            bmi_result_id=_GROUP_BMI_RESULT_ID
+        )
+
+    def generate_question_html(self, question: Union[Question, Dict], context: Optional[RenderContext] = None) -> str:
+        """Generate HTML for a single question with conditional logic"""
+        out: List[str] = []
+        self.write_question_html(out, question, context)
+        return ''.join(out)
+
+    def write_question_html(self, out: List[str], question: Union[Question, Dict],
+                            context: Optional[RenderContext] = None) -> None:
+        """Render a single question with conditional logic into the output buffer"""
+        question = as_question(question)
+        question_id = question.question_id or f"q_{self.get_next_id(context or RenderContext())}"
+        show_condition = question.show_condition
+        disqualify_message = question.disqualify_message
+
+        # Determine if question should be hidden by default
+        hidden_class = '' if show_condition == 'always' else 'question-hidden'
+
+        _QUESTION_OPEN.render_to(
+            out,
+            hidden_class=hidden_class,
+            question_id=question_id,
+            show_condition=show_condition,
+            text=question.text,
+            required_marker=_REQUIRED_MARKER if question.required else ''
+        )
+        self.write_input_html(out, question, question_id, context)
+        _QUESTION_CLOSE.render_to(
+            out,
+            disqualify_block=_DISQUALIFY_BLOCK.render(message=disqualify_message) if disqualify_message else ''
+        )
+
+    def write_input_html(self, out: List[str], question: Union[Question, Dict], question_id: str,
+                         context: Optional[RenderContext] = None) -> None:
+        """Render the input for a question into the output buffer"""
+        question = as_question(question)
+        if question.question_type in _CHOICE_TYPES:
+            self.write_choice_input(out, question, question_id, question.question_type, context)
+        elif question.question_type == 'dropdown':
+            self.write_dropdown_input(out, question, question_id)
+        else:
+            out.append(self.generate_input_html(question, question_id, context))
+
+    def generate_input_html(self, question: Union[Question, Dict], question_id: str,
+                            context: Optional[RenderContext] = None) -> str:
         """Generate the appropriate input HTML based on question type"""
-        question_type = question.get('questionType', 'text')
+        question = as_question(question)
+        question_type = question.question_type
 
         if question_type in ['text', 'email', 'phone']:
-            return self.generate_text_input(question, question_id)
+            return self.generate_text_input(question, question_id, context)
         elif question_type == 'date':
-            return self.generate_date_input(question, question_id)
+            return self.generate_date_input(question, question_id, context)
         elif question_type == 'radio':
-            return self.generate_radio_input(question, question_id)
+            return self.generate_radio_input(question, question_id, context)
         elif question_type == 'checkbox':
-            return self.generate_checkbox_input(question, question_id)
+            return self.generate_checkbox_input(question, question_id, context)
         elif question_type == 'file':
-            return self.generate_file_input(question, question_id)
+            return self.generate_file_input(question, question_id, context)
         elif question_type == 'height_feet':
-            return self.generate_height_feet_input(question, question_id)
+            return self.generate_height_feet_input(question, question_id, context)
         elif question_type == 'height_inches':
-            return self.generate_height_inches_input(question, question_id)
+            return self.generate_height_inches_input(question, question_id, context)
         elif question_type == 'weight_pounds':
-            return self.generate_weight_input(question, question_id)
+            return self.generate_weight_input(question, question_id, context)
         elif question_type == 'formula':
             return self.generate_formula_display(question, question_id)
         elif question_type == 'dropdown':
@@ -316,10 +887,12 @@ class EnhancedFormGenerator:
         else:
             return f'<input type="text" id="{question_id}" name="{question_id}" class="form-input">'
 
-    def generate_text_input(self, question: Dict, question_id: str) -> str:
+    def generate_text_input(self, question: Union[Question, Dict], question_id: str,
+                            context: Optional[RenderContext] = None) -> str:
         """Generate text, email, or phone input"""
-        question_type = question.get('questionType', 'text')
-        required = question.get('required', False)
+        question = as_question(question)
+        question_type = question.question_type
+        required = question.required
 
         input_type = 'email' if question_type == 'email' else 'tel' if question_type == 'phone' else 'text'
 
@@ -329,268 +902,108 @@ class EnhancedFormGenerator:
             autocomplete_value = "email"
         elif question_type == 'phone':
             autocomplete_value = "tel"
-        elif 'name' in question.get('questionText', '').lower():
+        elif 'name' in question.text.lower():
             autocomplete_value = "name"
 
         # Add phone-specific attributes
         phone_attrs = ""
         if question_type == 'phone':
-            phone_attrs = 'oninput="formatPhoneInput(this)" maxlength="14" placeholder="(555) 123-4567"'
+            phone_attrs = f'{_event_attribute("format-phone", context)} maxlength="14" placeholder="(555) 123-4567"'
 
-        return f'''
-            <input type="{input_type}"
-                   id="{question_id}"
-                   name="{question_id}"
-                   class="form-input"
-                   autocomplete="{autocomplete_value}"
-                   {phone_attrs}
-                   {'required' if required else ''}>
-        '''
+        return _TEXT_INPUT.render(input_type=input_type, question_id=question_id, autocomplete=autocomplete_value,
+                                  phone_attrs=phone_attrs, required='required' if required else '')
 
-    def generate_date_input(self, question: Dict, question_id: str) -> str:
+    def generate_date_input(self, question: Union[Question, Dict], question_id: str,
+                            context: Optional[RenderContext] = None) -> str:
         """Generate date input with age validation"""
-        required = question.get('required', False)
-
-        return f'''
-            <input type="date"
-                   id="{question_id}"
-                   name="{question_id}"
-                   class="form-input date-input"
-                   {'required' if required else ''}
-                   onchange="validateAge(this)">
-        '''
+        required = as_question(question).required
+        return _DATE_INPUT.render(question_id=question_id, required='required' if required else '',
+                                  handler=_event_attribute('validate-age', context))
 
-    def generate_radio_input(self, question: Dict, question_id: str) -> str:
+    def generate_radio_input(self, question: Union[Question, Dict], question_id: str,
+                             context: Optional[RenderContext] = None) -> str:
         """Generate radio button options"""
-        safe_answers = question.get('safeAnswers', [])
-        flag_answers = question.get('flagAnswers', [])
-        disqualify_answers = question.get('disqualifyAnswers', [])
-
-        # Create options from all answer types
-        all_options = set(safe_answers + flag_answers + disqualify_answers)
-
-        # Sort options to put "none" and "no" options last
-        sorted_options = sorted(all_options, key=lambda x: (
-            x.lower().startswith('none'),
-            x.lower() == 'none_of_the_above',
-            x.lower() == 'no',
-            x.lower()
-        ))
-
-        html = '<div class="radio-group">'
-        for option in sorted_options:
-            # Determine answer type for data attribute
-            answer_type = 'safe'
-            if option in disqualify_answers:
-                answer_type = 'disqualify'
-            elif option in flag_answers:
-                answer_type = 'flag'
-
-            option_label = option.replace('_', ' ').title()
-
-            html += f'''
-                <label class="radio-option">
-                    <input type="radio"
-                           name="{question_id}"
-                           value="{option}"
-                           data-answer-type="{answer_type}"
-                           autocomplete="off"
-                           onchange="handleAnswerChange(this)">
-                    <span class="radio-checkmark"></span>
-                    {option_label}
-                </label>
-            '''
-
-        html += '</div>'
-        return html
+        out: List[str] = []
+        self.write_choice_input(out, question, question_id, 'radio', context)
+        return ''.join(out)
 
-    def generate_checkbox_input(self, question: Dict, question_id: str) -> str:
+    def generate_checkbox_input(self, question: Union[Question, Dict], question_id: str,
+                                context: Optional[RenderContext] = None) -> str:
         """Generate checkbox options"""
-        safe_answers = question.get('safeAnswers', [])
-        flag_answers = question.get('flagAnswers', [])
-        disqualify_answers = question.get('disqualifyAnswers', [])
-
-        # Create options from all answer types
-        all_options = set(safe_answers + flag_answers + disqualify_answers)
-
-        # Sort options to put "none" and "no" options last
-        sorted_options = sorted(all_options, key=lambda x: (
-            x.lower().startswith('none'),
-            x.lower() == 'none_of_the_above',
-            x.lower() == 'no',
-            x.lower()
-        ))
-
-        html = '<div class="checkbox-group">'
-        for option in sorted_options:
-            # Determine answer type for data attribute
-            answer_type = 'safe'
-            if option in disqualify_answers:
-                answer_type = 'disqualify'
-            elif option in flag_answers:
-                answer_type = 'flag'
-
-            option_label = option.replace('_', ' ').title()
-
-            html += f'''
-                <label class="checkbox-option">
-                    <input type="checkbox"
-                           name="{question_id}"
-                           value="{option}"
-                           data-answer-type="{answer_type}"
-                           autocomplete="off"
-                           onchange="handleAnswerChange(this)">
-                    <span class="checkbox-checkmark"></span>
-                    {option_label}
-                </label>
-            '''
-
-        html += '</div>'
-        return html
-
-    def generate_file_input(self, question: Dict, question_id: str) -> str:
+        out: List[str] = []
+        self.write_choice_input(out, question, question_id, 'checkbox', context)
+        return ''.join(out)
+
+    def write_choice_input(self, out: List[str], question: Union[Question, Dict], question_id: str, kind: str,
+                           context: Optional[RenderContext] = None) -> None:
+        """Render radio or checkbox options into the output buffer"""
+        # Options are de-duplicated, typed and sorted ("none"/"no" last) when the question is compiled
+        question = as_question(question)
+        handler = _event_attribute('answer', context)
+        handler = f'\n                           {handler}' if handler else ''
+
+        out.append(f'<div class="{kind}-group">')
+        for option in question.options:
+            _CHOICE_OPTION.render_to(out, kind=kind, question_id=question_id, value=option.value,
+                                     answer_type=option.answer_type, label=option.label, handler=handler)
+        out.append('</div>')
+
+    def generate_file_input(self, question: Dict, question_id: str, context: Optional[RenderContext] = None) -> str:
         """Generate file upload input with better handling"""
-        return f'''
-            <div class="file-input-container">
-                <input type="file"
-                       id="{question_id}"
-                       name="{question_id}"
-                       class="file-input"
-                       accept="image/*,.pdf"
-                       onchange="handleFileUpload(this)">
-                <label for="{question_id}" class="file-input-label">
-                    <span class="file-input-text" id="{question_id}_text">Choose File</span>
-                    <span class="file-input-button">Browse</span>
-                </label>
-            </div>
-        '''
+        return _FILE_INPUT.render(question_id=question_id, handler=_event_attribute('file-upload', context))
 
-    def generate_height_feet_input(self, question: Dict, question_id: str) -> str:
+    def generate_height_feet_input(self, question: Dict, question_id: str, context: Optional[RenderContext] = None) -> str:
         """Generate height feet input - part of 3-column layout"""
-        return f'''
-            <div class="height-input-group">
-                <input type="number"
-                       id="{question_id}"
-                       name="{question_id}"
-                       class="form-input height-input"
-                       min="3" max="8"
-                       placeholder="Feet"
-                       onchange="calculateBMI()">
-                <span class="input-suffix">ft</span>
-            </div>
-        '''
+        return _MEASUREMENT_INPUT.render(kind='height', question_id=question_id, min='3', max='8',
+                                         placeholder='Feet', handler=_event_attribute('bmi', context), suffix='ft')
 
-    def generate_height_inches_input(self, question: Dict, question_id: str) -> str:
+    def generate_height_inches_input(self, question: Dict, question_id: str, context: Optional[RenderContext] = None) -> str:
         """Generate height inches input - part of 3-column layout"""
-        return f'''
-            <div class="height-input-group">
-                <input type="number"
-                       id="{question_id}"
-                       name="{question_id}"
-                       class="form-input height-input"
-                       min="0" max="11"
-                       placeholder="Inches"
-                       onchange="calculateBMI()">
-                <span class="input-suffix">in</span>
-            </div>
-        '''
+        return _MEASUREMENT_INPUT.render(kind='height', question_id=question_id, min='0', max='11',
+                                         placeholder='Inches', handler=_event_attribute('bmi', context), suffix='in')
 
-    def generate_weight_input(self, question: Dict, question_id: str) -> str:
+    def generate_weight_input(self, question: Dict, question_id: str, context: Optional[RenderContext] = None) -> str:
         """Generate weight input - part of 3-column layout"""
-        return f'''
-            <div class="weight-input-group">
-                <input type="number"
-                       id="{question_id}"
-                       name="{question_id}"
-                       class="form-input weight-input"
-                       min="50" max="500"
-                       placeholder="Weight"
-                       onchange="calculateBMI()">
-                <span class="input-suffix">lbs</span>
-            </div>
-        '''
+        return _MEASUREMENT_INPUT.render(kind='weight', question_id=question_id, min='50', max='500',
+                                         placeholder='Weight', handler=_event_attribute('bmi', context), suffix='lbs')
 
     def generate_formula_display(self, question: Dict, question_id: str) -> str:
         """Generate BMI formula display (calculated automatically)"""
-        return f'''
-            <div class="formula-display">
-                <div id="{question_id}" class="bmi-result">
-                    <span class="bmi-label">BMI: </span>
-                    <span class="bmi-value" id="bmi-value">Enter height and weight above</span>
-                </div>
-            </div>
-        '''
+        return _FORMULA_DISPLAY.render(question_id=question_id)
 
-    def generate_dropdown_input(self, question: Dict, question_id: str) -> str:
+    def generate_dropdown_input(self, question: Union[Question, Dict], question_id: str) -> str:
         """Generate dropdown select input"""
-        question_text = question.get('questionText', '')
-
-        if 'state' in question_text.lower():
-            # Generate state dropdown
-            states = [
-                ('AL', 'Alabama'), ('AK', 'Alaska'), ('AZ', 'Arizona'), ('AR', 'Arkansas'),
-                ('CA', 'California'), ('CO', 'Colorado'), ('CT', 'Connecticut'), ('DE', 'Delaware'),
-                ('DC', 'District of Columbia'), ('FL', 'Florida'), ('GA', 'Georgia'), ('HI', 'Hawaii'),
-                ('ID', 'Idaho'), ('IL', 'Illinois'), ('IN', 'Indiana'), ('IA', 'Iowa'),
-                ('KS', 'Kansas'), ('KY', 'Kentucky'), ('LA', 'Louisiana'), ('ME', 'Maine'),
-                ('MD', 'Maryland'), ('MA', 'Massachusetts'), ('MI', 'Michigan'), ('MN', 'Minnesota'),
-                ('MS', 'Mississippi'), ('MO', 'Missouri'), ('MT', 'Montana'), ('NE', 'Nebraska'),
-                ('NV', 'Nevada'), ('NH', 'New Hampshire'), ('NJ', 'New Jersey'), ('NM', 'New Mexico'),
-                ('NY', 'New York'), ('NC', 'North Carolina'), ('ND', 'North Dakota'), ('OH', 'Ohio'),
-                ('OK', 'Oklahoma'), ('OR', 'Oregon'), ('PA', 'Pennsylvania'), ('RI', 'Rhode Island'),
-                ('SC', 'South Carolina'), ('SD', 'South Dakota'), ('TN', 'Tennessee'), ('TX', 'Texas'),
-                ('UT', 'Utah'), ('VT', 'Vermont'), ('VA', 'Virginia'), ('WA', 'Washington'),
-                ('WV', 'West Virginia'), ('WI', 'Wisconsin'), ('WY', 'Wyoming')
-            ]
-
-            options_html = '<option value="">Choose your state...</option>'
-            for code, name in states:
-                options_html += f'<option value="{code}">{name}</option>'
-
-            return f'''
-                <select id="{question_id}" name="{question_id}" class="form-input state-select" required>
-                    {options_html}
-                </select>
-            '''
+        out: List[str] = []
+        self.write_dropdown_input(out, question, question_id)
+        return ''.join(out)
+
+    def write_dropdown_input(self, out: List[str], question: Union[Question, Dict], question_id: str) -> None:
+        """Render a dropdown select into the output buffer"""
+        if 'state' in as_question(question).text.lower():
+            _SELECT_OPEN.render_to(out, question_id=question_id, select_class='form-input state-select')
+            _OPTION.render_to(out, value='', label='Choose your state...')
+            for code, name in _US_STATES:
+                _OPTION.render_to(out, value=code, label=name)
         else:
             # Generic dropdown
-            return f'''
-                <select id="{question_id}" name="{question_id}" class="form-input" required>
-                    <option value="">Choose an option...</option>
-                </select>
-            '''
+            _SELECT_OPEN.render_to(out, question_id=question_id, select_class='form-input')
+            _OPTION.render_to(out, value='', label='Choose an option...')
+        out.append(_SELECT_CLOSE)
 
     def generate_state_selector(self) -> str:
         """Generate the custom state selector (section 5)"""
-        states = [
-            'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
-            'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
-            'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
-            'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
-            'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY'
-        ]
-
-        html = '''
-            <div class="question-container">
-                <label class="question-label">Select your state <span class="required-asterisk">*</span></label>
-                <div class="answer-container">
-                    <select id="state-selector" name="state" class="form-input state-select" required>
-                        <option value="">Choose your state...</option>
-        '''
-
-        for state in states:
+        out = [_STATE_SELECTOR_OPEN]
+        for state in _SELECTOR_STATES:
             sync_indicator = ' (Sync Only)' if state in self.sync_only_states else ''
-            html += f'<option value="{state}">{state}{sync_indicator}</option>'
-
-        html += '''
-                    </select>
-                </div>
-            </div>
-        '''
-
-        return html
+            _OPTION.render_to(out, value=state, label=state + sync_indicator)
+        out.append(_STATE_SELECTOR_CLOSE)
+        return ''.join(out)
 
     def generate_modern_styles(self) -> str:
+        """Return the modern, clean CSS styles (constant, so built once per process)"""
+        return _STYLE_CACHE.get_or_build((), self._build_modern_styles)
+
+    def _build_modern_styles(self) -> str:
         """Generate modern, clean CSS styles"""
         return '''
             * {
@@ -963,22 +1376,89 @@ class EnhancedFormGenerator:
         '''
 
     def generate_form_javascript(self, category: str, consult_type: str, form_name: str = "form", total_sections: int = 4) -> str:
+        """Return the form JavaScript, reusing the cached block for the same form parameters"""
+        # The sync-only states are baked into the script too, so they are part of the key
+        key = (category, consult_type, form_name, total_sections, tuple(self.sync_only_states))
+        return _SCRIPT_CACHE.get_or_build(
+            key, lambda: self._build_form_javascript(category, consult_type, form_name, total_sections)
+        )
+
+    def generate_form_runtime(self) -> str:
+        """Return the shared form script for external assets; per-form values come from FORM_CONFIG"""
+        return _SCRIPT_CACHE.get_or_build(('runtime',), lambda: self._build_script({
+            "total_sections": "FORM_CONFIG.totalSections",
+            "storage_key": "`medicalForm_${FORM_CONFIG.formName}_${FORM_CONFIG.category}`",
+            "sync_only_states": "FORM_CONFIG.syncOnlyStates",
+            "form_name": "FORM_CONFIG.formName",
+            "category": "FORM_CONFIG.category",
+            "consult_type": "FORM_CONFIG.consultType",
+            "category_path": "${FORM_CONFIG.category.toLowerCase()}"
+        }))
+
+    def generate_form_config(self, category: str, consult_type: str, form_name: str, total_sections: int) -> str:
+        """Return the inline script that sets FORM_CONFIG for the shared runtime"""
+        config = _json_block({
+            "formName": form_name,
+            "category": category,
+            "consultType": consult_type,
+            "totalSections": total_sections,
+            "syncOnlyStates": self.sync_only_states
+        })
+        return f"window.FORM_CONFIG = {config};"
+
+    def _build_form_javascript(self, category: str, consult_type: str, form_name: str, total_sections: int) -> str:
         """Generate JavaScript for form functionality and conditional logic - FIXED VERSION"""
-        sync_only_states = json.dumps(self.sync_only_states)
+        return self._build_script({
+            "total_sections": str(total_sections),
+            "storage_key": f"'medicalForm_{form_name}_{category}'",
+            "sync_only_states": json.dumps(self.sync_only_states),
+            "form_name": f"'{form_name}'",
+            "category": f"'{category}'",
+            "consult_type": f"'{consult_type}'",
+            "category_path": category.lower()
+        })
+
+    def _build_script(self, values: Dict[str, str]) -> str:
+        """
+        Fill the form script with JavaScript source for each per-form value
 
+        The inline script gets literals; the shared runtime gets FORM_CONFIG lookups.
+        """
         return f'''
             // Form state
             let currentSection = 1;
-            const totalSections = {total_sections};
+            const totalSections = {values['total_sections']};
             let formData = {{}};
             let isDisqualified = false;
             let errorMessages = new Map();
 
             // Local storage key for this form
-            const storageKey = 'medicalForm_{form_name}_{category}';
+            const storageKey = {values['storage_key']};
 
             // Sync-only states
-            const syncOnlyStates = {sync_only_states};
+            const syncOnlyStates = {values['sync_only_states']};
+
+            // Show conditions resolved when the form was generated (see build_show_conditions)
+            const showConditions = JSON.parse(document.getElementById('show-conditions')?.textContent || 'null') ||
+                                   {{ dependents: {{}}, triggers: {{}} }};
+
+            // Conditional question ID -> its wrapper element and the inputs that show it
+            const conditionalQuestions = new Map();
+
+            // Height/weight inputs and BMI displays resolved when the form was generated (see build_field_bindings)
+            const fieldBindings = JSON.parse(document.getElementById('field-bindings')?.textContent || 'null') ||
+                                  {{ bmiResults: [] }};
+
+            // The bound elements, looked up once
+            let bmiFields = null;
+
+            // Input name -> [payload role or null, question label, section] (see build_field_manifest)
+            const fieldManifest = JSON.parse(document.getElementById('field-manifest')?.textContent || 'null') || {{}};
+
+            // Roles reported in the contact/patient blocks only, not repeated under form responses
+            const mappedRoles = new Set(['name', 'email', 'phone', 'address1', 'address2', 'city', 'state', 'postalCode',
+                                         'pregnancy', 'allergies', 'activityLevel', 'tobaccoUse', 'mentalHealth',
+                                         'idVerification']);
 
             // Initialize form
             document.addEventListener('DOMContentLoaded', function() {{
@@ -1051,30 +1531,11 @@ class EnhancedFormGenerator:
                         formData = data.formData || {{}};
                         currentSection = data.currentSection || 1;
 
-                        // Restore form values
-                        Object.keys(formData).forEach(name => {{
-                            const input = document.querySelector(`[name="${{name}}"]`);
-                            if (input) {{
-                                if (input.type === 'radio' || input.type === 'checkbox') {{
-                                    if (input.value === formData[name]) {{
-                                        input.checked = true;
-                                    }}
-                                }} else if (input.type === 'file') {{
-                                    // Handle file uploads - show filename if available
-                                    const fileData = formData[name];
-                                    if (fileData && typeof fileData === 'object' && fileData.filename) {{
-                                        const textElement = document.getElementById(input.id + '_text');
-                                        const label = input.closest('.file-input-container').querySelector('.file-input-label');
-                                        if (textElement && label) {{
-                                            textElement.textContent = fileData.filename;
-                                            label.classList.add('file-selected');
-                                        }}
-                                    }}
-                                }} else {{
-                                    input.value = formData[name];
-                                }}
-                            }}
-                        }});
+                        // Restore form values; sections still in a <template> are restored when first shown
+                        restoreFormValues(document);
+                        for (let i = 2; i <= currentSection; i++) {{
+                            materializeSection(i);
+                        }}
 
                         // Update UI to match restored section
                         if (currentSection > 1) {{
@@ -1089,6 +1550,58 @@ class EnhancedFormGenerator:
                 }}
             }}
 
+            function restoreFormValues(root) {{
+                // Put the saved answers back into the inputs under root
+                Object.keys(formData).forEach(name => {{
+                    const input = root.querySelector(`[name="${{name}}"]`);
+                    if (input) {{
+                        if (input.type === 'radio' || input.type === 'checkbox') {{
+                            // Checkbox answers are saved as the array of checked values
+                            const saved = formData[name];
+                            root.querySelectorAll(`[name="${{name}}"]`).forEach(choice => {{
+                                if (Array.isArray(saved) ? saved.includes(choice.value) : choice.value === saved) {{
+                                    choice.checked = true;
+                                }}
+                            }});
+                        }} else if (input.type === 'file') {{
+                            // Handle file uploads - show filename if available
+                            const fileData = formData[name];
+                            if (fileData && typeof fileData === 'object' && fileData.filename) {{
+                                const textElement = document.getElementById(input.id + '_text');
+                                const label = input.closest('.file-input-container').querySelector('.file-input-label');
+                                if (textElement && label) {{
+                                    textElement.textContent = fileData.filename;
+                                    label.classList.add('file-selected');
+                                }}
+                            }}
+                        }} else {{
+                            input.value = formData[name];
+                        }}
+                    }}
+                }});
+            }}
+
+            function materializeSection(number) {{
+                // Return section-<number>, cloning it from its <template> the first time it is needed
+                const existing = document.getElementById(`section-${{number}}`);
+                if (existing) return existing;
+
+                const template = document.getElementById(`section-template-${{number}}`);
+                if (!template) return null;
+                template.replaceWith(template.content.cloneNode(true));
+                const section = document.getElementById(`section-${{number}}`);
+
+                restoreFormValues(section);
+                bmiFields = null;
+                if (document.getElementById('medicalForm').dataset.events !== 'delegated') listenForBMI(section);
+                registerConditionalQuestions(section);
+                // Show questions whose trigger was already answered (restored or in an earlier section)
+                conditionalQuestions.forEach(entry => {{
+                    if (entry.inputs.some(input => input.checked)) entry.element.classList.remove('question-hidden');
+                }});
+                return section;
+            }}
+
             function saveFormData() {{
                 try {{
                     const dataToSave = {{
@@ -1116,94 +1629,83 @@ class EnhancedFormGenerator:
                 document.getElementById('prevBtn').addEventListener('click', prevSection);
                 document.getElementById('submitBtn').addEventListener('click', submitForm);
 
-                // Height/weight inputs for BMI calculation
-                const heightFeet = document.querySelector('input[name*="SQ48"]');
-                const heightInches = document.querySelector('input[name*="SQ49"]');
-                const weight = document.querySelector('input[name*="SQ2"]');
+                const form = document.getElementById('medicalForm');
+                if (form.dataset.events === 'delegated') {{
+                    // Inputs carry data-action instead of inline handlers
+                    setupDelegatedEvents(form);
+                    return;
+                }}
 
-                if (heightFeet) heightFeet.addEventListener('input', calculateBMI);
-                if (heightInches) heightInches.addEventListener('input', calculateBMI);
-                if (weight) weight.addEventListener('input', calculateBMI);
+                listenForBMI(document);
             }}
 
-            function setupConditionalLogic() {{
-                // Set up conditional question display
-                const questions = document.querySelectorAll('[data-show-condition]');
-                questions.forEach(question => {{
-                    const condition = question.dataset.showCondition;
-                    if (condition !== 'always') {{
-                        question.classList.add('question-hidden');
-                    }}
+            function listenForBMI(root) {{
+                // Height/weight inputs under root recalculate BMI as they are typed
+                const fields = bindBMIFields();
+                [fields.heightFeet, fields.heightInches, fields.weight].forEach(input => {{
+                    if (input && root.contains(input)) input.addEventListener('input', calculateBMI);
                 }});
+            }}
 
-                // Set up listeners for trigger inputs
-                // Gender questions (triggers pregnancy question)
-                const genderInputs = document.querySelectorAll('input[type="radio"][value="female"], input[type="radio"][value="male"]');
-                genderInputs.forEach(input => {{
-                    input.addEventListener('change', updateConditionalQuestions);
+            // data-action -> handler, per event type; choices (data-answer-type) use "answer"
+            const delegatedActions = {{
+                change: {{ 'answer': handleAnswerChange, 'validate-age': validateAge, 'file-upload': handleFileUpload }},
+                input: {{ 'format-phone': formatPhoneInput, 'bmi': calculateBMI }}
+            }};
+
+            function setupDelegatedEvents(form) {{
+                // One listener per event type for the whole form, however many inputs it has
+                Object.keys(delegatedActions).forEach(type => {{
+                    form.addEventListener(type, event => {{
+                        const input = event.target;
+                        const action = input.dataset.action || (input.dataset.answerType ? 'answer' : '');
+                        const handler = delegatedActions[type][action];
+                        if (handler) handler(input);
+                    }});
                 }});
+            }}
 
-                // Allergy questions (triggers allergy detail question)
-                const allergyInputs = document.querySelectorAll('input[type="radio"][value="yes"], input[type="radio"][value="no"]');
-                allergyInputs.forEach(input => {{
-                    if (input.closest('.question-container').querySelector('label[class*="question-label"]')?.textContent?.includes('allergies')) {{
-                        input.addEventListener('change', updateConditionalQuestions);
-                    }}
+            function setupConditionalLogic() {{
+                registerConditionalQuestions(document);
+            }}
+
+            function registerConditionalQuestions(root) {{
+                // Hide the conditional questions under root and record them
+                const questions = root.querySelectorAll('[data-show-condition]');
+                questions.forEach(question => {{
+                    const condition = question.dataset.showCondition;
+                    if (condition === 'always') return;
+
+                    question.classList.add('question-hidden');
+                    conditionalQuestions.set(question.dataset.questionId, {{ element: question, inputs: [] }});
                 }});
 
-                // Other GLP-1 medication questions (triggers dosage question)
-                const medicationInputs = document.querySelectorAll('input[type="checkbox"][value*="glp1"], input[type="checkbox"][value*="other_glp1"]');
-                medicationInputs.forEach(input => {{
-                    input.addEventListener('change', updateConditionalQuestions);
+                // Look up trigger inputs once per new section; a trigger may live in any live section
+                conditionalQuestions.forEach((entry, questionId) => {{
+                    entry.inputs = (showConditions.dependents[questionId] || [])
+                        .map(([name, value]) => Array.from(document.getElementsByName(name)).find(input => input.value === value))
+                        .filter(Boolean);
                 }});
             }}
 
-            function updateConditionalQuestions() {{
-                // Update visibility of conditional questions
-                const questions = document.querySelectorAll('[data-show-condition]');
-                questions.forEach(question => {{
-                    const condition = question.dataset.showCondition;
-                    checkQuestionVisibility(question, condition);
+            function updateDependentQuestions(inputName) {{
+                // Re-evaluate only the questions whose show condition reads this input
+                const dependents = showConditions.triggers[inputName];
+                if (!dependents) return;
+                dependents.forEach(questionId => {{
+                    const entry = conditionalQuestions.get(questionId);
+                    if (entry) checkQuestionVisibility(entry);
                 }});
             }}
 
-            function checkQuestionVisibility(questionElement, condition) {{
-                let shouldShow = false;
-
-                if (condition === 'always') {{
-                    shouldShow = true;
-                }} else if (condition === 'if_gender_female') {{
-                    const genderInput = document.querySelector('input[type="radio"][value="female"]:checked');
-                    shouldShow = genderInput && genderInput.value === 'female';
-                }} else if (condition === 'if_allergies_yes') {{
-                    // Find the checked radio button with value "yes" in any allergy question
-                    const allergyInputs = document.querySelectorAll('input[type="radio"][value="yes"]:checked');
-                    for (let input of allergyInputs) {{
-                        const questionText = input.closest('.question-container').querySelector('label[class*="question-label"]')?.textContent;
-                        if (questionText && questionText.toLowerCase().includes('allergies')) {{
-                            shouldShow = true;
-                            break;
-                        }}
-                    }}
-                }} else if (condition === 'if_other_glp1s_yes') {{
-                    // Check if any "other_glp1" checkbox is checked
-                    const glp1Input = document.querySelector('input[type="checkbox"][value*="other_glp1"]:checked');
-                    shouldShow = glp1Input !== null;
-                }} else if (condition === 'if_tobacco_yes' || condition === 'if_tobacco_use_yes') {{
-                    // Find the checked radio button with value "yes" in any tobacco question
-                    const tobaccoInputs = document.querySelectorAll('input[type="radio"][value="yes"]:checked');
-                    for (let input of tobaccoInputs) {{
-                        const questionText = input.closest('.question-container').querySelector('label[class*="question-label"]')?.textContent;
-                        if (questionText && (questionText.toLowerCase().includes('tobacco') || questionText.toLowerCase().includes('vape'))) {{
-                            shouldShow = true;
-                            break;
-                        }}
-                    }}
-                }}
+            function checkQuestionVisibility(entry) {{
+                const questionElement = entry.element;
+                const shouldShow = entry.inputs.some(input => input.checked);
 
                 if (shouldShow) {{
                     questionElement.classList.remove('question-hidden');
                 }} else {{
+                    const wasVisible = !questionElement.classList.contains('question-hidden');
                     questionElement.classList.add('question-hidden');
                     // Clear values when hidden
                     const inputs = questionElement.querySelectorAll('input, select, textarea');
@@ -1221,6 +1723,8 @@ class EnhancedFormGenerator:
                         const disqualMsg = questionElement.querySelector('.disqualification-message');
                         if (disqualMsg) disqualMsg.style.display = 'none';
                     }}
+                    // Its cleared answers may in turn hide questions that depend on it
+                    if (wasVisible && questionId) updateDependentQuestions(questionId);
                 }}
             }}
 
@@ -1282,78 +1786,74 @@ class EnhancedFormGenerator:
                     formData[input.name] = input.value;
                 }}
 
-                // Update conditional questions based on this answer
-                updateConditionalQuestions();
+                // Update the questions that depend on this answer
+                updateDependentQuestions(input.name);
 
                 // Save form data
                 saveFormData();
             }}
 
+            function bindBMIFields() {{
+                if (!bmiFields) {{
+                    const byId = id => id ? document.getElementById(id) : null;
+                    const results = (fieldBindings.bmiResults || []).map(byId).filter(Boolean);
+                    bmiFields = {{
+                        heightFeet: byId(fieldBindings.heightFeet),
+                        heightInches: byId(fieldBindings.heightInches),
+                        weight: byId(fieldBindings.weight),
+                        displays: results.map(result => result.querySelector('.bmi-value')).filter(Boolean),
+                        // BMI disqualification is shown on the question holding the first display
+                        question: results.length ? results[0].closest('.question-wrapper') : null
+                    }};
+                }}
+                return bmiFields;
+            }}
+
             function calculateBMI() {{
-                // Find height and weight inputs dynamically by looking for the pattern in Patient Profile
-                const heightFeetInput = document.querySelector('input[placeholder*="Feet"], input[class*="height-input"][id*="ft"], input[name*="feet"]') ||
-                                       Array.from(document.querySelectorAll('input')).find(input =>
-                                           input.closest('.question-container')?.textContent?.includes('Height') &&
-                                           input.closest('.question-container')?.textContent?.includes('feet'));
-
-                const heightInchesInput = document.querySelector('input[placeholder*="Inches"], input[class*="height-input"][id*="in"], input[name*="inches"]') ||
-                                         Array.from(document.querySelectorAll('input')).find(input =>
-                                             input.closest('.question-container')?.textContent?.includes('Height') &&
-                                             input.closest('.question-container')?.textContent?.includes('inches'));
-
-                const weightInput = document.querySelector('input[placeholder*="Weight"], input[class*="weight-input"], input[name*="weight"]') ||
-                                   Array.from(document.querySelectorAll('input')).find(input =>
-                                       input.closest('.question-container')?.textContent?.includes('Weight') &&
-                                       input.closest('.question-container')?.textContent?.includes('pounds'));
-
-                const heightFeet = heightFeetInput?.value;
-                const heightInches = heightInchesInput?.value;
-                const weight = weightInput?.value;
-                const bmiDisplay = document.getElementById('bmi-value');
-
-                if (heightFeet && heightInches && weight && bmiDisplay) {{
+                const fields = bindBMIFields();
+                const heightFeet = fields.heightFeet?.value;
+                const heightInches = fields.heightInches?.value;
+                const weight = fields.weight?.value;
+
+                if (heightFeet && heightInches && weight && fields.displays.length) {{
                     const totalInches = (parseInt(heightFeet) * 12) + parseInt(heightInches);
                     const bmi = (parseFloat(weight) * 703) / (totalInches * totalInches);
 
                     if (!isNaN(bmi)) {{
-                        bmiDisplay.textContent = bmi.toFixed(1);
+                        fields.displays.forEach(display => display.textContent = bmi.toFixed(1));
                         formData.bmi = bmi.toFixed(1);
 
+                        const bmiQuestion = fields.question;
                         // Check BMI disqualification for GLP1 specifically (only if form name includes GLP1)
-                        if ('{form_name}'.includes('GLP1') && bmi < 25) {{
-                            // Find BMI question in Assessment section if it exists
-                            const assessmentBmiQuestion = document.querySelector('[data-question-id*="BMI"], [data-question-id*="bmi"], .bmi-result').closest('.question-wrapper');
-                            if (assessmentBmiQuestion) {{
-                                const questionId = assessmentBmiQuestion.getAttribute('data-question-id');
-                                let disqualMsg = assessmentBmiQuestion.querySelector('.disqualification-message');
+                        if ({values['form_name']}.includes('GLP1') && bmi < 25) {{
+                            if (bmiQuestion) {{
+                                const questionId = bmiQuestion.getAttribute('data-question-id');
+                                let disqualMsg = bmiQuestion.querySelector('.disqualification-message');
 
                                 // Create disqualification message if it doesn't exist
                                 if (!disqualMsg) {{
                                     disqualMsg = document.createElement('div');
                                     disqualMsg.className = 'disqualification-message';
                                     disqualMsg.textContent = 'A BMI of 25 or higher is required for this program.';
-                                    assessmentBmiQuestion.querySelector('.question-container').appendChild(disqualMsg);
+                                    bmiQuestion.querySelector('.question-container').appendChild(disqualMsg);
                                 }}
 
                                 disqualMsg.style.display = 'block';
                                 errorMessages.set(questionId, true);
                                 isDisqualified = true;
                             }}
-                        }} else {{
+                        }} else if (bmiQuestion) {{
                             // Clear BMI disqualification if BMI is now acceptable
-                            const assessmentBmiQuestion = document.querySelector('[data-question-id*="BMI"], [data-question-id*="bmi"], .bmi-result').closest('.question-wrapper');
-                            if (assessmentBmiQuestion) {{
-                                const questionId = assessmentBmiQuestion.getAttribute('data-question-id');
-                                const disqualMsg = assessmentBmiQuestion.querySelector('.disqualification-message');
-                                if (disqualMsg) {{
-                                    disqualMsg.style.display = 'none';
-                                    errorMessages.delete(questionId);
-                                }}
+                            const questionId = bmiQuestion.getAttribute('data-question-id');
+                            const disqualMsg = bmiQuestion.querySelector('.disqualification-message');
+                            if (disqualMsg) {{
+                                disqualMsg.style.display = 'none';
+                                errorMessages.delete(questionId);
                             }}
                         }}
                     }}
-                }} else if (bmiDisplay) {{
-                    bmiDisplay.textContent = 'Enter height and weight above';
+                }} else {{
+                    fields.displays.forEach(display => display.textContent = 'Enter height and weight above');
                 }}
             }}
 
@@ -1455,7 +1955,7 @@ class EnhancedFormGenerator:
                 if (currentSection < totalSections) {{
                     document.getElementById(`section-${{currentSection}}`).classList.remove('active');
                     currentSection++;
-                    document.getElementById(`section-${{currentSection}}`).classList.add('active');
+                    materializeSection(currentSection).classList.add('active');
                     updateProgressBar();
                     updateNavigationButtons();
 
@@ -1549,147 +2049,79 @@ class EnhancedFormGenerator:
                     return;
                 }}
 
+                // Collect all form data
+                const formElement = document.getElementById('medicalForm');
+                const formDataObj = new FormData(formElement);
+
                 // Get state from address field in Verification section
-                const stateInput = document.querySelector('input[name*="State"], select[name*="state"], input[name*="state"]') ||
-                                  Array.from(document.querySelectorAll('input, select')).find(input =>
-                                      input.closest('.question-container')?.textContent?.includes('State'));
-                const selectedState = stateInput?.value;
+                const stateName = Object.keys(fieldManifest).find(name => fieldManifest[name][0] === 'state');
+                const selectedState = stateName ? formDataObj.get(stateName) : '';
                 if (!selectedState) {{
                     alert('Please select your state in the address section before submitting.');
                     return;
                 }}
 
-                let finalConsultType = '{consult_type}';
+                let finalConsultType = {values['consult_type']};
 
                 // Override to sync if state requires it
                 if (syncOnlyStates.includes(selectedState)) {{
                     finalConsultType = 'sync';
                 }}
 
-                // Collect all form data
-                const formElement = document.getElementById('medicalForm');
-                const formDataObj = new FormData(formElement);
                 const webhookData = buildWebhookData(formDataObj, selectedState, finalConsultType);
 
                 // Submit to webhook
                 submitToWebhook(webhookData, selectedState, finalConsultType);
             }}
 
-            function buildWebhookData(formData, state, consultType) {{
-                // Find actual question IDs from the form
-                const nameInput = document.querySelector('input[type="text"]');
-                const emailInput = document.querySelector('input[type="email"]');
-                const phoneInput = document.querySelector('input[type="tel"]');
-                const heightFeetInput = document.querySelector('input[placeholder*="feet"], input[placeholder*="Feet"]');
-                const heightInchesInput = document.querySelector('input[placeholder*="inches"], input[placeholder*="Inches"]');
-                const weightInput = document.querySelector('input[placeholder*="weight"], input[placeholder*="Weight"], input[placeholder*="pounds"], input[placeholder*="Pounds"]');
-
-                // Get address fields
-                const addressInputs = document.querySelectorAll('input[type="text"]');
-                let address = '', address2 = '', city = '', postalCode = '';
-
-                addressInputs.forEach(input => {{
-                    const label = input.closest('.question-wrapper')?.querySelector('label')?.textContent?.toLowerCase() || '';
-                    if (label.includes('address') && !label.includes('2')) {{
-                        address = input.value || '';
-                    }} else if (label.includes('address 2')) {{
-                        address2 = input.value || '';
-                    }} else if (label.includes('city')) {{
-                        city = input.value || '';
-                    }} else if (label.includes('postal') || label.includes('zip')) {{
-                        postalCode = input.value || '';
-                    }}
-                }});
+            function buildWebhookData(entries, state, consultType) {{
+                // One pass over the submitted entries: answers with a role fill the contact/patient
+                // blocks, everything else is reported under its question label
+                const byRole = {{}};
+                const responses = {{}};
 
-                // Get actual form values
-                const name = nameInput?.value || '';
-                const email = emailInput?.value || '';
-                const phone = phoneInput?.value || '';
-                const heightFeet = heightFeetInput?.value || '0';
-                const heightInches = heightInchesInput?.value || '0';
-                const weight = weightInput?.value || '';
-                const bmi = document.getElementById('bmi-value')?.textContent || '';
-
-                // Build comprehensive form answers object with question text as keys
-                const formAnswers = {{}};
-                const contactFields = ['name', 'email', 'phone', 'address', 'city', 'state', 'postal'];
-
-                const allInputs = document.querySelectorAll('input, select, textarea');
-                allInputs.forEach(input => {{
-                    // Get question text
-                    const questionWrapper = input.closest('.question-wrapper');
-                    let questionText = questionWrapper?.querySelector('label')?.textContent?.trim() || input.name;
-
-                    // Remove asterisk from required fields
-                    questionText = questionText.replace('*', '').trim();
-
-                    // Escape apostrophes for JavaScript object keys
-                    const escapedQuestionText = questionText.replace(/'/g, "\\'");
-
-                    // Skip contact info fields - they're already in contact section
-                    const isContactField = contactFields.some(field =>
-                        questionText.toLowerCase().includes(field) ||
-                        (field === 'name' && questionText.toLowerCase().includes('full name'))
-                    );
-
-                    if (!isContactField) {{
-                        if (input.type === 'file') {{
-                            // Handle file uploads
-                            const fileData = formData[input.name];
-                            if (fileData && typeof fileData === 'object' && fileData.filename) {{
-                                formAnswers[escapedQuestionText] = fileData; // Include full file object
-                            }}
-                        }} else if (input.name && input.value) {{
-                            if (input.type === 'radio' || input.type === 'checkbox') {{
-                                if (input.checked) {{
-                                    if (formAnswers[escapedQuestionText]) {{
-                                        // Multiple selections (checkboxes)
-                                        if (Array.isArray(formAnswers[escapedQuestionText])) {{
-                                            formAnswers[escapedQuestionText].push(input.value);
-                                        }} else {{
-                                            formAnswers[escapedQuestionText] = [formAnswers[escapedQuestionText], input.value];
-                                        }}
-                                    }} else {{
-                                        formAnswers[escapedQuestionText] = input.value;
-                                    }}
-                                }}
-                            }} else {{
-                                formAnswers[escapedQuestionText] = input.value;
-                            }}
-                        }}
+                for (const [name, value] of entries) {{
+                    const [role, label] = fieldManifest[name] || [null, name];
+                    let answer = value;
+
+                    if (value instanceof File) {{
+                        // Uploads are reported as the stored file object
+                        const fileData = formData[name];
+                        if (!fileData || typeof fileData !== 'object' || !fileData.filename) continue;
+                        answer = fileData;
+                    }} else if (!value) {{
+                        continue;
                     }}
-                }});
 
-                // Extract specific data from formAnswers for patient section
-                const genderValue = document.querySelector('input[name*="Gender"]:checked')?.value ||
-                                  document.querySelector('input[type="radio"]:checked')?.closest('.question-wrapper')?.querySelector('label')?.textContent?.toLowerCase().includes('gender') ?
-                                  document.querySelector('input[type="radio"]:checked')?.value : '';
-
-                const dobValue = document.querySelector('input[type="date"]')?.value || '';
-
-                const pregnancyValue = formAnswers['Are you currently pregnant or breastfeeding?'] || '';
-                const allergiesValue = formAnswers['Do you have any allergies?'] || '';
-                const activityLevelValue = formAnswers['What is your exercise level?'] || '';
-                const tobaccoUseValue = formAnswers['Do you currently use tobacco or vape?'] || '';
-                const mentalHealthValue = formAnswers['Are you currently experiencing depression with history of suicidal ideation?'] || '';
-                const idVerificationValue = formAnswers['Upload government ID (driver\\'s license) for identity verification'] || '';
-
-                // Filter out mapped fields from responses
-                const mappedFields = [
-                    'Are you currently pregnant or breastfeeding?',
-                    'Do you have any allergies?',
-                    'What is your exercise level?',
-                    'Do you currently use tobacco or vape?',
-                    'Are you currently experiencing depression with history of suicidal ideation?',
-                    'Upload government ID (driver\\'s license) for identity verification'
-                ];
+                    if (role && !(role in byRole)) byRole[role] = answer;
+                    if (role && mappedRoles.has(role)) continue;
 
-                const responses = {{}};
-                Object.keys(formAnswers).forEach(key => {{
-                    if (!mappedFields.includes(key)) {{
-                        responses[key] = formAnswers[key];
+                    if (label in responses) {{
+                        // Multiple selections (checkboxes)
+                        responses[label] = [].concat(responses[label], answer);
+                    }} else {{
+                        responses[label] = answer;
                     }}
-                }});
+                }}
+
+                const bmi = bindBMIFields().displays[0]?.textContent || '';
+                const name = byRole.name || '';
+                const email = byRole.email || '';
+                const phone = byRole.phone || '';
+                const address = byRole.address1 || '';
+                const city = byRole.city || '';
+                const postalCode = byRole.postalCode || '';
+                const genderValue = byRole.gender || '';
+                const dobValue = byRole.dateOfBirth || '';
+                const heightFeet = byRole.heightFeet || '0';
+                const heightInches = byRole.heightInches || '0';
+                const weight = byRole.weight || '';
+                const pregnancyValue = byRole.pregnancy || '';
+                const allergiesValue = byRole.allergies || '';
+                const activityLevelValue = byRole.activityLevel || '';
+                const tobaccoUseValue = byRole.tobaccoUse || '';
+                const mentalHealthValue = byRole.mentalHealth || '';
+                const idVerificationValue = byRole.idVerification || '';
 
                 // Build the complete webhook data structure
                 const data = {{
@@ -1707,7 +2139,7 @@ class EnhancedFormGenerator:
                         type: 'patient'
                     }},
                     patient: {{
-                        rxRequested: '{form_name}',
+                        rxRequested: {values['form_name']},
                         height: `${{heightFeet}}'${{heightInches}}"`,
                         weight: weight,
                         BMI: bmi.replace('BMI: ', '').replace('Enter height and weight above', ''),
@@ -1720,8 +2152,8 @@ class EnhancedFormGenerator:
                     }},
                     form: {{
                         formType: 'screener',
-                        category: '{category}',
-                        name: '{form_name}',
+                        category: {values['category']},
+                        name: {values['form_name']},
                         responses: responses,
                         timestamp: new Date().toISOString(),
                         formVersion: new Date().toISOString().split('T')[0] // Current date as version
@@ -1753,7 +2185,7 @@ class EnhancedFormGenerator:
                     if (response.ok) {{
                         // Redirect to appropriate fee page
                         const rootDomain = window.location.origin;
-                        const redirectUrl = `${{rootDomain}}/{category.lower()}-${{consultType}}-fee`;
+                        const redirectUrl = `${{rootDomain}}/{values['category_path']}-${{consultType}}-fee`;
                         window.location.href = redirectUrl;
                     }} else {{
                         throw new Error('Submission failed');
@@ -1765,10 +2197,9 @@ class EnhancedFormGenerator:
             }}
         '''
 
-    def get_next_id(self) -> int:
-        """Get next unique ID for questions"""
-        self.question_id_counter += 1
-        return self.question_id_counter
+    def get_next_id(self, context: RenderContext) -> int:
+        """Get next unique ID for questions, numbered per render"""
+        return context.next_question_number()
 
     def sanitize_value(self, value: str) -> str:
         """Sanitize value for HTML attributes"""
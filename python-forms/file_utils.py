@@ -0,0 +1,53 @@
+"""
+File Utilities - Atomic, change-aware writes for generated files
+"""
+
+import hashlib
+import os
+import tempfile
+
+
+# mkstemp creates files as 0600; published files get the usual umask-derived mode instead
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def sha256_bytes(data: bytes) -> str:
+    """Return the hex sha256 of a byte string"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(file_path: str):
+    """Return the hex sha256 of a file's contents, or None if it cannot be read"""
+    try:
+        with open(file_path, 'rb') as f:
+            return sha256_bytes(f.read())
+    except OSError:
+        return None
+
+
+def atomic_write(file_path: str, data: bytes) -> None:
+    """Write data to a uniquely named temp file next to file_path and rename it into place"""
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # mkstemp names are unique per call, so concurrent writers (threads included) never share one
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(file_path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_if_changed(file_path: str, data: bytes) -> bool:
+    """Atomically write data unless the file already holds identical bytes; returns True if written"""
+    if sha256_file(file_path) == sha256_bytes(data):
+        return False
+    atomic_write(file_path, data)
+    return True
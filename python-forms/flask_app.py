@@ -8,8 +8,10 @@ Usage:
     python flask_app.py
 """
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify, render_template_string, stream_with_context
 import json
+import os
+from precompress import send_precompressed
 from universal_form_generator import UniversalFormGenerator
 from state_selector import StateSelector
 from embed_handler import EmbedHandler
@@ -21,6 +23,10 @@ form_generator = UniversalFormGenerator()
 state_selector = StateSelector()
 embed_handler = EmbedHandler()
 
+# Generated live forms (and their shared assets) served by /forms/
+SURVEYS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'surveys')
+SERVED_SUFFIXES = ('.html', '.css', '.js')
+
 
 @app.route('/')
 def index():
@@ -328,6 +334,34 @@ def api_generate_form():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/stream-form', methods=['POST'])
+def api_stream_form():
+    """API endpoint streaming the generated form HTML as it renders"""
+    data = request.get_json(silent=True) or {}
+    form_data = data.get('form_data')
+    container_id = data.get('container_id', 'form-container')
+    options = data.get('options', {})
+
+    if not form_data:
+        return jsonify({'error': 'form_data is required'}), 400
+
+    # Each render keeps its state in its own RenderContext, so the shared generator is safe here
+    try:
+        chunks = form_generator.iter_form(form_data, container_id, options)
+    except ValueError as e:
+        # maxBytes needs the whole form; streaming cannot enforce it
+        return jsonify({'error': str(e)}), 400
+    return Response(stream_with_context(chunks), mimetype='text/html')
+
+
+@app.route('/forms/<path:filename>')
+def serve_form(filename):
+    """Serve a generated form, using its .br/.gz sibling when the client accepts it"""
+    if not filename.endswith(SERVED_SUFFIXES):
+        return jsonify({'error': 'Not found'}), 404
+    return send_precompressed(SURVEYS_DIR, filename)
+
+
 @app.route('/api/process-state', methods=['POST'])
 def api_process_state():
     """API endpoint for state processing"""
@@ -371,7 +405,9 @@ if __name__ == '__main__':
     print("  - /demo/state : State selection demo")
     print("  - /api/info : API information")
     print("  - /api/generate-form : Form generation API")
+    print("  - /api/stream-form : Streaming form generation API")
     print("  - /api/process-state : State processing API")
+    print("  - /forms/<category>/<form>-screener-live.html : Generated forms (precompressed)")
     print("\n🚀 Server starting on http://localhost:5000")
     
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,102 @@
+"""
+Form Assets - Content-hashed stylesheet and runtime bundles shared by every live form
+
+Inline mode embeds the full stylesheet and script (80-92 KB) in each
+*-screener-live.html. External mode writes them once as
+
+    assets/form-<hash>.css
+    assets/form-<hash>.js
+    assets/manifest.json
+
+and each form links them, inlining only its small FORM_CONFIG. With minify=True
+the bundles are minified like inline blocks (see form_minifier.py). The bundles get
+precompressed .gz/.br siblings like the forms (see precompress.py). The hash is
+taken from the content, so a file name never changes meaning and the bundles can
+be cached forever; older bundles are left in place for forms that still link them.
+
+Usage:
+    generator = EnhancedFormGenerator()
+    html = generator.generate_notion_form(form, {"asset_dir": "../surveys/assets", "asset_url": "../assets/"})
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from file_utils import sha256_bytes, write_if_changed
+from form_minifier import minify_css, minify_js
+from precompress import write_with_siblings
+
+ASSET_MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Hex digits of the sha256 kept in the file name
+HASH_LENGTH = 12
+
+
+@dataclass(frozen=True)
+class AssetFile:
+    name: str      # e.g. form-3f2a9c0d1e4b.css
+    sha256: str
+    bytes: int
+    source_bytes: int = 0   # size before minification (equal to bytes when not minified)
+
+    def to_dict(self) -> Dict:
+        return {"file": self.name, "sha256": self.sha256, "bytes": self.bytes}
+
+
+@dataclass(frozen=True)
+class AssetBundle:
+    stylesheet: AssetFile
+    script: AssetFile
+
+
+def hashed_asset(kind: str, content: str, source: str = None) -> Tuple[AssetFile, bytes]:
+    """Return the content-hashed file entry for an asset and its encoded bytes"""
+    data = content.encode('utf-8')
+    digest = sha256_bytes(data)
+    source_bytes = len(source.encode('utf-8')) if source is not None else len(data)
+    return AssetFile(f"form-{digest[:HASH_LENGTH]}.{kind}", digest, len(data), source_bytes), data
+
+
+def load_manifest(asset_dir: str) -> Optional[Dict]:
+    """Return the asset manifest in asset_dir, or None if there is none"""
+    try:
+        with open(os.path.join(asset_dir, ASSET_MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Bundles already written this process, keyed by (asset_dir, styles, runtime, minify). The
+# generator hands over the same cached string objects on every render, so a batch
+# hashes and writes each bundle once.
+_PUBLISHED: Dict[Tuple[str, str, str, bool], AssetBundle] = {}
+
+
+def publish_assets(asset_dir: str, styles: str, runtime: str, minify: bool = False) -> AssetBundle:
+    """Write the hashed (optionally minified) stylesheet and runtime into asset_dir and update the manifest"""
+    key = (os.path.abspath(asset_dir), styles, runtime, minify)
+    bundle = _PUBLISHED.get(key)
+    if bundle is not None:
+        return bundle
+
+    if minify:
+        stylesheet, css = hashed_asset('css', minify_css(styles), styles)
+        script, js = hashed_asset('js', minify_js(runtime), runtime)
+    else:
+        stylesheet, css = hashed_asset('css', styles)
+        script, js = hashed_asset('js', runtime)
+    write_with_siblings(os.path.join(asset_dir, stylesheet.name), css)
+    write_with_siblings(os.path.join(asset_dir, script.name), js)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "assets": {"form.css": stylesheet.to_dict(), "form.js": script.to_dict()}
+    }
+    write_if_changed(os.path.join(asset_dir, ASSET_MANIFEST),
+                     json.dumps(manifest, indent=2).encode('utf-8'))
+
+    bundle = _PUBLISHED[key] = AssetBundle(stylesheet, script)
+    return bundle
@@ -0,0 +1,201 @@
+"""
+Form Catalog - Persistent index of the screeners available under ../surveys
+
+Listing forms used to walk every category directory and re-derive names from the
+file names on each call. The catalog keeps that information in a JSON sidecar
+(surveys/.catalog.json) and only rescans a directory when its mtime changes, or
+re-reads a screener when its own mtime/size changes. A warm listing therefore costs
+one file read plus a few stat() calls, however many categories and screeners exist.
+
+Usage:
+    catalog = FormCatalog()
+    for form in catalog.list_forms():
+        print(form["category"], form["form_name"], form["question_count"])
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+from file_utils import atomic_write, sha256_bytes
+from form_data_loader import parse_survey_text, SurveyParseError
+
+CATALOG_FILENAME = ".catalog.json"
+CATALOG_VERSION = 1
+SHARED_SECTIONS_DIR = "all-forms"
+SCREENER_SUFFIX = "-screener.json"
+
+
+class FormCatalog:
+    def __init__(self, surveys_path: str = os.path.join("..", "surveys")):
+        self.surveys_path = surveys_path
+        self.index_path = os.path.join(surveys_path, CATALOG_FILENAME)
+        self._index: Optional[Dict] = None
+
+    def list_forms(self) -> List[Dict]:
+        """Return catalog entries for every screener, sorted by category then form name"""
+        index = self.refresh()
+        forms = [dict(entry, path=path) for path, entry in index["forms"].items()]
+        forms.sort(key=lambda f: (f["category"].lower(), f["form_name"].lower()))
+        return forms
+
+    def list_shared_sections(self) -> List[str]:
+        """Return the shared section names (file stems in surveys/all-forms)"""
+        index = self.refresh()
+        return sorted(index["shared_sections"])
+
+    def get_form(self, category: str, form_name: str) -> Optional[Dict]:
+        """Look up a single catalog entry"""
+        path = f"{category.lower()}/{form_name}{SCREENER_SUFFIX}"
+        entry = self.refresh()["forms"].get(path)
+        return dict(entry, path=path) if entry else None
+
+    def refresh(self) -> Dict:
+        """Bring the index up to date with the surveys tree, persisting it if anything changed"""
+        index = self._index if self._index is not None else self._read_index()
+        changed = False
+
+        try:
+            root_mtime = os.stat(self.surveys_path).st_mtime_ns
+        except OSError:
+            # No surveys tree at all
+            self._index = self._empty_index()
+            return self._index
+
+        # Only list the root when categories may have been added or removed
+        if not self._root_unchanged(index, root_mtime):
+            categories = sorted(
+                name for name in os.listdir(self.surveys_path)
+                if not name.startswith('.') and os.path.isdir(os.path.join(self.surveys_path, name))
+            )
+            if categories != sorted(index["directories"]):
+                for name in set(index["directories"]) - set(categories):
+                    del index["directories"][name]
+                for name in categories:
+                    index["directories"].setdefault(name, {"mtime_ns": None, "files": []})
+                changed = True
+            index["root_mtime_ns"] = root_mtime
+
+        live_paths = set()
+        for category_dir, dir_entry in index["directories"].items():
+            dir_path = os.path.join(self.surveys_path, category_dir)
+            try:
+                dir_mtime = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                continue
+
+            # Only list a category when files may have been added, removed or renamed
+            if dir_entry["mtime_ns"] != dir_mtime:
+                dir_entry["files"] = sorted(
+                    name for name in os.listdir(dir_path) if name.endswith('.json')
+                )
+                dir_entry["mtime_ns"] = dir_mtime
+                changed = True
+
+            if category_dir == SHARED_SECTIONS_DIR:
+                shared = sorted(name[:-len('.json')] for name in dir_entry["files"])
+                if shared != index["shared_sections"]:
+                    index["shared_sections"] = shared
+                    changed = True
+                continue
+
+            for filename in dir_entry["files"]:
+                if not filename.endswith(SCREENER_SUFFIX):
+                    continue
+                rel_path = f"{category_dir}/{filename}"
+                live_paths.add(rel_path)
+                if self._refresh_form(index, category_dir, filename, rel_path):
+                    changed = True
+
+        for rel_path in set(index["forms"]) - live_paths:
+            del index["forms"][rel_path]
+            changed = True
+
+        if changed:
+            self._write_index(index)
+        self._index = index
+        return index
+
+    def _root_unchanged(self, index: Dict, root_mtime: int) -> bool:
+        """
+        True if no category can have been added or removed since the index was built
+
+        Writing the index renames it into surveys/, which itself bumps the root mtime
+        past the recorded one. That rename also stamps the index file's ctime, so a
+        root no newer than the index file has only changed by our own write.
+        """
+        if index["root_mtime_ns"] == root_mtime:
+            return True
+        if index["root_mtime_ns"] is None:
+            return False
+        try:
+            return root_mtime <= os.stat(self.index_path).st_ctime_ns
+        except OSError:
+            return False
+
+    def _refresh_form(self, index: Dict, category_dir: str, filename: str, rel_path: str) -> bool:
+        """Re-read one screener if its mtime or size changed; returns True if the entry changed"""
+        file_path = os.path.join(self.surveys_path, category_dir, filename)
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return False
+
+        entry = index["forms"].get(rel_path)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return False
+
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+
+        try:
+            header, data = parse_survey_text(raw.decode('utf-8'), file_path)
+        except (SurveyParseError, UnicodeDecodeError) as e:
+            print(f"Warning: Skipping unreadable form {file_path}: {e}")
+            header, data = {}, {}
+
+        index["forms"][rel_path] = {
+            "category": category_dir.title(),
+            "form_name": filename[:-len(SCREENER_SUFFIX)],
+            "filename": filename,
+            "consult_type": data.get('property_consult_type') or header.get('consultType') or 'async',
+            "question_count": len(data.get('questions', [])),
+            "sha256": sha256_bytes(raw),
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size
+        }
+        return True
+
+    def _empty_index(self) -> Dict:
+        return {
+            "version": CATALOG_VERSION,
+            "root_mtime_ns": None,
+            "directories": {},
+            "shared_sections": [],
+            "forms": {}
+        }
+
+    def _read_index(self) -> Dict:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return self._empty_index()
+
+        if not isinstance(index, dict) or index.get("version") != CATALOG_VERSION:
+            return self._empty_index()
+        return index
+
+    def _write_index(self, index: Dict) -> None:
+        try:
+            atomic_write(self.index_path, json.dumps(index, indent=2, sort_keys=True).encode('utf-8'))
+        except OSError as e:
+            # A read-only surveys tree still gets a correct in-memory listing
+            print(f"Warning: Could not write form catalog {self.index_path}: {e}")
+
+
+if __name__ == "__main__":
+    catalog = FormCatalog()
+    for form in catalog.list_forms():
+        print(f"  {form['category']} - {form['form_name']} "
+              f"({form['question_count']} questions, {form['consult_type']})")
@@ -3,93 +3,257 @@ Form Data Loader - Loads form data from JSON files in the forms directory
 """
 import json
 import os
-from typing import Dict, List, Any
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+# Process-wide cache of converted shared sections (Patient Profile, Medical History,
+# Verification). Keyed by absolute path; each entry remembers the (mtime_ns, size) it
+# was built from, so a hit costs a single stat() instead of a read and parse. It lives
+# at module level because callers such as form_generator_api build a new loader per request.
+# Cached values are frozen (lists become tuples), so the per-call dict copies cannot leak
+# mutations back into the cache.
+_SECTION_CACHE: Dict[str, Tuple[int, int, List[Dict]]] = {}
+_SECTION_CACHE_STATS = {"hits": 0, "misses": 0}
+
+# Compiled surveys snapshots (see form_snapshot.py), keyed by absolute snapshot path
+# and validated by the snapshot file's (mtime_ns, size)
+_SNAPSHOTS: Dict[str, Tuple[int, int, Any]] = {}
+
+# Bump whenever the output of FormDataLoader._convert_questions changes, so snapshots
+# compiled by an older converter are ignored instead of served
+CONVERTER_VERSION = 3
+
+
+# Sections included in every form, with their file under surveys/all-forms
+SHARED_SECTIONS = {
+    "Patient Profile": "patient-profile.json",
+    "Medical History": "medical-history.json",
+    "Verification": "verification.json"
+}
+
+
+def _freeze_questions(questions: List[Dict]) -> List[Dict]:
+    """Return the questions with every list value turned into a tuple, so cache hits can share them"""
+    return [{k: tuple(v) if isinstance(v, list) else v for k, v in q.items()} for q in questions]
+
+
+def clear_section_cache() -> None:
+    """Drop all cached shared sections and reset the hit/miss counters"""
+    _SECTION_CACHE.clear()
+    _SECTION_CACHE_STATS["hits"] = 0
+    _SECTION_CACHE_STATS["misses"] = 0
+
+
+def section_cache_info() -> Dict[str, int]:
+    """Return cache statistics: hits, misses and number of cached files"""
+    return {**_SECTION_CACHE_STATS, "entries": len(_SECTION_CACHE)}
+
+
+def vocabulary_info() -> Dict[str, int]:
+    """Return memory statistics of the interned answer vocabulary (see answer_vocabulary.py)"""
+    from answer_vocabulary import VOCABULARY
+
+    return VOCABULARY.stats()
+
+
+def _get_snapshot(surveys_path: str):
+    """Return the compiled snapshot for a surveys tree, loading it once per process"""
+    from form_snapshot import load_snapshot, SNAPSHOT_FILENAME
+
+    path = os.path.abspath(os.path.join(surveys_path, SNAPSHOT_FILENAME))
+    try:
+        st = os.stat(path)
+    except OSError:
+        _SNAPSHOTS.pop(path, None)
+        return None
+
+    cached = _SNAPSHOTS.get(path)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    snapshot = load_snapshot(path, os.path.abspath(surveys_path))
+    _SNAPSHOTS[path] = (st.st_mtime_ns, st.st_size, snapshot)
+    return snapshot
+
+
+_JSON_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class SurveyParseError(json.JSONDecodeError):
+    """Raised when a survey file cannot be parsed; carries the byte offset of the problem"""
+
+    def __init__(self, msg: str, doc: str, pos: int, path: str = "<string>"):
+        super().__init__(msg, doc, pos)
+        self.path = path
+        self.byte_offset = len(doc[:pos].encode('utf-8'))
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.msg} at byte {self.byte_offset} (line {self.lineno}, column {self.colno})"
+
+    def __reduce__(self):
+        return self.__class__, (self.msg, self.doc, self.pos, self.path)
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    return _WHITESPACE.match(text, pos).end()
+
+
+def _decode_value(text: str, pos: int, path: str) -> Tuple[Any, int]:
+    try:
+        return _JSON_DECODER.raw_decode(text, pos)
+    except json.JSONDecodeError as e:
+        raise SurveyParseError(e.msg, text, e.pos, path) from None
+
+
+def parse_survey_text(text: str, path: str = "<string>") -> Tuple[Dict, Dict]:
+    """
+    Parse a survey document in a single pass and return (header, body).
+
+    Two layouts are supported:
+      - a plain JSON object (the *-screener.json files), whose header is its "form" key
+      - the shared-section layout: an opening brace, a "form": {...} metadata entry
+        and a comma, followed by the questions object itself
+    """
+    start = _skip_ws(text, 0)
+
+    # Shared-section layout: '{' "form" ':' {header} ',' {body}
+    if text.startswith('{', start):
+        key_pos = _skip_ws(text, start + 1)
+        if text.startswith('"form"', key_pos):
+            colon = _skip_ws(text, key_pos + len('"form"'))
+            if text.startswith(':', colon):
+                header, end = _decode_value(text, _skip_ws(text, colon + 1), path)
+                comma = _skip_ws(text, end)
+                if text.startswith(',', comma):
+                    body_pos = _skip_ws(text, comma + 1)
+                    if text.startswith('{', body_pos):
+                        body, end = _decode_value(text, body_pos, path)
+                        _expect_end(text, end, path)
+                        return header, body
+
+    # Plain JSON document
+    body, end = _decode_value(text, start, path)
+    _expect_end(text, end, path)
+    if not isinstance(body, dict):
+        raise SurveyParseError("Expected a JSON object", text, start, path)
+    header = body.get('form')
+    return (header if isinstance(header, dict) else {}), body
+
+
+def _expect_end(text: str, pos: int, path: str) -> None:
+    end = _skip_ws(text, pos)
+    if end != len(text):
+        raise SurveyParseError("Extra data", text, end, path)
+
+
+def read_survey_file(file_path: str) -> Tuple[Dict, Dict]:
+    """Read a survey file and return (header, body); raises SurveyParseError on bad JSON"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return parse_survey_text(f.read(), file_path)
+
 
 class FormDataLoader:
-    def __init__(self, base_path: str = "."):
+    def __init__(self, base_path: str = ".", use_snapshot: bool = True):
         self.base_path = base_path
+        self.surveys_path = os.path.join(base_path, "..", "surveys")
+        self.use_snapshot = use_snapshot
 
     def load_general_sections(self) -> Dict[str, List[Dict]]:
         """Load general sections (Patient Profile, Medical History, Verification)"""
-        general_path = os.path.join(self.base_path, "..", "surveys", "all-forms")
         sections = {}
 
-        section_files = {
-            "Patient Profile": "patient-profile.json",
-            "Medical History": "medical-history.json",
-            "Verification": "verification.json"
-        }
-
-        for section_name, filename in section_files.items():
-            file_path = os.path.join(general_path, filename)
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # Parse the JSON data (skip the form metadata at top)
-                    lines = content.strip().split('\n')
-                    json_start = None
-                    for i, line in enumerate(lines):
-                        if line.strip() == '{' or line.strip().startswith('{"id"'):
-                            # Check if this is the main data object (has "questions" key)
-                            try:
-                                test_json = '\n'.join(lines[i:])
-                                test_data = json.loads(test_json)
-                                if 'questions' in test_data:
-                                    json_start = i
-                                    break
-                            except:
-                                continue
-
-                    if json_start:
-                        json_content = '\n'.join(lines[json_start:])
-                        try:
-                            data = json.loads(json_content)
-                            questions = data.get('questions', [])
-                            sections[section_name] = self._convert_questions(questions)
-                        except json.JSONDecodeError as e:
-                            print(f"JSON parse error in {section_name}: {e}")
+        for section_name, filename in SHARED_SECTIONS.items():
+            questions = self._load_section_file(section_name, f"all-forms/{filename}")
+            if questions is not None:
+                sections[section_name] = questions
 
         return sections
 
+    def _load_section_file(self, section_name: str, rel_path: str) -> Optional[List[Dict]]:
+        """Load one shared section file, reusing the process-wide cache when it is still fresh"""
+        file_path = os.path.join(self.surveys_path, rel_path)
+        key = os.path.abspath(file_path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            _SECTION_CACHE.pop(key, None)
+            return None
+
+        cached = _SECTION_CACHE.get(key)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            _SECTION_CACHE_STATS["hits"] += 1
+            return [dict(q) for q in cached[2]]
+
+        _SECTION_CACHE_STATS["misses"] += 1
+        snapshot = _get_snapshot(self.surveys_path) if self.use_snapshot else None
+        questions = snapshot.get_questions(rel_path, st) if snapshot else None
+        if questions is not None:
+            questions = _freeze_questions(questions)
+            _SECTION_CACHE[key] = (st.st_mtime_ns, st.st_size, questions)
+            return [dict(q) for q in questions]
+
+        # Raises SurveyParseError with the byte offset instead of silently dropping the section
+        _, data = read_survey_file(key)
+        if 'questions' not in data:
+            print(f"Warning: No questions found in {section_name} ({file_path})")
+            return None
+
+        questions = _freeze_questions(self._convert_questions(data.get('questions', [])))
+        _SECTION_CACHE[key] = (st.st_mtime_ns, st.st_size, questions)
+        return [dict(q) for q in questions]
+
     def load_form_assessment(self, category: str, form_name: str) -> List[Dict]:
         """Load assessment questions for a specific form"""
-        surveys_path = os.path.join(self.base_path, "..", "surveys", category.lower())
-        filename = f"{form_name}-screener.json"
-        file_path = os.path.join(surveys_path, filename)
+        rel_path = f"{category.lower()}/{form_name}-screener.json"
+        file_path = os.path.join(self.surveys_path, rel_path)
 
         if not os.path.exists(file_path):
             print(f"Warning: Assessment file not found: {file_path}")
             return []
 
+        snapshot = _get_snapshot(self.surveys_path) if self.use_snapshot else None
+        questions = snapshot.get_questions(rel_path) if snapshot else None
+        if questions is not None:
+            return questions
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                questions = data.get('questions', [])
-                return self._convert_questions(questions)
-        except json.JSONDecodeError as e:
+            _, data = read_survey_file(file_path)
+            questions = data.get('questions', [])
+            return self._convert_questions(questions)
+        except SurveyParseError as e:
             print(f"JSON parse error in assessment: {e}")
             return []
 
     def _convert_questions(self, questions: List[Dict]) -> List[Dict]:
         """Convert Notion JSON format to our form generator format"""
+        from question_registry import short_question_ids
+        from answer_vocabulary import VOCABULARY as vocab
+        from show_conditions import unique_id_label
+
         converted = []
+        # Short SQ IDs, extended where the 4-character form would collide
+        short_ids = short_question_ids(q['id'] for q in questions)
 
         for q in questions:
-            # Create question ID from the last part of the Notion ID
-            question_id = q['id'].split('-')[-1][:4].upper()  # Take last 4 chars and uppercase
-            if not question_id.startswith('SQ'):
-                question_id = f"SQ{question_id}"
+            question_id = short_ids[q['id']]
 
             converted_q = {
                 "questionId": question_id,
-                "questionText": q.get('property_question_text', q.get('name', '')),
-                "questionType": q.get('property_question_type', 'text'),
+                "questionText": vocab.intern(q.get('property_question_text', q.get('name', ''))),
+                "questionType": vocab.intern(q.get('property_question_type', 'text')),
                 "required": q.get('property_required', True),
-                "showCondition": q.get('property_show_condition', 'always'),
-                "safeAnswers": q.get('property_safe_answers', []),
-                "flagAnswers": q.get('property_flag_answers', []),
-                "disqualifyAnswers": q.get('property_disqualify_answers', []),
-                "disqualifyMessage": q.get('property_disqualify_message', '')
+                "showCondition": vocab.intern(q.get('property_show_condition', 'always')),
+                # Answer values and lists repeat across screeners; store the shared tuples themselves
+                "safeAnswers": vocab.answer_tuple(q.get('property_safe_answers', [])),
+                "flagAnswers": vocab.answer_tuple(q.get('property_flag_answers', [])),
+                "disqualifyAnswers": vocab.answer_tuple(q.get('property_disqualify_answers', [])),
+                "disqualifyMessage": vocab.intern(q.get('property_disqualify_message', '')),
+                "notionId": q['id'],
+                "parentIds": tuple(q.get('property_parent_item') or ()),
+                "subItemIds": tuple(q.get('property_sub_item') or ()),
+                # Show conditions reference questions by this ID (if_SQ-57_yes)
+                "uniqueId": unique_id_label(q.get('property_unique_id'))
             }
 
             converted.append(converted_q)
@@ -133,29 +297,57 @@ class FormDataLoader:
         if assessment_questions:
             form_data["sections"]["Assessment"] = assessment_questions
 
+        # Question IDs must be unique across every section of the rendered form
+        self._assign_unique_question_ids(form_data["sections"])
+
         # Ensure State Selection section exists (this is handled by the form generator)
 
         return form_data
 
+    def load_form(self, category: str, form_name: str, consult_type: str = "async"):
+        """Load a form and compile it into the typed model (see form_model.Form) consumed by the generators"""
+        from form_model import Form
+
+        return Form.from_form_data(self.generate_complete_form_data(category, form_name, consult_type))
+
+    def _assign_unique_question_ids(self, sections: Dict[str, List[Dict]]) -> None:
+        """
+        Re-derive short question IDs over the whole form so sections cannot collide.
+
+        The shared sections are numbered among themselves, so their IDs are the same
+        in every form; assessment questions are extended on a collision instead.
+        """
+        from question_registry import form_question_ids
+
+        questions = [q for section in sections.values() for q in section if q.get('notionId')]
+        shared = [q['notionId'] for name, section in sections.items() if name in SHARED_SECTIONS
+                  for q in section if q.get('notionId')]
+        own = [q['notionId'] for name, section in sections.items() if name not in SHARED_SECTIONS
+               for q in section if q.get('notionId')]
+        short_ids = form_question_ids(shared, own)
+        for q in questions:
+            q['questionId'] = short_ids[q['notionId']]
+
+    def build_registry(self):
+        """Build a QuestionRegistry indexing every form and question in the surveys tree by UUID"""
+        from question_registry import QuestionRegistry
+
+        return QuestionRegistry.from_surveys(self.surveys_path)
+
     def list_available_forms(self) -> List[Dict[str, str]]:
-        """List all available forms in the surveys directory"""
-        surveys_path = os.path.join(self.base_path, "..", "surveys")
-        forms = []
-
-        if os.path.exists(surveys_path):
-            for category_dir in os.listdir(surveys_path):
-                category_path = os.path.join(surveys_path, category_dir)
-                if os.path.isdir(category_path):
-                    for filename in os.listdir(category_path):
-                        if filename.endswith('-screener.json'):
-                            form_name = filename.replace('-screener.json', '')
-                            forms.append({
-                                "category": category_dir.title(),
-                                "form_name": form_name,
-                                "filename": filename
-                            })
-
-        return forms
+        """List all available forms in the surveys directory (served from the catalog index)"""
+        from form_catalog import FormCatalog
+
+        return [
+            {
+                "category": form["category"],
+                "form_name": form["form_name"],
+                "filename": form["filename"],
+                "consult_type": form["consult_type"],
+                "question_count": form["question_count"]
+            }
+            for form in FormCatalog(self.surveys_path).list_forms()
+        ]
 
 if __name__ == "__main__":
     # Test the loader
@@ -2,16 +2,21 @@
 Simple Flask API for Dashboard Form Generation
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from enhanced_form_generator import EnhancedFormGenerator
 from form_data_loader import FormDataLoader
+from precompress import send_precompressed, write_with_siblings
 import os
 import traceback
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for dashboard communication
 
+# Generated forms (and their shared assets) served by /forms/
+SURVEYS_DIR = os.path.abspath("../surveys")
+SERVED_SUFFIXES = ('.html', '.css', '.js')
+
 @app.route('/generate-form', methods=['POST'])
 def generate_form():
     try:
@@ -26,9 +31,9 @@ def generate_form():
 
         # Load form data using the universal system
         loader = FormDataLoader()
-        form_data = loader.generate_complete_form_data(category, form_name, consult_type)
+        form = loader.load_form(category, form_name, consult_type)
 
-        if not form_data["sections"]:
+        if not form.sections:
             return jsonify({
                 'success': False,
                 'error': 'No form data loaded'
@@ -36,7 +41,7 @@ def generate_form():
 
         # Generate HTML
         generator = EnhancedFormGenerator()
-        html = generator.generate_notion_form(form_data)
+        html = generator.generate_notion_form(form)
 
         # Save to appropriate location
         output_dir = f"../surveys/{category.lower()}"
@@ -44,8 +49,7 @@ def generate_form():
 
         filename = f"{output_dir}/{form_name}-screener-live.html"
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(html)
+        write_with_siblings(filename, html.encode('utf-8'))
 
         print(f"✅ Form generated: {filename}")
 
@@ -65,6 +69,57 @@ def generate_form():
             'error': str(e)
         }), 500
 
+@app.route('/stream-form', methods=['GET', 'POST'])
+def stream_form():
+    """
+    Stream a form's HTML section by section instead of writing it to disk
+
+    Generator options come from the JSON body's "options" object (or ?minify=1 on
+    a GET). "minify" is applied per chunk; "max_bytes" is rejected with a 400,
+    since a budget needs the whole form before anything is sent (use /generate-form).
+    """
+    json_data = request.get_json(silent=True)
+    data = json_data or request.args
+
+    form_name = data.get('formName', 'GLP1')
+    category = data.get('category', 'Weightloss')
+    consult_type = data.get('consultType', 'async')
+    if json_data:
+        options = dict(json_data.get('options') or {})
+    else:
+        options = {'minify': request.args.get('minify') in ('1', 'true')}
+
+    try:
+        form = FormDataLoader().load_form(category, form_name, consult_type)
+    except Exception as e:
+        print(f"❌ Error loading form: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+    if not form.sections:
+        return jsonify({
+            'success': False,
+            'error': 'No form data loaded'
+        }), 400
+
+    try:
+        chunks = EnhancedFormGenerator().iter_notion_form(form, options)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    return Response(stream_with_context(chunks), mimetype='text/html')
+
+@app.route('/forms/<path:filename>', methods=['GET'])
+def serve_form(filename):
+    """Serve a generated form, precompressed when the client accepts br/gzip"""
+    if not filename.endswith(SERVED_SUFFIXES):
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    return send_precompressed(SURVEYS_DIR, filename)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -76,5 +131,7 @@ if __name__ == '__main__':
     print("🚀 Starting LocumTele Form Generator API...")
     print("📍 Available at: http://localhost:5000")
     print("🔧 Endpoint: POST /generate-form")
+    print("🔧 Endpoint: GET/POST /stream-form (chunked HTML)")
+    print("🔧 Endpoint: GET /forms/<category>/<form>-screener-live.html (precompressed)")
     print("💡 Install flask-cors: pip install flask-cors")
     app.run(debug=True, port=5000, host='localhost')
\ No newline at end of file
@@ -0,0 +1,415 @@
+"""
+Form Minifier - Optional post-render stage that shrinks generated forms
+
+The generators render from indented f-string templates, so a form carries a lot
+of indentation, comments and verbose CSS/JS. minify_html():
+
+    - collapses whitespace in markup (outside <pre> and <textarea>)
+    - strips HTML, CSS and JavaScript comments
+    - minifies embedded <style> and <script> blocks
+
+It is pure Python and deliberately conservative: line breaks in JavaScript are
+kept (as a single newline) wherever automatic semicolon insertion could depend on
+them, and CSS spacing is only removed around punctuation that never needs it.
+
+Every run returns a SizeReport with bytes before/after per component (markup,
+css, js); check_budget() raises FormBudgetError when a form is over its budget.
+
+Usage:
+    html, report = minify_html(html)
+    print(report.format_table())
+    check_budget(report, 60_000, "GLP1")
+
+    # or, as the generators do it
+    html, report = finish_document(html, minify=True, max_bytes=60_000, label="GLP1")
+
+    # streamed responses minify chunk by chunk (no budget: it needs the whole form)
+    for chunk in stream_document(chunks, minify=True):
+        ...
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Distinct CSS/JS blocks kept minified; the generators reuse the same few blocks for every form
+MINIFY_CACHE_SIZE = 64
+
+
+class FormBudgetError(Exception):
+    """A generated form is larger than its byte budget; report holds its sizes"""
+
+    def __init__(self, message: str, report: "SizeReport" = None):
+        super().__init__(message)
+        self.report = report
+
+
+@dataclass
+class SizeReport:
+    # component -> [bytes before, bytes after]
+    components: Dict[str, List[int]] = field(default_factory=dict)
+
+    def add(self, component: str, before: str, after: str) -> None:
+        self.add_bytes(component, len(before.encode('utf-8')), len(after.encode('utf-8')))
+
+    def add_bytes(self, component: str, before: int, after: int) -> None:
+        sizes = self.components.setdefault(component, [0, 0])
+        sizes[0] += before
+        sizes[1] += after
+
+    def merge(self, other: "SizeReport") -> None:
+        for component, (before, after) in other.components.items():
+            self.add_bytes(component, before, after)
+
+    @property
+    def total_before(self) -> int:
+        return sum(before for before, _ in self.components.values())
+
+    @property
+    def total_after(self) -> int:
+        return sum(after for _, after in self.components.values())
+
+    def to_dict(self) -> Dict:
+        return {
+            "components": {name: {"before": b, "after": a} for name, (b, a) in self.components.items()},
+            "before": self.total_before,
+            "after": self.total_after
+        }
+
+    def format_table(self) -> str:
+        """Return the per-component byte counts as an aligned text table"""
+        rows = [(name, b, a) for name, (b, a) in self.components.items()]
+        rows.append(("total", self.total_before, self.total_after))
+        lines = [f"   {'component':<10} {'before':>10} {'after':>10} {'saved':>7}"]
+        for name, before, after in rows:
+            saved = f"{100 - after * 100 / before:.0f}%" if before else "-"
+            lines.append(f"   {name:<10} {before:>10,} {after:>10,} {saved:>7}")
+        return "\n".join(lines)
+
+
+def check_budget(report: SizeReport, max_bytes: Optional[int], label: str = "form") -> None:
+    """Raise FormBudgetError if the rendered form is larger than max_bytes (None disables the check)"""
+    if max_bytes is not None and report.total_after > max_bytes:
+        raise FormBudgetError(
+            f"{label} is {report.total_after:,} bytes, over its budget of {max_bytes:,} bytes", report
+        )
+
+
+# ----------------------------------------------------------------------------- CSS
+
+_CSS_TOKEN = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|(\s+)|([{};:,>]|[^\s"'/{};:,>]+|/)''', re.S)
+
+# No space is needed after these, nor before the second set (":" stays spaced before,
+# since "a :hover" and "a:hover" are different selectors)
+_CSS_TIGHT_AFTER = frozenset('{};:,>')
+_CSS_TIGHT_BEFORE = frozenset('{};,>')
+
+
+@lru_cache(maxsize=MINIFY_CACHE_SIZE)
+def minify_css(css: str) -> str:
+    """Strip comments and redundant whitespace from a stylesheet"""
+    out: List[str] = []
+    pending_space = False
+    for string, comment, space, other in _CSS_TOKEN.findall(css):
+        if comment or space:
+            pending_space = True
+            continue
+        text = string or other
+        if pending_space and out and out[-1][-1] not in _CSS_TIGHT_AFTER and text[0] not in _CSS_TIGHT_BEFORE:
+            out.append(' ')
+        pending_space = False
+        if text == '}' and out and out[-1] == ';':
+            out.pop()
+        out.append(text)
+    return ''.join(out)
+
+
+# ----------------------------------------------------------------------------- JavaScript
+
+_JS_WORD = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$')
+
+# A "/" after one of these (or at the start) begins a regular expression, not a division
+_JS_REGEX_AFTER = frozenset('(,=:[!&|?{};+-*%<>~^')
+_JS_REGEX_KEYWORDS = frozenset(('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new',
+                                'delete', 'void', 'throw', 'instanceof', 'yield', 'await'))
+
+# A line break after these (or before a closing bracket) can never end a statement
+_JS_NO_BREAK_AFTER = frozenset('{[(,;:')
+_JS_NO_BREAK_BEFORE = frozenset('}])')
+
+
+class _JsMinifier:
+    """Single-pass scanner; strings, template literals and regexes are copied verbatim"""
+
+    def __init__(self, source: str):
+        self.src = source
+        self.out: List[str] = []
+        self.last = ''        # last emitted non-space character
+        self.last_word = ''   # last emitted identifier or keyword, if it was the last token
+
+    def emit(self, text: str, word: str = '') -> None:
+        self.out.append(text)
+        self.last = text[-1]
+        self.last_word = word
+
+    def separator(self, space: str, next_char: str) -> None:
+        """Emit the minimal whitespace that keeps the code meaning the same"""
+        if not self.last:
+            return
+        if '\n' in space:
+            if self.last not in _JS_NO_BREAK_AFTER and next_char not in _JS_NO_BREAK_BEFORE:
+                self.out.append('\n')
+        elif ((self.last in _JS_WORD and next_char in _JS_WORD)
+              or (self.last == next_char and next_char in '+-')):
+            self.out.append(' ')
+
+    def regex_allowed(self) -> bool:
+        if self.last in '+-' and self.out[-2:] == [self.last, self.last]:
+            return False  # after a postfix ++/--, "/" divides
+        return not self.last or self.last in _JS_REGEX_AFTER or self.last_word in _JS_REGEX_KEYWORDS
+
+    def skip_quoted(self, i: int, quote: str) -> int:
+        """Return the index after a string or regex body starting at i (just after the opening quote)"""
+        src = self.src
+        in_class = False
+        while i < len(src):
+            c = src[i]
+            if c == '\\':
+                i += 2
+                continue
+            if quote == '/' and c == '[':
+                in_class = True
+            elif quote == '/' and c == ']':
+                in_class = False
+            elif c == quote and not in_class:
+                return i + 1
+            elif c == '\n' and quote != '`':
+                return i  # unterminated; leave the rest of the line to the caller
+            i += 1
+        return i
+
+    def template(self, i: int) -> int:
+        """Copy a template literal starting at i (the backtick), minifying ${} expressions"""
+        src = self.src
+        start = i
+        i += 1
+        while i < len(src):
+            c = src[i]
+            if c == '\\':
+                i += 2
+            elif c == '`':
+                self.emit(src[start:i + 1])
+                return i + 1
+            elif c == '$' and src.startswith('${', i):
+                self.emit(src[start:i + 2])
+                i = self.code(i + 2, in_template=True)
+                self.emit('}')
+                start = i = i + 1
+            else:
+                i += 1
+        self.emit(src[start:])
+        return i
+
+    def code(self, i: int = 0, in_template: bool = False) -> int:
+        """Minify code from i; inside a ${} expression, stop at its closing brace"""
+        src = self.src
+        length = len(src)
+        depth = 0
+        space = ''
+        while i < length:
+            c = src[i]
+            if c in ' \t\r\n':
+                j = i
+                while j < length and src[j] in ' \t\r\n':
+                    j += 1
+                space += src[i:j]
+                i = j
+                continue
+
+            if c == '/' and src.startswith('//', i):
+                end = src.find('\n', i)
+                i = length if end == -1 else end
+                continue
+            if c == '/' and src.startswith('/*', i):
+                end = src.find('*/', i + 2)
+                i = length if end == -1 else end + 2
+                space += ' '
+                continue
+
+            if in_template and c == '}' and depth == 0:
+                return i
+
+            if space:
+                self.separator(space, c)
+                space = ''
+
+            if c in '"\'':
+                end = self.skip_quoted(i + 1, c)
+                self.emit(src[i:end])
+                i = end
+            elif c == '`':
+                i = self.template(i)
+            elif c == '/' and self.regex_allowed():
+                end = self.skip_quoted(i + 1, '/')
+                while end < length and src[end] in _JS_WORD:
+                    end += 1  # flags
+                self.emit(src[i:end])
+                i = end
+            elif c in _JS_WORD:
+                j = i
+                while j < length and src[j] in _JS_WORD:
+                    j += 1
+                word = src[i:j]
+                self.emit(word, word)
+                i = j
+            else:
+                if c in '{([':
+                    depth += 1
+                elif c in '})]':
+                    depth -= 1
+                self.emit(c)
+                i += 1
+        return i
+
+
+@lru_cache(maxsize=MINIFY_CACHE_SIZE)
+def minify_js(js: str) -> str:
+    """Strip comments and indentation from a script, keeping statement-ending line breaks"""
+    minifier = _JsMinifier(js)
+    minifier.code()
+    return ''.join(minifier.out)
+
+
+# ----------------------------------------------------------------------------- HTML
+
+_HTML_BLOCK = re.compile(
+    r'(<!--.*?-->)|(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\3\s*>)', re.S | re.I)
+_HTML_TAG = re.compile(r'(<[^>]*>)')
+_TAG_SPACE = re.compile(r'''("[^"]*"|'[^']*')|\s+''')
+_TEXT_SPACE = re.compile(r'\s+')
+_SCRIPT_TYPE = re.compile(r'''\btype\s*=\s*["']?([^"'\s>]+)''', re.I)
+
+
+def _collapse_space(match) -> str:
+    return '\n' if '\n' in match.group() else ' '
+
+
+def _collapse_markup(markup: str) -> str:
+    """Collapse whitespace runs in text and inside tags (quoted attribute values are kept)"""
+    parts = _HTML_TAG.split(markup)
+    for index, part in enumerate(parts):
+        if index % 2:
+            parts[index] = _TAG_SPACE.sub(lambda m: m.group(1) or ' ', part)
+        else:
+            parts[index] = _TEXT_SPACE.sub(_collapse_space, part)
+    return ''.join(parts)
+
+
+def _is_javascript(open_tag: str) -> bool:
+    script_type = _SCRIPT_TYPE.search(open_tag)
+    return script_type is None or 'javascript' in script_type.group(1).lower() or script_type.group(1) == 'module'
+
+
+def _keep(text: str) -> str:
+    return text
+
+
+def _process_html(html: str, minify: bool) -> Tuple[str, SizeReport]:
+    report = SizeReport()
+    out: List[str] = []
+    markup = _collapse_markup if minify else _keep
+
+    def add(component: str, before: str, transform) -> None:
+        after = transform(before) if minify else before
+        report.add(component, before, after)
+        out.append(after)
+
+    position = 0
+    for match in _HTML_BLOCK.finditer(html):
+        add("markup", html[position:match.start()], markup)
+        position = match.end()
+
+        comment, open_tag, tag, body, close_tag = match.groups()
+        if comment is not None:
+            # Conditional comments are instructions for old browsers, not documentation
+            add("markup", comment, lambda c: c if c.startswith('<!--[if') else '')
+            continue
+
+        tag = tag.lower()
+        add("markup", open_tag, markup)
+        if tag == 'style':
+            add("css", body, minify_css)
+        elif tag == 'script':
+            # Data scripts (JSON, templates) are not JavaScript and are left alone
+            add("js", body, minify_js if _is_javascript(open_tag) else _keep)
+        else:
+            # <pre>/<textarea> content is whitespace-sensitive
+            add("markup", body, _keep)
+        add("markup", close_tag, _keep)
+
+    add("markup", html[position:], markup)
+    return ''.join(out), report
+
+
+def minify_html(html: str) -> Tuple[str, SizeReport]:
+    """Minify a rendered document; returns the new HTML and its per-component SizeReport"""
+    return _process_html(html, True)
+
+
+def measure_html(html: str) -> SizeReport:
+    """Return the per-component sizes of a document without changing it"""
+    return _process_html(html, False)[1]
+
+
+def finish_document(html: str, minify: bool = False, max_bytes: Optional[int] = None,
+                    label: str = "form", assets=None) -> Tuple[str, SizeReport]:
+    """
+    Post-render stage: optionally minify, measure, and enforce the byte budget
+
+    assets is the form_assets.AssetBundle the document links, if any; its files are
+    part of what a visitor downloads, so they count as "css file"/"js file".
+    """
+    html, report = minify_html(html) if minify else (html, measure_html(html))
+    if assets is not None:
+        report.add_bytes("css file", assets.stylesheet.source_bytes, assets.stylesheet.bytes)
+        report.add_bytes("js file", assets.script.source_bytes, assets.script.bytes)
+    check_budget(report, max_bytes, label)
+    return html, report
+
+
+def stream_document(chunks: Iterable[str], minify: bool = False, max_bytes: Optional[int] = None,
+                    report: Optional[SizeReport] = None) -> Iterator[str]:
+    """
+    Streaming counterpart of finish_document: minify a document chunk by chunk
+
+    Each chunk must hold whole tags and whole <script>/<style>/<pre>/<textarea>
+    blocks, as the generators' chunks do. Trailing whitespace is carried into the
+    next chunk, so the output is byte-identical to minify_html on the joined
+    document. report, if given, accumulates the sizes as chunks go out.
+
+    The byte budget needs the whole document before anything is sent, so max_bytes
+    is rejected here (ValueError, raised immediately rather than mid-stream);
+    render with finish_document instead when a budget applies.
+    """
+    if max_bytes is not None:
+        raise ValueError("max_bytes cannot be enforced on a streamed form; render it whole instead")
+    if not minify:
+        return iter(chunks)
+    return _minify_chunks(chunks, report if report is not None else SizeReport())
+
+
+def _minify_chunks(chunks: Iterable[str], report: SizeReport) -> Iterator[str]:
+    pending = ""
+    for chunk in chunks:
+        text = pending + chunk
+        body = text.rstrip()
+        pending = text[len(body):]
+        if body:
+            html, part = minify_html(body)
+            report.merge(part)
+            yield html
+    if pending:
+        html, part = minify_html(pending)
+        report.merge(part)
+        yield html
@@ -0,0 +1,195 @@
+"""
+Form Model - Compiled, typed representation of a form between loader and generators
+
+The loader's question dicts are re-read with `.get()` on every render. The model
+is built once per form: frozen, slotted dataclasses whose answer options are
+already de-duplicated, sorted and typed, and whose answer-type lookup is a dict.
+
+    Form -> Section -> Question -> AnswerOption
+
+Both generators accept either the model or the original dicts; as_question()
+compiles a dict on the fly, so existing callers keep working.
+
+Strings, answer tuples and compiled option lists are shared through the
+process-wide answer vocabulary, so questions with the same answer lists (every
+yes/no question) point at the same objects.
+
+Usage:
+    form = FormDataLoader().load_form("Weightloss", "GLP1")
+    html = EnhancedFormGenerator().generate_notion_form(form)
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+from answer_vocabulary import VOCABULARY
+
+SAFE = 'safe'
+FLAG = 'flag'
+DISQUALIFY = 'disqualify'
+
+
+def option_sort_key(value: str) -> Tuple:
+    """Order answer options with "none" and "no" style answers last"""
+    lowered = value.lower()
+    return (
+        lowered.startswith('none'),
+        lowered == 'none_of_the_above',
+        lowered == 'no',
+        lowered
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class AnswerOption:
+    value: str
+    label: str
+    answer_type: str
+
+
+def _compile_answers(safe: Tuple[str, ...], flag: Tuple[str, ...],
+                     disqualify: Tuple[str, ...]) -> Tuple[Tuple[AnswerOption, ...], Dict[str, str]]:
+    """Build the typed, sorted options and answer-type lookup for a set of answer lists"""
+    # Disqualify wins over flag, flag over safe
+    answer_types = dict.fromkeys(safe, SAFE)
+    answer_types.update(dict.fromkeys(flag, FLAG))
+    answer_types.update(dict.fromkeys(disqualify, DISQUALIFY))
+
+    options = tuple(
+        AnswerOption(value, VOCABULARY.intern(value.replace('_', ' ').title()), answer_types[value])
+        for value in sorted(answer_types, key=option_sort_key)
+    )
+    return options, answer_types
+
+
+@dataclass(frozen=True, slots=True)
+class Question:
+    question_id: str
+    text: str
+    question_type: str
+    required: bool
+    show_condition: str
+    safe_answers: Tuple[str, ...]
+    flag_answers: Tuple[str, ...]
+    disqualify_answers: Tuple[str, ...]
+    disqualify_message: str
+    options: Tuple[AnswerOption, ...]
+    answer_types: Mapping[str, str] = field(compare=False)
+    notion_id: Optional[str] = None
+    parent_ids: Tuple[str, ...] = ()
+    sub_item_ids: Tuple[str, ...] = ()
+    unique_id: Optional[str] = None     # Notion unique ID as used in show conditions, e.g. "SQ-57"
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Question":
+        """Compile a loader-format (camelCase) question dict"""
+        vocab = VOCABULARY
+        safe = vocab.answer_tuple(data.get('safeAnswers'))
+        flag = vocab.answer_tuple(data.get('flagAnswers'))
+        disqualify = vocab.answer_tuple(data.get('disqualifyAnswers'))
+        options, answer_types = vocab.answer_profile(safe, flag, disqualify, _compile_answers)
+
+        return cls(
+            question_id=data.get('questionId', ''),
+            text=vocab.intern(data.get('questionText', '')),
+            question_type=vocab.intern(data.get('questionType', 'text')),
+            required=bool(data.get('required', False)),
+            show_condition=vocab.intern(data.get('showCondition', 'always')),
+            safe_answers=safe,
+            flag_answers=flag,
+            disqualify_answers=disqualify,
+            disqualify_message=vocab.intern(data.get('disqualifyMessage', '')),
+            options=options,
+            answer_types=answer_types,
+            notion_id=data.get('notionId'),
+            parent_ids=tuple(data.get('parentIds') or ()),
+            sub_item_ids=tuple(data.get('subItemIds') or ()),
+            unique_id=data.get('uniqueId')
+        )
+
+    def answer_type(self, value: str) -> str:
+        """Return safe, flag or disqualify for an answer value (unknown answers are safe)"""
+        return self.answer_types.get(value, SAFE)
+
+    def to_dict(self) -> Dict:
+        """Return the loader-format dict for this question"""
+        return {
+            "questionId": self.question_id,
+            "questionText": self.text,
+            "questionType": self.question_type,
+            "required": self.required,
+            "showCondition": self.show_condition,
+            "safeAnswers": self.safe_answers,
+            "flagAnswers": self.flag_answers,
+            "disqualifyAnswers": self.disqualify_answers,
+            "disqualifyMessage": self.disqualify_message,
+            "notionId": self.notion_id,
+            "parentIds": self.parent_ids,
+            "subItemIds": self.sub_item_ids,
+            "uniqueId": self.unique_id
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class Section:
+    title: str
+    questions: Tuple[Question, ...]
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+
+@dataclass(frozen=True, slots=True)
+class Form:
+    form_id: str
+    name: str
+    category: str
+    consult_type: str
+    sections: Tuple[Section, ...]
+
+    @classmethod
+    def from_form_data(cls, form_data: Dict) -> "Form":
+        """Compile the dict returned by FormDataLoader.generate_complete_form_data"""
+        sections = tuple(
+            Section(title, tuple(as_question(q) for q in questions))
+            for title, questions in form_data.get('sections', {}).items()
+        )
+        return cls(
+            form_id=form_data.get('id', ''),
+            name=form_data.get('name', 'Medical Screening'),
+            category=form_data.get('property_category', 'general'),
+            consult_type=form_data.get('property_consult_type', 'async'),
+            sections=sections
+        )
+
+    def section(self, title: str) -> Optional[Section]:
+        """Return the section with the given title, if any"""
+        for section in self.sections:
+            if section.title == title:
+                return section
+        return None
+
+    def iter_questions(self) -> Iterator[Question]:
+        """Yield every question in section order"""
+        for section in self.sections:
+            yield from section.questions
+
+    def to_form_data(self) -> Dict:
+        """Return the loader-format dict for this form"""
+        return {
+            "id": self.form_id,
+            "name": self.name,
+            "property_category": self.category,
+            "property_consult_type": self.consult_type,
+            "sections": {s.title: [q.to_dict() for q in s.questions] for s in self.sections}
+        }
+
+
+def as_question(question: Union[Question, Dict]) -> Question:
+    """Return a compiled Question, compiling loader-format dicts as needed"""
+    return question if isinstance(question, Question) else Question.from_dict(question)
+
+
+def as_questions(questions: List[Union[Question, Dict]]) -> Tuple[Question, ...]:
+    """Compile a list of questions (a no-op for already compiled ones)"""
+    return tuple(as_question(q) for q in questions)
@@ -0,0 +1,176 @@
+"""
+Form Snapshot - Compiled, versioned snapshot of the whole surveys tree
+
+Every process used to re-read and re-convert each survey JSON on first use. The
+snapshot stores the already-converted output of FormDataLoader._convert_questions
+for every shared section and screener in a single file (surveys/.snapshot.bin),
+so a worker can load the whole catalog with one read.
+
+Each source file is recorded with its mtime, size and sha256. A lookup only trusts
+the snapshot while the source's mtime/size match, or, when they do not, while its
+content hash still matches; otherwise the loader falls back to the JSON file.
+
+The payload is plain JSON after a binary header, so loading a snapshot found in
+the surveys tree never executes code from it.
+
+Usage:
+    python3 generate_form.py --build-snapshot
+"""
+
+import json
+import os
+import struct
+import time
+from typing import Dict, List, Optional
+
+from file_utils import atomic_write, sha256_bytes, sha256_file
+from form_data_loader import FormDataLoader, parse_survey_text, CONVERTER_VERSION
+
+SNAPSHOT_FILENAME = ".snapshot.bin"
+SNAPSHOT_MAGIC = b"LTFSNAP"
+SNAPSHOT_VERSION = 2
+_HEADER = struct.Struct(f"<{len(SNAPSHOT_MAGIC)}sHH")
+
+
+class SurveySnapshot:
+    def __init__(self, payload: Dict, surveys_path: str):
+        self.surveys_path = surveys_path
+        self.created_at = payload["created_at"]
+        self.sources: Dict[str, Dict] = payload["sources"]
+        self.questions: Dict[str, List[Dict]] = payload["questions"]
+        _intern_questions(self.questions)
+
+    def get_questions(self, rel_path: str, st: Optional[os.stat_result] = None) -> Optional[List[Dict]]:
+        """
+        Return the converted questions for a source path relative to surveys/
+        (e.g. "all-forms/verification.json"), or None if missing or stale.
+
+        Pass an existing stat result for the source to avoid a second stat() call.
+        """
+        source = self.sources.get(rel_path)
+        if source is None:
+            return None
+
+        file_path = os.path.join(self.surveys_path, rel_path)
+        if st is None:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                return None
+
+        if st.st_mtime_ns != source["mtime_ns"] or st.st_size != source["size"]:
+            # Touched or copied files keep their content; only re-hash on a metadata mismatch
+            if sha256_file(file_path) != source["sha256"]:
+                return None
+            # Same content: remember the new stamp so the next lookup is a stat() again
+            source["mtime_ns"] = st.st_mtime_ns
+            source["size"] = st.st_size
+
+        return [dict(q) for q in self.questions[rel_path]]
+
+    def stale_sources(self) -> List[str]:
+        """Return the source paths whose content no longer matches the snapshot"""
+        stale = []
+        for rel_path in sorted(self.sources):
+            if self.get_questions(rel_path) is None:
+                stale.append(rel_path)
+        return stale
+
+
+def _intern_questions(questions_by_source: Dict[str, List[Dict]]) -> None:
+    """Share answer values and messages with the process-wide vocabulary (see answer_vocabulary.py)
+
+    List values become tuples: get_questions hands out shallow copies, so anything
+    nested must be immutable.
+    """
+    from answer_vocabulary import VOCABULARY as vocab
+
+    for questions in questions_by_source.values():
+        for q in questions:
+            for key in ('safeAnswers', 'flagAnswers', 'disqualifyAnswers'):
+                q[key] = vocab.answer_tuple(q.get(key))
+            for key in ('parentIds', 'subItemIds'):
+                q[key] = tuple(q.get(key) or ())
+            for key in ('questionText', 'questionType', 'showCondition', 'disqualifyMessage'):
+                q[key] = vocab.intern(q.get(key))
+
+
+def build_snapshot(surveys_path: str = os.path.join("..", "surveys"), output_path: Optional[str] = None) -> Dict:
+    """Compile every survey JSON under surveys_path into one snapshot file; returns build stats"""
+    output_path = output_path or os.path.join(surveys_path, SNAPSHOT_FILENAME)
+    converter = FormDataLoader()
+    sources = {}
+    questions = {}
+
+    for category_dir in sorted(os.listdir(surveys_path)):
+        category_path = os.path.join(surveys_path, category_dir)
+        if category_dir.startswith('.') or not os.path.isdir(category_path):
+            continue
+
+        for filename in sorted(os.listdir(category_path)):
+            if not filename.endswith('.json'):
+                continue
+
+            file_path = os.path.join(category_path, filename)
+            rel_path = f"{category_dir}/{filename}"
+            st = os.stat(file_path)
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+
+            _, data = parse_survey_text(raw.decode('utf-8'), file_path)
+            if 'questions' not in data:
+                continue
+
+            sources[rel_path] = {
+                "sha256": sha256_bytes(raw),
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size
+            }
+            questions[rel_path] = converter._convert_questions(data['questions'])
+
+    payload = {
+        "created_at": time.time(),
+        "sources": sources,
+        "questions": questions
+    }
+    blob = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, CONVERTER_VERSION) + \
+        json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+    atomic_write(output_path, blob)
+
+    return {
+        "path": output_path,
+        "sources": len(sources),
+        "questions": sum(len(q) for q in questions.values()),
+        "bytes": len(blob)
+    }
+
+
+def load_snapshot(snapshot_path: str, surveys_path: Optional[str] = None) -> Optional[SurveySnapshot]:
+    """Load a snapshot with a single read; returns None if missing or built by an incompatible version"""
+    try:
+        with open(snapshot_path, 'rb') as f:
+            blob = f.read()
+    except OSError:
+        return None
+
+    if len(blob) < _HEADER.size:
+        return None
+
+    magic, version, converter_version = _HEADER.unpack_from(blob)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or converter_version != CONVERTER_VERSION:
+        return None
+
+    try:
+        payload = json.loads(blob[_HEADER.size:])
+    except ValueError as e:
+        print(f"Warning: Ignoring unreadable snapshot {snapshot_path}: {e}")
+        return None
+
+    return SurveySnapshot(payload, surveys_path or os.path.dirname(snapshot_path))
+
+
+if __name__ == "__main__":
+    stats = build_snapshot()
+    print(f"Snapshot written to {stats['path']}: {stats['sources']} sources, "
+          f"{stats['questions']} questions, {stats['bytes']} bytes")
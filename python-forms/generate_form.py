@@ -10,15 +10,38 @@ Usage:
     python3 generate_form.py --interactive
     python3 generate_form.py --list-forms
     python3 generate_form.py --batch-all
+    python3 generate_form.py --batch-all --external-assets
+    python3 generate_form.py --batch-all --minify --budget-kb 60
+    python3 generate_form.py --batch-all --delegate-events
+    python3 generate_form.py --batch-all --lazy-sections
+    python3 generate_form.py --batch-all --force
+    python3 generate_form.py --batch-all --jobs 8
+    python3 generate_form.py --build-snapshot
+    python3 generate_form.py --validate-all --report validation-report.json
 """
 
 import argparse
+import io
 import json
 import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
+from build_manifest import BuildManifest, build_flags
 from enhanced_form_generator import EnhancedFormGenerator
 from form_data_loader import FormDataLoader
+from form_catalog import FormCatalog
+from form_assets import ASSET_MANIFEST
+from form_minifier import FormBudgetError
+from form_snapshot import build_snapshot
+from precompress import write_with_siblings
+from render_context import RenderContext
+from survey_validator import validate_catalog, write_report
+
+# Shared, content-hashed CSS/JS bundles for --external-assets (see form_assets.py)
+ASSET_DIR = Path("../surveys/assets")
 
 def print_banner():
     """Print welcome banner"""
@@ -30,22 +53,23 @@ def print_banner():
 def list_available_forms():
     """List all available JSON forms"""
     print("\n📋 Available Forms:")
-    surveys_dir = Path("../surveys")
+    catalog = FormCatalog("../surveys")
 
     # List category-specific forms
-    for category_dir in surveys_dir.iterdir():
-        if category_dir.is_dir() and category_dir.name != "all-forms":
-            print(f"\n📁 {category_dir.name.title()}:")
-            for json_file in category_dir.glob("*.json"):
-                form_name = json_file.stem.replace("-screener", "")
-                print(f"   • {form_name} ({json_file.name})")
+    current_category = None
+    for form in catalog.list_forms():
+        if form["category"] != current_category:
+            current_category = form["category"]
+            print(f"\n📁 {current_category}:")
+        print(f"   • {form['form_name']} ({form['filename']}) - "
+              f"{form['question_count']} questions, {form['consult_type']}")
 
     # List shared sections
-    all_forms_dir = surveys_dir / "all-forms"
-    if all_forms_dir.exists():
+    shared_sections = catalog.list_shared_sections()
+    if shared_sections:
         print(f"\n📁 Shared Sections:")
-        for json_file in all_forms_dir.glob("*.json"):
-            print(f"   • {json_file.stem}")
+        for section in shared_sections:
+            print(f"   • {section}")
 
 def validate_json_structure(json_data, file_path):
     """Validate JSON structure for form generation"""
@@ -101,8 +125,39 @@ def extract_form_info(json_file_path):
         print(f"❌ Error reading {json_file_path}: {e}")
         return None
 
-def generate_single_form(json_file_path, output_dir=None):
-    """Generate HTML form from a single JSON file"""
+def asset_options(output_path):
+    """Generator options that link the shared asset bundles from a form written to output_path"""
+    asset_url = Path(os.path.relpath(ASSET_DIR, output_path)).as_posix() + "/"
+    return {"asset_dir": str(ASSET_DIR), "asset_url": asset_url}
+
+def render_options(output_path, external_assets=False, minify=False, max_bytes=None, delegate_events=False,
+                   lazy_sections=False):
+    """Generator options for the output flags"""
+    options = asset_options(output_path) if external_assets else {}
+    if minify:
+        options["minify"] = True
+    if max_bytes:
+        options["max_bytes"] = max_bytes
+    if delegate_events:
+        options["delegate_events"] = True
+    if lazy_sections:
+        options["lazy_sections"] = True
+    return options
+
+def print_size_report(report):
+    """Print bytes before/after per component when the render was minified or budget-checked"""
+    if report:
+        print("📏 Size report:")
+        print(report.format_table())
+
+def print_compression_status(status):
+    """Print which precompressed siblings were written"""
+    parts = [f"{encoding} {state}" for encoding, state in status.items() if encoding != "file"]
+    print(f"🗜️  Precompressed: {', '.join(parts)}")
+
+def generate_single_form(json_file_path, output_dir=None, external_assets=False, minify=False, max_bytes=None,
+                         manifest=None, delegate_events=False, lazy_sections=False):
+    """Generate HTML form from a single JSON file (recording it in the build manifest, if given)"""
     print(f"\n🔧 Processing: {json_file_path}")
 
     # Read and validate JSON
@@ -128,27 +183,22 @@ def generate_single_form(json_file_path, output_dir=None):
     try:
         # Load complete form data
         loader = FormDataLoader()
-        form_data = loader.generate_complete_form_data(
+        form = loader.load_form(
             form_info['category'],
             form_info['name'],
             form_info['consult_type']
         )
 
-        if not form_data or not form_data.get("sections"):
+        if not form.sections:
             print("❌ Error: No form data could be loaded!")
             return False
 
-        print(f"✅ Loaded {len(form_data['sections'])} sections:")
+        print(f"✅ Loaded {len(form.sections)} sections:")
         total_questions = 0
-        for section_name, questions in form_data['sections'].items():
-            count = len(questions)
+        for section in form.sections:
+            count = len(section.questions)
             total_questions += count
-            print(f"   📋 {section_name}: {count} questions")
-
-        # Generate HTML
-        print(f"\n🔧 Generating HTML form...")
-        generator = EnhancedFormGenerator()
-        html = generator.generate_notion_form(form_data)
+            print(f"   📋 {section.title}: {count} questions")
 
         # Determine output path
         if output_dir:
@@ -159,73 +209,108 @@ def generate_single_form(json_file_path, output_dir=None):
 
         output_path.mkdir(parents=True, exist_ok=True)
 
+        # Generate HTML
+        print(f"\n🔧 Generating HTML form...")
+        context = RenderContext()
+        html = EnhancedFormGenerator().generate_notion_form(
+            form, render_options(output_path, external_assets, minify, max_bytes, delegate_events, lazy_sections),
+            context
+        )
+        print_size_report(context.size_report)
+
         # Create filename
         filename = f"{form_info['name']}-screener-live.html"
         full_path = output_path / filename
 
-        # Write HTML file
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(html)
+        # Write HTML file with its .gz/.br siblings
+        status = write_with_siblings(str(full_path), html.encode('utf-8'))
 
         print(f"\n✅ Form generated successfully!")
         print(f"📄 Saved as: {full_path}")
+        print_compression_status(status)
         print(f"📊 Total Questions: {total_questions}")
         print(f"🌐 Open {full_path} in your browser to test")
 
+        if manifest is not None:
+            assessment_path = os.path.join(
+                loader.surveys_path, f"{form_info['category'].lower()}/{form_info['name']}-screener.json"
+            )
+            bundle = context.asset_bundle
+            asset_files = [ASSET_DIR / bundle.stylesheet.name, ASSET_DIR / bundle.script.name,
+                           ASSET_DIR / ASSET_MANIFEST] if bundle else []
+            manifest.record(json_file_path, str(full_path),
+                            build_flags(external_assets, minify, max_bytes, delegate_events, lazy_sections),
+                            extra_inputs=[assessment_path], extra_outputs=[str(p) for p in asset_files])
+
         return True
 
+    except FormBudgetError as e:
+        print_size_report(e.report)
+        print(f"❌ Over budget: {e}")
+        return False
+
     except Exception as e:
         print(f"❌ Error generating form: {e}")
         import traceback
         traceback.print_exc()
         return False
 
-def generate_by_category_and_name(category, form_name, consult_type="async"):
+def generate_by_category_and_name(category, form_name, consult_type="async", external_assets=False,
+                                  minify=False, max_bytes=None, delegate_events=False, lazy_sections=False):
     """Generate form using category and form name"""
     print(f"\n🔧 Generating form: {form_name} ({category})")
 
     try:
         # Load complete form data
         loader = FormDataLoader()
-        form_data = loader.generate_complete_form_data(category, form_name, consult_type)
+        form = loader.load_form(category, form_name, consult_type)
 
-        if not form_data or not form_data.get("sections"):
+        if not form.sections:
             print("❌ Error: No form data could be loaded!")
             print("💡 Check that JSON files exist in:")
             print(f"   • ../surveys/{category.lower()}/{form_name}-screener.json")
             print(f"   • ../surveys/all-forms/ (shared sections)")
             return False
 
-        print(f"✅ Loaded {len(form_data['sections'])} sections:")
+        print(f"✅ Loaded {len(form.sections)} sections:")
         total_questions = 0
-        for section_name, questions in form_data['sections'].items():
-            count = len(questions)
+        for section in form.sections:
+            count = len(section.questions)
             total_questions += count
-            print(f"   📋 {section_name}: {count} questions")
-
-        # Generate HTML
-        print(f"\n🔧 Generating HTML form...")
-        generator = EnhancedFormGenerator()
-        html = generator.generate_notion_form(form_data)
+            print(f"   📋 {section.title}: {count} questions")
 
         # Create output path
         output_dir = Path(f"../surveys/{category.lower()}")
         output_dir.mkdir(parents=True, exist_ok=True)
 
+        # Generate HTML
+        print(f"\n🔧 Generating HTML form...")
+        context = RenderContext()
+        html = EnhancedFormGenerator().generate_notion_form(
+            form, render_options(output_dir, external_assets, minify, max_bytes, delegate_events, lazy_sections),
+            context
+        )
+        print_size_report(context.size_report)
+
         filename = f"{form_name}-screener-live.html"
         full_path = output_dir / filename
 
-        # Write HTML file
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(html)
+        # Write HTML file with its .gz/.br siblings
+        status = write_with_siblings(str(full_path), html.encode('utf-8'))
 
         print(f"\n✅ Form generated successfully!")
         print(f"📄 Saved as: {full_path}")
+        print_compression_status(status)
         print(f"📊 Total Questions: {total_questions}")
         print(f"🌐 Open {full_path} in your browser to test")
 
         return True
 
+    except FormBudgetError as e:
+        print_size_report(e.report)
+        print(f"❌ Over budget: {e}")
+        return False
+
     except Exception as e:
         print(f"❌ Error generating form: {e}")
         import traceback
@@ -274,32 +359,144 @@ def interactive_mode():
         print("❌ Invalid choice")
         interactive_mode()
 
-def batch_generate_all():
-    """Generate HTML for all available JSON forms"""
+class _RecordedBuild:
+    """Stands in for the build manifest in a worker; the calls are replayed by the parent"""
+
+    def __init__(self):
+        self.calls = []
+
+    def record(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+
+def _init_batch_worker():
+    """Load the shared sections and styles once per worker process"""
+    FormDataLoader().load_general_sections()
+    EnhancedFormGenerator().generate_modern_styles()
+
+def _generate_in_worker(json_file, flags):
+    """Worker entry point: generate one form, capturing its log so the parent prints logs in order"""
+    recorder = _RecordedBuild()
+    log = io.StringIO()
+    started = time.perf_counter()
+    with redirect_stdout(log):
+        success = generate_single_form(json_file, external_assets=flags["external_assets"], minify=flags["minify"],
+                                       max_bytes=flags["max_bytes"], manifest=recorder,
+                                       delegate_events=flags["delegate_events"],
+                                       lazy_sections=flags["lazy_sections"])
+    return {"source": json_file, "success": success, "ms": (time.perf_counter() - started) * 1000,
+            "log": log.getvalue(), "records": recorder.calls}
+
+def print_timing_table(results):
+    """Print per-form generation times, slowest first"""
+    if not results:
+        return
+    width = max(len(result["source"]) for result in results)
+    print("\n⏱️  Per-form timings:")
+    print(f"   {'form':<{width}} {'status':<8} {'ms':>8}")
+    for result in sorted(results, key=lambda result: (-result["ms"], result["source"])):
+        status = "built" if result["success"] else "failed"
+        print(f"   {result['source']:<{width}} {status:<8} {result['ms']:>8.1f}")
+
+def batch_generate_all(external_assets=False, minify=False, max_bytes=None, force=False, jobs=None,
+                       delegate_events=False, lazy_sections=False):
+    """
+    Generate HTML for all available JSON forms whose inputs changed since the last build
+
+    jobs > 1 spreads the forms over that many worker processes; each loads the
+    shared sections once. Logs are printed in source order either way.
+    """
     print("\n🚀 Batch generating all forms...")
+    started = time.perf_counter()
 
     surveys_dir = Path("../surveys")
-    success_count = 0
-    total_count = 0
+    manifest = BuildManifest(str(surveys_dir))
+    flags = build_flags(external_assets, minify, max_bytes, delegate_events, lazy_sections)
+    current_count = 0
+    pending = []
 
     # Process each category directory
-    for category_dir in surveys_dir.iterdir():
+    for category_dir in sorted(surveys_dir.iterdir()):
         if category_dir.is_dir() and category_dir.name != "all-forms":
-            category = category_dir.name
-
             # Find JSON files in this category
-            for json_file in category_dir.glob("*-screener.json"):
-                total_count += 1
-                print(f"\n{'='*50}")
-                if generate_single_form(str(json_file)):
-                    success_count += 1
-
+            for json_file in sorted(category_dir.glob("*-screener.json")):
+                if not force and manifest.is_current(str(json_file), flags):
+                    current_count += 1
+                else:
+                    pending.append(str(json_file))
+
+    workers = min(jobs or 1, len(pending)) or 1
+    if workers == 1:
+        results = []
+        for json_file in pending:
+            print(f"\n{'='*50}")
+            form_started = time.perf_counter()
+            success = generate_single_form(json_file, external_assets=external_assets,
+                                           minify=minify, max_bytes=max_bytes, manifest=manifest,
+                                           delegate_events=delegate_events, lazy_sections=lazy_sections)
+            results.append({"source": json_file, "success": success,
+                            "ms": (time.perf_counter() - form_started) * 1000})
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as executor:
+            results = list(executor.map(_generate_in_worker, pending, [flags] * len(pending)))
+        for result in results:
+            print(f"\n{'='*50}")
+            print(result["log"], end="")
+            for args, kwargs in result["records"]:
+                manifest.record(*args, **kwargs)
+
+    manifest.save()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    success_count = sum(1 for result in results if result["success"])
+    total_count = len(results)
+
+    print_timing_table(results)
     print(f"\n🎉 Batch generation complete!")
     print(f"✅ Successfully generated: {success_count}/{total_count} forms")
+    print(f"⏭️  Up to date (skipped): {current_count} forms")
+    print(f"⏱️  {elapsed_ms:.1f} ms ({workers} worker{'s' if workers > 1 else ''})")
+    if external_assets:
+        print(f"📦 Shared CSS/JS bundles: {ASSET_DIR}")
 
     if success_count < total_count:
         print(f"❌ Failed: {total_count - success_count} forms")
 
+    return success_count == total_count
+
+def build_surveys_snapshot():
+    """Compile the whole surveys tree into a snapshot for fast cold starts"""
+    print("\n📦 Building surveys snapshot...")
+
+    try:
+        stats = build_snapshot("../surveys")
+    except Exception as e:
+        print(f"❌ Error building snapshot: {e}")
+        return False
+
+    print(f"✅ Snapshot written: {stats['path']}")
+    print(f"📊 {stats['sources']} source files, {stats['questions']} questions, {stats['bytes']:,} bytes")
+    return True
+
+def validate_all_forms(jobs=None, report_path=None):
+    """Validate every survey definition in parallel, optionally writing a JSON report"""
+    print("\n🔍 Validating all survey definitions...")
+
+    report = validate_catalog("../surveys", jobs)
+    for issue in report["issues"]:
+        location = f" [{issue['question_id']}]" if issue["question_id"] else ""
+        print(f"   • {issue['path']}{location}: {issue['code']} - {issue['message']}")
+
+    if report_path:
+        write_report(report, report_path)
+        print(f"📄 Report saved as: {report_path}")
+
+    print(f"📊 {report['files']} files, {report['questions']} questions checked in "
+          f"{report['elapsed_ms']} ms ({report['workers']} workers)")
+    if report["valid"]:
+        print("✅ All survey definitions valid")
+    else:
+        print(f"❌ {report['errors']} problems found")
+    return report["valid"]
+
 def main():
     parser = argparse.ArgumentParser(
         description="Convert JSON forms to HTML medical forms",
@@ -320,6 +517,30 @@ Examples:
 
   # Generate all forms
   python3 generate_form.py --batch-all
+
+  # Generate all forms linking one shared, cacheable CSS/JS bundle
+  python3 generate_form.py --batch-all --external-assets
+
+  # Minify every form and fail if one is over 60 KB
+  python3 generate_form.py --batch-all --minify --budget-kb 60
+
+  # Wire inputs through a few listeners on the form instead of inline handlers
+  python3 generate_form.py --batch-all --delegate-events
+
+  # Ship only the first section as live DOM; later ones are cloned from <template>s when reached
+  python3 generate_form.py --batch-all --lazy-sections
+
+  # Rebuild every form, even those whose inputs are unchanged
+  python3 generate_form.py --batch-all --force
+
+  # Generate on 8 cores (prints a per-form timing table)
+  python3 generate_form.py --batch-all --jobs 8
+
+  # Compile the surveys tree into a snapshot for fast worker start-up
+  python3 generate_form.py --build-snapshot
+
+  # Validate every survey definition before publishing
+  python3 generate_form.py --validate-all --report validation-report.json
         """
     )
 
@@ -330,9 +551,28 @@ Examples:
     parser.add_argument('--output-dir', help='Output directory for HTML file')
     parser.add_argument('--interactive', action='store_true', help='Run in interactive mode')
     parser.add_argument('--list-forms', action='store_true', help='List available forms')
-    parser.add_argument('--batch-all', action='store_true', help='Generate all forms')
+    parser.add_argument('--batch-all', action='store_true',
+                        help='Generate all forms whose inputs changed since the last build')
+    parser.add_argument('--force', action='store_true', help='With --batch-all, rebuild every form')
+    parser.add_argument('--external-assets', action='store_true',
+                        help='Write CSS/JS once to surveys/assets/ as hashed files and link them from each form')
+    parser.add_argument('--minify', action='store_true',
+                        help='Minify markup, CSS and JS and print a size report per form')
+    parser.add_argument('--budget-kb', type=float,
+                        help='Fail when a generated form is larger than this many KB (1 KB = 1000 bytes)')
+    parser.add_argument('--delegate-events', action='store_true',
+                        help='Omit inline onchange/oninput handlers; the runtime delegates events from the form')
+    parser.add_argument('--lazy-sections', action='store_true',
+                        help='Render sections after the first as <template>s the runtime clones when reached')
+    parser.add_argument('--build-snapshot', action='store_true',
+                        help='Compile all survey JSON into surveys/.snapshot.bin')
+    parser.add_argument('--validate-all', action='store_true', help='Validate every survey definition')
+    parser.add_argument('--report', help='Write the --validate-all report as JSON to this path')
+    parser.add_argument('--jobs', type=int,
+                        help='Worker processes for --validate-all (default: CPU count) and --batch-all (default: 1)')
 
     args = parser.parse_args()
+    max_bytes = int(args.budget_kb * 1000) if args.budget_kb else None
 
     print_banner()
 
@@ -344,7 +584,17 @@ Examples:
         interactive_mode()
 
     elif args.batch_all:
-        batch_generate_all()
+        success = batch_generate_all(args.external_assets, args.minify, max_bytes, args.force, args.jobs,
+                                     args.delegate_events, args.lazy_sections)
+        sys.exit(0 if success else 1)
+
+    elif args.build_snapshot:
+        success = build_surveys_snapshot()
+        sys.exit(0 if success else 1)
+
+    elif args.validate_all:
+        success = validate_all_forms(args.jobs, args.report)
+        sys.exit(0 if success else 1)
 
     elif args.form:
         # Generate from JSON file
@@ -352,12 +602,15 @@ Examples:
             print(f"❌ File not found: {args.form}")
             sys.exit(1)
 
-        success = generate_single_form(args.form, args.output_dir)
+        success = generate_single_form(args.form, args.output_dir, args.external_assets, args.minify, max_bytes,
+                                       delegate_events=args.delegate_events, lazy_sections=args.lazy_sections)
         sys.exit(0 if success else 1)
 
     elif args.category and args.form_name:
         # Generate by category and name
-        success = generate_by_category_and_name(args.category, args.form_name, args.consult_type)
+        success = generate_by_category_and_name(args.category, args.form_name, args.consult_type,
+                                                args.external_assets, args.minify, max_bytes, args.delegate_events,
+                                                args.lazy_sections)
         sys.exit(0 if success else 1)
 
     else:
@@ -0,0 +1,66 @@
+"""
+HTML Templates - Precompiled templates that render into a shared output buffer
+
+Markup used to be built with nested f-strings and `html +=`, which creates a new
+intermediate string for every option, question and section. A Template is parsed
+once (with string.Formatter's parser, so `{field}` and `{{`/`}}` work as in
+str.format) into a flat tuple of literal/field pairs. render_to() appends those
+pieces to a caller-owned list, so a whole document is joined exactly once.
+
+Fields are plain names substituted verbatim; values must already be strings.
+
+Usage:
+    OPTION = compile_template('<option value="{value}">{label}</option>')
+    out = []
+    for value, label in options:
+        OPTION.render_to(out, value=value, label=label)
+    html = ''.join(out)
+"""
+
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+
+_PARSER = Formatter()
+
+
+class Template:
+    __slots__ = ('source', 'fields', '_parts')
+
+    def __init__(self, source: str):
+        parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in _PARSER.parse(source):
+            if spec or conversion:
+                raise ValueError(f"Template fields take no format spec or conversion: {{{field}}}")
+            if field is not None and not field.isidentifier():
+                raise ValueError(f"Template field must be a plain name: {{{field}}}")
+            parts.append((literal, field))
+
+        self.source = source
+        self.fields = frozenset(field for _, field in parts if field is not None)
+        self._parts = tuple(parts)
+
+    def render_to(self, out: List[str], **values: str) -> None:
+        """Append the rendered pieces to out without joining them"""
+        append = out.append
+        for literal, field in self._parts:
+            if literal:
+                append(literal)
+            if field is not None:
+                append(values[field])
+
+    def render(self, **values: str) -> str:
+        """Render to a string (for callers that need one piece on its own)"""
+        out: List[str] = []
+        self.render_to(out, **values)
+        return ''.join(out)
+
+
+_COMPILED: Dict[str, Template] = {}
+
+
+def compile_template(source: str) -> Template:
+    """Compile a template once per process; identical sources share one Template"""
+    template = _COMPILED.get(source)
+    if template is None:
+        template = _COMPILED[source] = Template(source)
+    return template
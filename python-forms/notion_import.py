@@ -0,0 +1,429 @@
+"""
+Notion Import - Stream a Notion database export into the surveys tree
+
+Reads a JSON array or JSONL export of the forms database row by row (the export
+is never loaded whole), groups question rows under their form via
+`property_parent_item` (or `property_section` for shared-section rows without a
+parent) and writes one survey document per form:
+
+    general forms   -> surveys/all-forms/<form-name>.json   (metadata-header layout)
+    screener forms  -> surveys/<category>/<Form>-screener.json
+
+Question rows are spooled to one temporary JSONL file, indexed by form, while the
+export is read, so only the form rows and one form's questions are held in memory
+at a time.
+Files are only rewritten when their content hash changes, so downstream caches,
+snapshots and regeneration see untouched forms as unchanged.
+
+Usage:
+    python3 notion_import.py notion-export.jsonl
+    python3 notion_import.py notion-export.json --surveys ../surveys
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from file_utils import sha256_bytes, write_if_changed
+from form_data_loader import read_survey_file
+
+FORM_TYPES = ('screener', 'general')
+SHARED_SECTIONS_DIR = "all-forms"
+READ_CHUNK_SIZE = 64 * 1024
+# Largest single row (in characters) buffered while decoding; bounds memory on a corrupt export
+MAX_ROW_SIZE = 16 * 1024 * 1024
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class ExportParseError(ValueError):
+    """Raised when an export cannot be decoded; carries the byte offset of the problem"""
+
+    def __init__(self, path: str, msg: str, byte_offset: int):
+        super().__init__(f"{path}: {msg} at byte {byte_offset}")
+        self.path = path
+        self.msg = msg
+        self.byte_offset = byte_offset
+
+
+def iter_export_rows(file_path: str, chunk_size: int = READ_CHUNK_SIZE,
+                     max_row_size: int = MAX_ROW_SIZE) -> Iterator[Dict]:
+    """Yield rows from a JSONL file or a top-level JSON array without loading the whole file"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        if file_path.endswith('.jsonl'):
+            yield from _iter_json_lines(f, file_path, max_row_size)
+        else:
+            yield from _iter_json_array(f, file_path, chunk_size, max_row_size)
+
+
+def _iter_json_lines(f, file_path: str, max_row_size: int) -> Iterator[Dict]:
+    """Decode one row per line, never reading more than max_row_size characters of a line"""
+    offset = 0  # byte offset of the current line
+    while True:
+        line = f.readline(max_row_size + 1)
+        if not line:
+            return
+        if len(line) > max_row_size and not line.endswith('\n'):
+            raise ExportParseError(file_path, f"row longer than {max_row_size} characters", offset)
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ExportParseError(file_path, e.msg, offset + len(line[:e.pos].encode('utf-8'))) from None
+        offset += len(line.encode('utf-8'))
+
+
+def _iter_json_array(f, file_path: str, chunk_size: int, max_row_size: int) -> Iterator[Dict]:
+    """Incrementally decode the elements of a top-level JSON array from a file object"""
+    buffer = ""
+    pos = 0
+    consumed = 0  # bytes dropped from the front of the buffer so far
+    eof = False
+    started = False
+
+    def byte_offset(index: int) -> int:
+        return consumed + len(buffer[:index].encode('utf-8'))
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos >= len(buffer):
+            if eof:
+                raise ExportParseError(file_path, "unexpected end of export", byte_offset(pos))
+            consumed = byte_offset(pos)
+            buffer, pos = f.read(chunk_size), 0
+            eof = not buffer
+            continue
+
+        char = buffer[pos]
+        if not started:
+            if char != '[':
+                raise ExportParseError(file_path, "expected a JSON array", byte_offset(pos))
+            started = True
+            pos += 1
+        elif char == ']':
+            return
+        elif char == ',':
+            pos += 1
+        else:
+            try:
+                row, end = _DECODER.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ExportParseError(file_path, e.msg, byte_offset(e.pos)) from None
+                if len(buffer) - pos > max_row_size:
+                    raise ExportParseError(file_path, f"row longer than {max_row_size} characters",
+                                           byte_offset(pos)) from None
+                # Element spans the chunk boundary: keep it and read more
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                consumed = byte_offset(pos)
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield row
+            pos = end
+
+
+def serialize_survey(header: Dict, body: Dict, shared_layout: bool) -> bytes:
+    """Serialize a survey document in the same byte layout as the curated files"""
+    if shared_layout:
+        header_json = json.dumps(header, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+        text = '{\n  "form": ' + header_json + ',\n' + json.dumps(body, indent=2, ensure_ascii=False)
+    else:
+        text = json.dumps({"form": header, **body}, indent=2, ensure_ascii=False)
+    return text.encode('utf-8')
+
+
+def _order_key(row: Dict):
+    order = row.get('property_order')
+    return (order is None, order if order is not None else 0)
+
+
+def _slugify(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def _path_component(name: str) -> str:
+    """A Notion name made safe for use as one file or directory name (no separators, no "..")"""
+    return re.sub(r'[\\/\x00]+', '-', name).strip(' .-')
+
+
+def placement_keys(row: Dict) -> List[str]:
+    """
+    Where a question row belongs: 'parent:<form id>' for each parent link, or
+    'section:<name>' for a shared-section row exported without a parent.
+    """
+    parents = row.get('property_parent_item') or []
+    if parents:
+        return ['parent:' + parent_id for parent_id in parents]
+    if row.get('property_section'):
+        return ['section:' + row['property_section']]
+    return []
+
+
+class _RowSpool:
+    """
+    Rows grouped by key in one temporary JSONL file.
+
+    A single handle is kept open for the spool's lifetime; each key remembers the
+    offsets of its rows, so reading a group back loads only that group.
+    """
+
+    def __init__(self, directory: str):
+        self._file = open(os.path.join(directory, 'rows.jsonl'), 'w+b')
+        self._offsets: Dict[str, List[int]] = {}
+
+    @property
+    def keys(self):
+        return self._offsets.keys()
+
+    def add(self, key: str, row: Dict) -> None:
+        offset = self._file.seek(0, os.SEEK_END)
+        self._file.write(json.dumps(row, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._offsets.setdefault(key, []).append(offset)
+
+    def rows(self, key: str) -> Iterator[Dict]:
+        for offset in list(self._offsets.get(key, ())):
+            self._file.seek(offset)
+            yield json.loads(self._file.readline())
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "_RowSpool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class NotionImporter:
+    def __init__(self, surveys_path: str = os.path.join("..", "surveys")):
+        self.surveys_path = surveys_path
+
+    def import_file(self, file_path: str) -> Dict:
+        """Stream an export file into the surveys tree"""
+        return self.ingest(iter_export_rows(file_path))
+
+    def ingest(self, rows: Iterable[Dict]) -> Dict:
+        """Group exported rows by form and write every form document whose content changed"""
+        with tempfile.TemporaryDirectory(prefix="notion-import-") as spool_dir, _RowSpool(spool_dir) as spool:
+            return self._ingest(rows, spool)
+
+    def _ingest(self, rows: Iterable[Dict], spool: _RowSpool) -> Dict:
+        forms: Dict[str, Dict] = {}
+        row_count = 0
+
+        # Pass 1: keep the form rows, spool each question row under its parents (or section)
+        for row in rows:
+            row_count += 1
+            if row.get('property_form_type') in FORM_TYPES:
+                forms[row['id']] = row
+                continue
+
+            for key in placement_keys(row):
+                spool.add(key, row)
+
+        # Pass 2: each form is complete now; render it from its spooled questions
+        written, unchanged = [], []
+        sections_used = set()
+        for form in forms.values():
+            form_questions = list(spool.rows('parent:' + form['id']))
+            # Shared-section rows exported without a parent link still belong to their section's form
+            if form.get('property_form_type') == 'general' and form.get('name') not in sections_used:
+                sections_used.add(form.get('name'))
+                known = {q['id'] for q in form_questions}
+                form_questions.extend(
+                    q for q in spool.rows('section:' + str(form.get('name'))) if q['id'] not in known
+                )
+            rel_path, was_written = self.write_form(form, form_questions)
+            (written if was_written else unchanged).append(rel_path)
+
+        return {
+            "rows": row_count,
+            "forms": len(forms),
+            "written": sorted(written),
+            "unchanged": sorted(unchanged),
+            "unplaced_rows": self._count_unplaced(spool, forms, sections_used)
+        }
+
+    @staticmethod
+    def _count_unplaced(spool: _RowSpool, forms: Dict[str, Dict], sections_used: set) -> int:
+        """Count question rows no form picked up, reading only the spooled groups without a form"""
+        unplaced = set()
+        for key in spool.keys:
+            kind, _, name = key.partition(':')
+            if (kind == 'parent' and name in forms) or (kind == 'section' and name in sections_used):
+                continue
+            for row in spool.rows(key):
+                if not any(parent_id in forms for parent_id in row.get('property_parent_item') or []):
+                    unplaced.add(row['id'])
+        return len(unplaced)
+
+    def merge(self, rows: Iterable[Dict]) -> Dict:
+        """
+        Merge changed rows into the existing surveys tree in place.
+
+        Unlike ingest(), which expects a full export, only the forms touched by the
+        given rows are re-rendered; every other document is left alone. Form rows
+        are applied first, so questions whose form arrives later in the same batch
+        are still placed. Rows flagged "archived" are removed from their forms.
+        Question rows that match no form are returned in "unplaced" and left out.
+        """
+        from question_registry import QuestionRegistry
+
+        registry = QuestionRegistry.from_surveys(self.surveys_path)
+        form_ids_by_source = {source: notion_id for notion_id, source in registry.sources.items()
+                              if registry.nodes[notion_id].get('property_form_type') in FORM_TYPES}
+        documents: Dict[str, Tuple[Dict, List[Dict]]] = {}  # form id -> (form row, questions)
+        touched = set()
+        form_rows, question_rows = [], []
+
+        for row in rows:
+            (form_rows if row.get('property_form_type') in FORM_TYPES else question_rows).append(row)
+
+        def load(form_id: str) -> Optional[Tuple[Dict, List[Dict]]]:
+            if form_id not in documents:
+                source = registry.sources.get(form_id)
+                if source is None or form_ids_by_source.get(source) != form_id:
+                    return None
+                _, body = read_survey_file(os.path.join(self.surveys_path, source))
+                form_questions = body.pop('questions', [])
+                body.pop('form', None)
+                documents[form_id] = (body, form_questions)
+            return documents[form_id]
+
+        # Pass 1: form rows, so every form in the batch can take questions in pass 2
+        for row in form_rows:
+            existing = load(row['id'])
+            form_questions = existing[1] if existing else []
+            documents[row['id']] = ({k: v for k, v in row.items() if k != 'questions'}, form_questions)
+            touched.add(row['id'])
+
+        sections = {form['name']: form_id for form_id, (form, _) in documents.items()
+                    if form.get('property_form_type') == 'general' and form.get('name')}
+
+        def resolve(key: str) -> Optional[str]:
+            kind, _, name = key.partition(':')
+            if kind == 'section':
+                form_id = sections.get(name)
+                if form_id is None:
+                    form = registry.find_form(name)
+                    form_id = form['id'] if form and form.get('property_form_type') == 'general' else None
+            else:
+                form_id = name
+            return form_id if form_id and load(form_id) is not None else None
+
+        # Pass 2: question rows, placed exactly as ingest() places them
+        unplaced = []
+        for row in question_rows:
+            question_id = row['id']
+            old_forms = set(registry.parents.get(question_id, []))
+            holder = form_ids_by_source.get(registry.sources.get(question_id))
+            if holder:
+                old_forms.add(holder)
+
+            new_forms = {} if row.get('archived') else {
+                form_id: key.startswith('parent:')
+                for form_id, key in ((resolve(key), key) for key in placement_keys(row)) if form_id
+            }
+            if not new_forms and not row.get('archived'):
+                unplaced.append(row)
+
+            for form_id in old_forms | set(new_forms):
+                document = load(form_id)
+                if document is None:
+                    continue
+                form, form_questions = document
+                form_questions = [q for q in form_questions if q['id'] != question_id]
+                if form_id in new_forms:
+                    form_questions.append({k: v for k, v in row.items() if k != 'archived'})
+
+                # Keep the form's sub-item relation in step with the question's parent links
+                sub_items = list(form.get('property_sub_item') or [])
+                if new_forms.get(form_id) and question_id not in sub_items:
+                    sub_items.append(question_id)
+                elif not new_forms.get(form_id) and question_id in sub_items:
+                    sub_items.remove(question_id)
+                if sub_items != (form.get('property_sub_item') or []):
+                    form = {**form, 'property_sub_item': sub_items}
+                documents[form_id] = (form, form_questions)
+                touched.add(form_id)
+
+        written, unchanged, removed = [], [], []
+        for form_id in sorted(touched):
+            form, form_questions = documents[form_id]
+            rel_path, was_written = self.write_form(form, form_questions)
+            (written if was_written else unchanged).append(rel_path)
+
+            # A renamed or re-categorised form moves to a new file
+            old_path = registry.sources.get(form_id)
+            if old_path and old_path != rel_path:
+                os.remove(os.path.join(self.surveys_path, old_path))
+                removed.append(old_path)
+
+        return {
+            "rows": len(form_rows) + len(question_rows),
+            "forms": len(touched),
+            "written": sorted(written),
+            "unchanged": sorted(unchanged),
+            "removed": sorted(removed),
+            "unplaced": unplaced
+        }
+
+    def write_form(self, form: Dict, form_questions: List[Dict]) -> Tuple[str, bool]:
+        """Render a form document and write it if its content changed; returns (path, written)"""
+        rel_path, data = self.render_document(form, form_questions)
+        return rel_path, write_if_changed(os.path.join(self.surveys_path, rel_path), data)
+
+    def document_path(self, form: Dict) -> Tuple[str, bool]:
+        """Return (path relative to surveys/, uses shared-section layout) for a form row"""
+        if form.get('property_form_type') == 'general':
+            return f"{SHARED_SECTIONS_DIR}/{_slugify(form.get('name', form['id']))}.json", True
+        category = _path_component((form.get('property_category') or 'general').lower()) or 'general'
+        name = _path_component(form.get('name') or '') or _path_component(form['id'])
+        return f"{category}/{name}-screener.json", False
+
+    def render_document(self, form: Dict, form_questions: List[Dict]) -> Tuple[str, bytes]:
+        """Build the serialized survey document for a form and its questions"""
+        rel_path, shared_layout = self.document_path(form)
+        consult_type = form.get('property_consult_type') or '-'
+        header = {
+            "name": form.get('name', ''),
+            "type": consult_type,
+            "category": form.get('property_category') or '',
+            "consultType": consult_type,
+            "notionId": form['id']
+        }
+
+        body = {k: v for k, v in form.items() if k not in ('form', 'questions')}
+        body["questions"] = sorted(form_questions, key=_order_key)
+        return rel_path, serialize_survey(header, body, shared_layout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a Notion forms database export into the surveys tree")
+    parser.add_argument('export', help='Path to a .json (array) or .jsonl export')
+    parser.add_argument('--surveys', default=os.path.join("..", "surveys"), help='Surveys directory to update')
+    args = parser.parse_args()
+
+    try:
+        result = NotionImporter(args.surveys).import_file(args.export)
+    except (OSError, ValueError) as e:
+        print(f"❌ Import failed: {e}")
+        sys.exit(1)
+
+    print(f"✅ Imported {result['rows']} rows into {result['forms']} forms")
+    for rel_path in result['written']:
+        print(f"   ✏️  {rel_path}")
+    print(f"   {len(result['unchanged'])} forms unchanged")
+    if result['unplaced_rows']:
+        print(f"⚠️  {result['unplaced_rows']} rows had no matching form and were skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Notion Sync - Incremental sync of the forms database using last-updated cursors
+
+Every row carries `property_last_updated`. The sync keeps a high-water mark per
+database in surveys/.notion-sync.json and asks its source only for rows changed
+at or after that mark, then merges them into the surveys tree in place (see
+NotionImporter.merge). Notion's last_edited_time is only accurate to the minute,
+so the mark is inclusive: rows edited in the same minute as the newest synced row
+are fetched again, and re-merging them is a no-op. The mark never moves past a
+question row that could not be placed (its form is not known yet), so it is
+fetched again on the next sync. Editing one disqualify message rewrites one file
+instead of re-exporting the whole database.
+
+Sources are pluggable: anything with an
+`iter_changed_rows(database_id, since) -> Iterator[Dict]` method works.
+
+    NotionApiSource        - the Notion REST API (or a local HTTP stand-in via base_url)
+    DirectoryExportSource  - a directory of .json/.jsonl export files
+
+Usage:
+    python3 notion_sync.py --database <id> --export-dir ./exports
+    NOTION_TOKEN=secret python3 notion_sync.py --database <id>
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+import requests
+
+from file_utils import atomic_write
+from notion_import import NotionImporter, iter_export_rows
+
+CURSOR_FILENAME = ".notion-sync.json"
+CURSOR_VERSION = 1
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_API_VERSION = "2022-06-28"
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO 8601 timestamp (Notion uses a trailing Z) into an aware datetime"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _changed_since(row: Dict, since: Optional[datetime]) -> bool:
+    """True if a row may have changed at or after the cursor (rows without a timestamp always may)"""
+    if since is None:
+        return True
+    updated = parse_timestamp(row.get('property_last_updated'))
+    return updated is None or updated >= since
+
+
+class DirectoryExportSource:
+    """Serves rows from export files in a directory; <database_id>.json(l) if present, else every file"""
+
+    def __init__(self, export_dir: str):
+        self.export_dir = export_dir
+
+    def iter_changed_rows(self, database_id: str, since: Optional[str]) -> Iterator[Dict]:
+        since_ts = parse_timestamp(since)
+        for file_path in self._export_files(database_id):
+            for row in iter_export_rows(file_path):
+                if _changed_since(row, since_ts):
+                    yield row
+
+    def _export_files(self, database_id: str) -> List[str]:
+        names = sorted(n for n in os.listdir(self.export_dir) if n.endswith(('.json', '.jsonl')))
+        own = [n for n in names if n.rsplit('.', 1)[0] == database_id]
+        return [os.path.join(self.export_dir, n) for n in (own or names)]
+
+
+class NotionApiSource:
+    """Queries a Notion database for pages edited after the cursor, following pagination"""
+
+    def __init__(self, token: str, base_url: str = NOTION_API_URL, page_size: int = 100, timeout: int = 30):
+        self.base_url = base_url.rstrip('/')
+        self.page_size = page_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Bearer {token}',
+            'Notion-Version': NOTION_API_VERSION,
+            'Content-Type': 'application/json'
+        })
+
+    def iter_changed_rows(self, database_id: str, since: Optional[str]) -> Iterator[Dict]:
+        query: Dict = {"page_size": self.page_size}
+        if since:
+            query["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}}
+
+        while True:
+            response = self.session.post(
+                f"{self.base_url}/databases/{database_id}/query",
+                data=json.dumps(query),
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            payload = response.json()
+
+            for page in payload.get('results', []):
+                yield page_to_row(page)
+
+            if not payload.get('has_more'):
+                return
+            query["start_cursor"] = payload['next_cursor']
+
+
+def page_to_row(page: Dict) -> Dict:
+    """Flatten a Notion page object into the property_* row format used by the survey files"""
+    row = {"id": page['id'], "name": "", "url": page.get('url', '')}
+    for prop_name, prop in page.get('properties', {}).items():
+        key = 'property_' + re.sub(r'[^a-z0-9]+', '_', prop_name.lower()).strip('_')
+        value = _property_value(prop)
+        if prop.get('type') == 'title':
+            row["name"] = value
+        else:
+            row[key] = value
+
+    if row.get('property_last_updated') is None:
+        row['property_last_updated'] = page.get('last_edited_time')
+    if page.get('archived') or page.get('in_trash'):
+        row['archived'] = True
+    return row
+
+
+def _property_value(prop: Dict):
+    prop_type = prop.get('type')
+    value = prop.get(prop_type)
+    if prop_type in ('title', 'rich_text'):
+        return ''.join(part.get('plain_text', '') for part in value or [])
+    if prop_type in ('select', 'status'):
+        return value.get('name') if value else None
+    if prop_type == 'multi_select':
+        return [option['name'] for option in value or []]
+    if prop_type == 'relation':
+        return [related['id'] for related in value or []]
+    if prop_type == 'date':
+        return value.get('start') if value else None
+    if prop_type == 'formula':
+        return value.get(value.get('type')) if value else None
+    return value
+
+
+class NotionSync:
+    def __init__(self, source, surveys_path: str = os.path.join("..", "surveys")):
+        self.source = source
+        self.surveys_path = surveys_path
+        self.cursor_path = os.path.join(surveys_path, CURSOR_FILENAME)
+
+    def get_cursor(self, database_id: str) -> Optional[str]:
+        """Return the high-water mark for a database, or None before the first sync"""
+        return self._read_cursors().get(database_id)
+
+    def sync(self, database_id: str) -> Dict:
+        """Pull rows changed since the database's cursor and merge them into the surveys tree"""
+        since = self.get_cursor(database_id)
+        since_ts = parse_timestamp(since)
+
+        # Sources may ignore the cursor (e.g. a full export file); keep rows at or after it
+        rows = [row for row in self.source.iter_changed_rows(database_id, since)
+                if _changed_since(row, since_ts)]
+
+        result = NotionImporter(self.surveys_path).merge(rows)
+
+        # Only advance the cursor after the merge succeeded
+        newest, newest_ts = since, since_ts
+        for row in rows:
+            updated = parse_timestamp(row.get('property_last_updated'))
+            if updated is not None and (newest_ts is None or updated > newest_ts):
+                newest, newest_ts = row['property_last_updated'], updated
+
+        # Rows whose form has not arrived yet must be fetched again: stop at the oldest one
+        for row in result["unplaced"]:
+            updated = parse_timestamp(row.get('property_last_updated'))
+            if updated is not None and (since_ts is None or updated >= since_ts) and updated < newest_ts:
+                newest, newest_ts = row['property_last_updated'], updated
+        if newest != since:
+            self._write_cursor(database_id, newest)
+
+        result.update({"database_id": database_id, "since": since, "cursor": newest})
+        return result
+
+    def _read_cursors(self) -> Dict[str, str]:
+        try:
+            with open(self.cursor_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CURSOR_VERSION:
+            return {}
+        return data.get("cursors", {})
+
+    def _write_cursor(self, database_id: str, cursor: str) -> None:
+        cursors = self._read_cursors()
+        cursors[database_id] = cursor
+        data = {"version": CURSOR_VERSION, "cursors": cursors}
+        atomic_write(self.cursor_path, json.dumps(data, indent=2, sort_keys=True).encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally sync the Notion forms database into the surveys tree")
+    parser.add_argument('--database', required=True, help='Notion database ID')
+    parser.add_argument('--export-dir', help='Read rows from export files in this directory instead of the API')
+    parser.add_argument('--api-url', default=NOTION_API_URL, help='Notion API base URL')
+    parser.add_argument('--surveys', default=os.path.join("..", "surveys"), help='Surveys directory to update')
+    args = parser.parse_args()
+
+    if args.export_dir:
+        source = DirectoryExportSource(args.export_dir)
+    else:
+        token = os.environ.get('NOTION_TOKEN')
+        if not token:
+            print("❌ Set NOTION_TOKEN or pass --export-dir")
+            sys.exit(1)
+        source = NotionApiSource(token, args.api_url)
+
+    try:
+        result = NotionSync(source, args.surveys).sync(args.database)
+    except (OSError, ValueError, requests.RequestException) as e:
+        print(f"❌ Sync failed: {e}")
+        sys.exit(1)
+
+    print(f"✅ {result['rows']} changed rows since {result['since'] or 'the beginning'}")
+    for rel_path in result['written']:
+        print(f"   ✏️  {rel_path}")
+    for rel_path in result['removed']:
+        print(f"   🗑️  {rel_path}")
+    if result['unplaced']:
+        print(f"⚠️  {len(result['unplaced'])} rows had no matching form and will be retried")
+    print(f"   Cursor: {result['cursor']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Precompress - gzip/brotli siblings for generated static files
+
+Live forms are served as static files. Instead of every edge node compressing
+them per request, each generated file gets siblings compressed once at maximum
+level:
+
+    GLP1-screener-live.html
+    GLP1-screener-live.html.gz    (gzip -9)
+    GLP1-screener-live.html.br    (brotli quality 11, only if the optional brotli package is installed)
+    GLP1-screener-live.html.sha256  (stamp: the content hash each sibling was compressed from)
+
+brotli is opt-in (commented out in requirements.txt): without it only .gz siblings
+are written and brotli-capable clients get gzip.
+
+A sibling is fresh only while the stamp's hash for it matches the file's current
+content, so a copied, restored or touched file can never be paired with an old
+sibling, whatever the mtimes say. Nothing is recompressed while the hashes match.
+send_precompressed() serves the best fresh sibling the client's Accept-Encoding allows.
+
+Usage:
+    status = write_with_siblings("../surveys/weightloss/GLP1-screener-live.html", html.encode('utf-8'))
+"""
+
+import gzip
+import mimetypes
+import os
+from typing import Dict, Optional, Tuple
+
+from file_utils import atomic_write, sha256_bytes, sha256_file, write_if_changed
+
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz siblings are written
+    brotli = None
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+STAMP_SUFFIX = '.sha256'
+
+# Content hashes of served files, keyed by path and validated by (mtime_ns, size)
+_SOURCE_HASHES: Dict[str, Tuple[int, int, Optional[str]]] = {}
+
+
+def compress(data: bytes, encoding: str) -> Optional[bytes]:
+    """Compress at maximum level; None if the encoding is not available here"""
+    if encoding == 'gzip':
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+
+def read_stamp(file_path: str) -> Dict[str, str]:
+    """Return {suffix: source sha256} from file_path's stamp ({} if there is none)"""
+    try:
+        with open(file_path + STAMP_SUFFIX, 'r', encoding='utf-8') as f:
+            return dict(line.split() for line in f if line.strip())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_stamp(file_path: str, stamp: Dict[str, str]) -> None:
+    atomic_write(file_path + STAMP_SUFFIX,
+                 ''.join(f"{suffix} {digest}\n" for suffix, digest in sorted(stamp.items())).encode('utf-8'))
+
+
+def content_hash(file_path: str) -> Optional[str]:
+    """sha256 of a file, re-hashed only when its (mtime_ns, size) changes"""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        _SOURCE_HASHES.pop(file_path, None)
+        return None
+    cached = _SOURCE_HASHES.get(file_path)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2]
+    digest = sha256_file(file_path)
+    _SOURCE_HASHES[file_path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def is_fresh(file_path: str, suffix: str) -> bool:
+    """True if file_path + suffix exists and was compressed from file_path's current content"""
+    digest = read_stamp(file_path).get(suffix)
+    return digest is not None and os.path.isfile(file_path + suffix) and digest == content_hash(file_path)
+
+
+def write_with_siblings(file_path: str, data: bytes) -> Dict[str, str]:
+    """
+    Write data to file_path plus its compressed siblings.
+
+    Returns the status per file: "written", "unchanged", or "unavailable" for
+    an encoding whose library is not installed.
+    """
+    changed = write_if_changed(file_path, data)
+    status = {"file": "written" if changed else "unchanged"}
+    digest = sha256_bytes(data)
+    stamp = read_stamp(file_path)
+    new_stamp = {}
+
+    for encoding, suffix in ENCODINGS:
+        if stamp.get(suffix) == digest and os.path.isfile(file_path + suffix):
+            status[encoding] = "unchanged"
+            new_stamp[suffix] = digest
+            continue
+        compressed = compress(data, encoding)
+        if compressed is None:
+            status[encoding] = "unavailable"
+            continue
+        atomic_write(file_path + suffix, compressed)
+        status[encoding] = "written"
+        new_stamp[suffix] = digest
+
+    if new_stamp != stamp:
+        _write_stamp(file_path, new_stamp)
+    return status
+
+
+def send_precompressed(directory: str, filename: str):
+    """
+    Flask response for directory/filename, using a fresh .br/.gz sibling when the
+    client accepts that encoding (404 if the file does not exist)
+    """
+    from flask import abort, request, send_from_directory
+    from werkzeug.security import safe_join
+
+    file_path = safe_join(directory, filename)
+    if file_path is None or not os.path.isfile(file_path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and is_fresh(file_path, suffix):
+            response = send_from_directory(directory, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype)
+
+    response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,212 @@
+"""
+Question Registry - Index of every Notion form and question by full UUID
+
+Survey rows carry their full Notion `id` plus `property_parent_item` and
+`property_sub_item` links. The registry keeps every row addressable by UUID in a
+dict and stores the parent/child links as an adjacency index, so lookups are O(1)
+and walking a form's subtree is linear in its size, without scanning every file.
+
+It also assigns the short `SQxxxx` question IDs used in the generated HTML.
+Truncating to four characters can collide; colliding IDs are extended with more
+characters of the UUID until they are unique within a form. Shared-section
+questions keep the same ID in every form.
+
+Usage:
+    registry = QuestionRegistry.from_surveys("../surveys")
+    form = registry.find_form("GLP1")
+    questions = registry.form_questions(form["id"])
+"""
+
+import os
+from collections import defaultdict, deque
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from form_data_loader import read_survey_file
+
+SHORT_ID_LENGTH = 4
+FORM_TYPES = ('screener', 'general')
+# Source directory of the sections included in every form
+SHARED_SOURCE_DIR = 'all-forms/'
+
+
+def short_question_ids(notion_ids: Iterable[str], reserved: Iterable[str] = ()) -> Dict[str, str]:
+    """
+    Map Notion UUIDs to short SQ IDs that are unique within the given set.
+
+    The ID is built from the start of the UUID's last segment, so it matches the
+    historical `SQ` + 4 characters whenever there is no collision. IDs in reserved
+    (already handed out elsewhere in the form) are never reused; colliding UUIDs are
+    extended instead, so the owners of the reserved IDs keep them.
+    """
+    reserved = set(reserved)
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for notion_id in dict.fromkeys(notion_ids):
+        groups[_short_id(notion_id, SHORT_ID_LENGTH)].append(notion_id)
+
+    short_ids = {}
+    for prefix, members in groups.items():
+        if len(members) == 1 and prefix not in reserved:
+            short_ids[members[0]] = prefix
+            continue
+
+        # Grow the prefix until every colliding UUID is distinct
+        tail_length = max(len(m.split('-')[-1]) for m in members)
+        for length in range(SHORT_ID_LENGTH + 1, tail_length + 1):
+            candidates = {m: _short_id(m, length) for m in members}
+            if len(set(candidates.values())) == len(members) and reserved.isdisjoint(candidates.values()):
+                short_ids.update(candidates)
+                break
+        else:
+            # Same last segment: fall back to the whole UUID
+            for m in members:
+                short_ids[m] = f"SQ{m.replace('-', '').upper()}"
+
+    return short_ids
+
+
+def form_question_ids(shared_ids: Iterable[str], form_ids: Iterable[str]) -> Dict[str, str]:
+    """
+    Assign short IDs for one rendered form.
+
+    Shared-section questions are numbered among themselves only, so they carry the
+    same ID in every form; the form's own questions are extended if they collide.
+    """
+    short_ids = short_question_ids(shared_ids)
+    short_ids.update(short_question_ids(form_ids, reserved=short_ids.values()))
+    return short_ids
+
+
+def _short_id(notion_id: str, length: int) -> str:
+    question_id = notion_id.split('-')[-1][:length].upper()
+    if not question_id.startswith('SQ'):
+        question_id = f"SQ{question_id}"
+    return question_id
+
+
+class QuestionRegistry:
+    def __init__(self):
+        self.nodes: Dict[str, Dict] = {}
+        self.sources: Dict[str, str] = {}
+        self.children: Dict[str, List[str]] = defaultdict(list)
+        self.parents: Dict[str, List[str]] = defaultdict(list)
+        self._forms_by_name: Dict[str, str] = {}
+        self._short_ids: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def from_surveys(cls, surveys_path: str = os.path.join("..", "surveys")) -> "QuestionRegistry":
+        """Build a registry from every survey JSON file under surveys_path"""
+        registry = cls()
+        for category_dir in sorted(os.listdir(surveys_path)):
+            category_path = os.path.join(surveys_path, category_dir)
+            if category_dir.startswith('.') or not os.path.isdir(category_path):
+                continue
+            for filename in sorted(os.listdir(category_path)):
+                if filename.endswith('.json'):
+                    _, body = read_survey_file(os.path.join(category_path, filename))
+                    registry.add_document(body, f"{category_dir}/{filename}")
+        return registry
+
+    def add_document(self, body: Dict, source: Optional[str] = None) -> None:
+        """Index a survey document: the form row itself plus its questions"""
+        if body.get('id'):
+            self.add(body, source)
+        for question in body.get('questions', []):
+            self.add(question, source)
+
+    def add(self, row: Dict, source: Optional[str] = None) -> None:
+        """Index a single Notion row and its parent/sub-item links"""
+        notion_id = row['id']
+        previous = self.nodes.get(notion_id)
+        if previous is not None and self._forms_by_name.get(previous.get('name')) == notion_id:
+            del self._forms_by_name[previous['name']]
+        # Form rows embed their questions; keep the index flat
+        self.nodes[notion_id] = {k: v for k, v in row.items() if k != 'questions'}
+        if source:
+            self.sources[notion_id] = source
+        if row.get('property_form_type') in FORM_TYPES and row.get('name'):
+            self._forms_by_name.setdefault(row['name'], notion_id)
+
+        for child_id in row.get('property_sub_item') or []:
+            self._link(notion_id, child_id)
+        for parent_id in row.get('property_parent_item') or []:
+            self._link(parent_id, notion_id)
+
+        self._short_ids = None
+
+    def _link(self, parent_id: str, child_id: str) -> None:
+        if child_id not in self.children[parent_id]:
+            self.children[parent_id].append(child_id)
+        if parent_id not in self.parents[child_id]:
+            self.parents[child_id].append(parent_id)
+
+    def get(self, notion_id: str) -> Optional[Dict]:
+        """Return the row for a Notion UUID"""
+        return self.nodes.get(notion_id)
+
+    def children_of(self, notion_id: str) -> List[Dict]:
+        """Return the indexed child rows of a form or question"""
+        return [self.nodes[c] for c in self.children.get(notion_id, []) if c in self.nodes]
+
+    def parents_of(self, notion_id: str) -> List[Dict]:
+        """Return the indexed parent rows of a question"""
+        return [self.nodes[p] for p in self.parents.get(notion_id, []) if p in self.nodes]
+
+    def iter_subtree(self, notion_id: str) -> Iterator[Dict]:
+        """Yield every row below notion_id breadth-first; each row is visited once"""
+        seen = {notion_id}
+        queue = deque(self.children.get(notion_id, []))
+        while queue:
+            current = queue.popleft()
+            if current in seen:
+                continue
+            seen.add(current)
+            if current in self.nodes:
+                yield self.nodes[current]
+            queue.extend(self.children.get(current, []))
+
+    def forms(self) -> List[Dict]:
+        """Return every indexed form row (screeners and shared sections)"""
+        return [row for row in self.nodes.values() if row.get('property_form_type') in FORM_TYPES]
+
+    def find_form(self, name: str) -> Optional[Dict]:
+        """Return the form row with the given name, if any"""
+        notion_id = self._forms_by_name.get(name)
+        return self.nodes.get(notion_id) if notion_id else None
+
+    def form_questions(self, form_id: str) -> List[Dict]:
+        """Return a form's direct questions sorted by property_order"""
+        questions = self.children_of(form_id)
+        return sorted(questions, key=lambda q: 999 if q.get('property_order') is None else q['property_order'])
+
+    def short_id(self, notion_id: str) -> str:
+        """Return the SQ ID a question carries in the generated HTML (see form_question_ids)"""
+        if self._short_ids is None:
+            self._short_ids = self._build_short_ids()
+        return self._short_ids.get(notion_id) or _short_id(notion_id, SHORT_ID_LENGTH)
+
+    def _build_short_ids(self) -> Dict[str, str]:
+        by_source: Dict[str, List[str]] = defaultdict(list)
+        for notion_id, row in self.nodes.items():
+            if row.get('property_form_type') not in FORM_TYPES:
+                by_source[self.sources.get(notion_id, '')].append(notion_id)
+
+        shared = [q for source, ids in by_source.items() if source.startswith(SHARED_SOURCE_DIR) for q in ids]
+        short_ids = short_question_ids(shared)
+        reserved = set(short_ids.values())
+        for source, ids in by_source.items():
+            if not source.startswith(SHARED_SOURCE_DIR):
+                short_ids.update(short_question_ids(ids, reserved=reserved))
+        return short_ids
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, notion_id: str) -> bool:
+        return notion_id in self.nodes
+
+
+if __name__ == "__main__":
+    registry = QuestionRegistry.from_surveys()
+    for form in registry.forms():
+        questions = registry.form_questions(form['id'])
+        print(f"  {form['name']} ({form['id']}): {len(questions)} questions")
@@ -1,16 +1,30 @@
 """
 Regenerate the GLP1 form using complete JSON data from forms directory
+
+The form is only rebuilt when its inputs changed since the last build (see
+build_manifest.py); pass --force to rebuild it anyway.
 """
 
+from build_manifest import BuildManifest, build_flags
 from enhanced_form_generator import EnhancedFormGenerator
 from form_data_loader import FormDataLoader
+from precompress import write_with_siblings
 
 # Remove the old form
 import os
+import sys
 for old_file in ["GLP1_Weightloss_Screening.html", "GLP1_Weightloss_Screening_FIXED.html"]:
     if os.path.exists(old_file):
         os.remove(old_file)
 
+source = "../surveys/weightloss/GLP1-screener.json"
+filename = "../surveys/weightloss/GLP1-screener-live.html"
+
+manifest = BuildManifest()
+if "--force" not in sys.argv and manifest.is_current(source, build_flags()):
+    print(f"✅ {filename} is up to date (inputs unchanged); use --force to rebuild")
+    sys.exit(0)
+
 print("🔧 Loading complete GLP1 form data from JSON files...")
 
 # Load the complete form data using the new loader
@@ -19,7 +33,7 @@ form_data = loader.generate_complete_form_data("Weightloss", "GLP1", "async")
 
 if not form_data["sections"]:
     print("❌ Error: No form data loaded!")
-    exit(1)
+    sys.exit(1)
 
 print(f"✅ Loaded {len(form_data['sections'])} sections:")
 for section_name, questions in form_data['sections'].items():
@@ -30,10 +44,9 @@ print("\n🔧 Generating complete form with all fixes...")
 generator = EnhancedFormGenerator()
 html = generator.generate_notion_form(form_data)
 
-filename = "../surveys/weightloss/GLP1-screener-live.html"
-
-with open(filename, 'w', encoding='utf-8') as f:
-    f.write(html)
+write_with_siblings(filename, html.encode('utf-8'))
+manifest.record(source, filename, build_flags())
+manifest.save()
 
 print(f"\n✅ Complete form generated successfully!")
 print(f"📄 Saved as: {filename}")
@@ -0,0 +1,37 @@
+"""
+Render Context - Per-call state of one form render
+
+The generators used to keep the form being rendered, its analysed structure, the
+question-ID counter and the last size report on the instance, so a generator
+shared between request threads could mix up concurrent renders. All of that now
+lives in a RenderContext created for each call; a generator instance only holds
+configuration (question types, sync-only states) and can serve any number of
+renders at once without locks.
+
+Question IDs that fall back to the counter are numbered per render, starting at
+1, so the same input always produces the same HTML however requests interleave.
+
+Usage:
+    context = RenderContext()
+    html = EnhancedFormGenerator().generate_notion_form(form, {"minify": True}, context)
+    print(context.size_report.format_table())
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class RenderContext:
+    form_data: Any = None                    # the form being rendered
+    form_config: Any = None                  # UniversalFormGenerator's analysed structure
+    options: Dict = field(default_factory=dict)
+    question_counter: int = 0
+    disqualification_triggered: bool = False
+    size_report: Optional[Any] = None        # form_minifier.SizeReport, when minified or budget-checked
+    asset_bundle: Optional[Any] = None       # form_assets.AssetBundle the document links (external assets)
+
+    def next_question_number(self) -> int:
+        """Return the next number for a question without its own ID"""
+        self.question_counter += 1
+        return self.question_counter
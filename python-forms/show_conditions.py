@@ -0,0 +1,69 @@
+"""
+Show Conditions - The one table of show-condition rules
+
+Questions carry a `property_show_condition`. Keyword conditions (if_allergies_yes,
+if_tobacco_yes, ...) are shown when an answer of a matching question is chosen;
+reference conditions (if_SQ-57_yes) name the trigger by its Notion unique ID.
+
+The generator resolves these rules to the inputs that show a question, and the
+survey validator checks that every condition resolves; both read them from here,
+so a rule cannot be added to one and forgotten in the other.
+
+Usage:
+    from show_conditions import CONDITION_RULES, triggering_values
+    rule = CONDITION_RULES['if_allergies_yes']
+    values = triggering_values(rule, "Any allergies?", "radio", ["yes", "no"])
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class ConditionRule:
+    input_type: str                 # 'radio' or 'checkbox'
+    answer: str                     # option value that shows the dependent question
+    keywords: Sequence[str] = ()    # the trigger's text must contain one of these (lower case), if any
+    partial: bool = False           # match option values containing answer, not just equal to it
+
+
+# Keyword show conditions, resolved against the form's questions
+CONDITION_RULES = {
+    'if_gender_female': ConditionRule('radio', 'female'),
+    'if_allergies_yes': ConditionRule('radio', 'yes', ('allergies',)),
+    'if_other_glp1s_yes': ConditionRule('checkbox', 'other_glp1', partial=True),
+    'if_tobacco_yes': ConditionRule('radio', 'yes', ('tobacco', 'vape')),
+    'if_tobacco_use_yes': ConditionRule('radio', 'yes', ('tobacco', 'vape')),
+}
+
+# if_SQ-N_yes: shown when the question with Notion unique ID SQ-N is answered "yes"
+REFERENCE_CONDITION = r'^if_(SQ-\d+)_yes$'
+REFERENCE_ANSWER = 'yes'
+
+_REFERENCE = re.compile(REFERENCE_CONDITION)
+
+
+def reference_target(condition: str) -> Optional[str]:
+    """The unique ID a reference condition points at ("SQ-57"), or None for other conditions"""
+    match = _REFERENCE.match(condition or '')
+    return match.group(1) if match else None
+
+
+def unique_id_label(value) -> Optional[str]:
+    """A Notion unique ID as written in show conditions: 57 -> "SQ-57" (None if empty)"""
+    if value in (None, ''):
+        return None
+    value = str(value)
+    return f"SQ-{value}" if value.isdigit() else value
+
+
+def triggering_values(rule: ConditionRule, text: str, question_type: Optional[str],
+                      values: Iterable[str]) -> List[str]:
+    """The answer values of a question that satisfy rule (empty if the question cannot trigger it)"""
+    if question_type != rule.input_type:
+        return []
+    text = text.lower()
+    if rule.keywords and not any(keyword in text for keyword in rule.keywords):
+        return []
+    return [value for value in values if (rule.answer in value if rule.partial else value == rule.answer)]
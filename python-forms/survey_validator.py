@@ -0,0 +1,331 @@
+"""
+Survey Validator - Parallel validation of every survey definition in the catalog
+
+Checks each survey document (screeners and shared sections) for:
+
+    missing-field          required form/question fields are absent or empty
+    unknown-question-type  property_question_type is not rendered by the generator
+    duplicate-question     the same Notion id appears twice in one document
+    overlapping-answers    an answer is listed as more than one of safe/flag/disqualify
+    unknown-condition      property_show_condition has an unrecognised format
+    unresolved-condition   the question a show condition depends on does not exist
+                           (if_SQ-N_yes: no question with Notion unique ID SQ-N in the
+                           form or the shared sections, or it has no "yes" answer)
+    parse-error            the file is not valid survey JSON
+
+The rules for a schema version are compiled once per process (frozensets and
+regexes, see compile_schema) and files are validated in parallel across worker
+processes. The result is a JSON-serialisable report, so publishing can be gated
+on `report["errors"] == 0`.
+
+Usage:
+    python3 survey_validator.py --report validation-report.json
+    python3 generate_form.py --validate-all --jobs 4
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from form_data_loader import SurveyParseError, read_survey_file
+from show_conditions import (CONDITION_RULES, REFERENCE_ANSWER, REFERENCE_CONDITION, ConditionRule,
+                             triggering_values, unique_id_label)
+
+REPORT_VERSION = 1
+DEFAULT_SCHEMA_VERSION = 1
+SHARED_SECTIONS_DIR = "all-forms"
+
+# Below this many files, worker start-up costs more than it saves
+PARALLEL_THRESHOLD = 32
+
+ANSWER_LISTS = ('property_safe_answers', 'property_flag_answers', 'property_disqualify_answers')
+
+# (lower-cased question text, question type, answers) per question; see answer_index
+AnswerIndex = List[Tuple[str, Optional[str], FrozenSet[str]]]
+
+_SCHEMAS = {
+    1: {
+        "form_fields": ('id', 'name', 'property_form_type', 'property_category'),
+        "question_fields": ('id', 'name', 'property_question_type'),
+        "question_types": (
+            'text', 'email', 'phone', 'date', 'radio', 'checkbox', 'dropdown', 'file',
+            'height_feet', 'height_inches', 'weight_pounds', 'formula', 'postal_code'
+        ),
+        "always_conditions": ('', 'always'),
+        "reference_condition": REFERENCE_CONDITION,
+    }
+}
+
+
+@dataclass(frozen=True)
+class CompiledSchema:
+    version: int
+    form_fields: Tuple[str, ...]
+    question_fields: Tuple[str, ...]
+    question_types: FrozenSet[str]
+    always_conditions: FrozenSet[str]
+    keyword_conditions: Dict[str, ConditionRule]
+    reference_condition: "re.Pattern"
+
+
+@lru_cache(maxsize=None)
+def compile_schema(version: int = DEFAULT_SCHEMA_VERSION) -> CompiledSchema:
+    """Compile the rules for a schema version; cached, so each process does this once"""
+    if version not in _SCHEMAS:
+        raise ValueError(f"Unknown survey schema version: {version}")
+    rules = _SCHEMAS[version]
+    return CompiledSchema(
+        version=version,
+        form_fields=tuple(rules["form_fields"]),
+        question_fields=tuple(rules["question_fields"]),
+        question_types=frozenset(rules["question_types"]),
+        always_conditions=frozenset(rules["always_conditions"]),
+        keyword_conditions=dict(CONDITION_RULES),
+        reference_condition=re.compile(rules["reference_condition"])
+    )
+
+
+def _answers(question: Dict) -> FrozenSet[str]:
+    values = set()
+    for key in ANSWER_LISTS + ('property_checkbox_options',):
+        values.update(a for a in question.get(key) or [] if isinstance(a, str))
+    return frozenset(values)
+
+
+def _unique_id(question: Dict) -> Optional[str]:
+    """The question's Notion unique ID as written in show conditions (e.g. "SQ-57")"""
+    return unique_id_label(question.get('property_unique_id'))
+
+
+def unique_id_index(questions: List[Dict]) -> Dict[str, FrozenSet[str]]:
+    """Map Notion unique IDs to the answers of their questions, for if_SQ-N_yes conditions"""
+    return {_unique_id(q): _answers(q) for q in questions if _unique_id(q)}
+
+
+def _question_text(question: Dict) -> str:
+    return (question.get('property_question_text') or question.get('name') or '').lower()
+
+
+def answer_index(questions: List[Dict]) -> List[Tuple[str, Optional[str], FrozenSet[str]]]:
+    """Reduce questions to (lower-cased text, question type, answers) used to resolve show conditions"""
+    return [(_question_text(q), q.get('property_question_type'), _answers(q)) for q in questions]
+
+
+def _issue(rel_path: str, code: str, message: str, question_id: Optional[str] = None) -> Dict:
+    return {"path": rel_path, "code": code, "message": message, "question_id": question_id}
+
+
+def validate_document(body: Dict, rel_path: str, shared_index: AnswerIndex = (),
+                      schema: Optional[CompiledSchema] = None,
+                      shared_unique_ids: Optional[Dict[str, FrozenSet[str]]] = None) -> List[Dict]:
+    """
+    Validate one parsed survey body; shared_index and shared_unique_ids let screeners
+    reference shared-section answers and questions
+    """
+    schema = schema or compile_schema(body.get('schemaVersion', DEFAULT_SCHEMA_VERSION))
+    issues = []
+
+    for field in schema.form_fields:
+        if body.get(field) in (None, ''):
+            issues.append(_issue(rel_path, "missing-field", f"Form is missing '{field}'"))
+
+    questions = body.get('questions')
+    if not isinstance(questions, list):
+        issues.append(_issue(rel_path, "missing-field", "Form is missing a 'questions' array"))
+        return issues
+
+    ordered = sorted(questions, key=lambda q: 999 if q.get('property_order') is None else q['property_order'])
+    index = answer_index(questions) + list(shared_index)
+    unique_ids = {**(shared_unique_ids or {}), **unique_id_index(questions)}
+    seen_ids = set()
+
+    for position, question in enumerate(ordered):
+        question_id = question.get('id')
+
+        for field in schema.question_fields:
+            if question.get(field) in (None, ''):
+                issues.append(_issue(rel_path, "missing-field", f"Question is missing '{field}'", question_id))
+
+        if question_id in seen_ids:
+            issues.append(_issue(rel_path, "duplicate-question", "Question appears more than once", question_id))
+        seen_ids.add(question_id)
+
+        question_type = question.get('property_question_type')
+        if question_type and question_type not in schema.question_types:
+            issues.append(_issue(rel_path, "unknown-question-type",
+                                 f"Unknown question type '{question_type}'", question_id))
+
+        lists = {key: set(question.get(key) or []) for key in ANSWER_LISTS}
+        for i, first in enumerate(ANSWER_LISTS):
+            for second in ANSWER_LISTS[i + 1:]:
+                overlap = lists[first] & lists[second]
+                if overlap:
+                    issues.append(_issue(
+                        rel_path, "overlapping-answers",
+                        f"{', '.join(sorted(overlap))} listed in both {first} and {second}", question_id
+                    ))
+
+        condition = question.get('property_show_condition')
+        if condition is None or condition in schema.always_conditions:
+            continue
+
+        rule = schema.keyword_conditions.get(condition)
+        reference = schema.reference_condition.match(condition)
+        if rule:
+            resolved = any(triggering_values(rule, text, question_type, answers)
+                           for text, question_type, answers in index)
+        elif reference:
+            target = unique_ids.get(reference.group(1))
+            if target is None:
+                issues.append(_issue(rel_path, "unresolved-condition",
+                                     f"Show condition '{condition}' refers to {reference.group(1)}, "
+                                     f"which is not a question in this form or the shared sections", question_id))
+            elif REFERENCE_ANSWER not in target:
+                issues.append(_issue(rel_path, "unresolved-condition",
+                                     f"Show condition '{condition}' refers to {reference.group(1)}, "
+                                     f"which has no '{REFERENCE_ANSWER}' answer", question_id))
+            continue
+        else:
+            issues.append(_issue(rel_path, "unknown-condition",
+                                 f"Unrecognised show condition '{condition}'", question_id))
+            continue
+
+        if not resolved:
+            issues.append(_issue(rel_path, "unresolved-condition",
+                                 f"Show condition '{condition}' does not match any question", question_id))
+
+    return issues
+
+
+def discover_sources(surveys_path: str) -> List[str]:
+    """Return every survey JSON path under surveys_path, relative to it"""
+    sources = []
+    for category_dir in sorted(os.listdir(surveys_path)):
+        category_path = os.path.join(surveys_path, category_dir)
+        if category_dir.startswith('.') or not os.path.isdir(category_path):
+            continue
+        for filename in sorted(os.listdir(category_path)):
+            if filename.endswith('.json'):
+                sources.append(f"{category_dir}/{filename}")
+    return sources
+
+
+def load_shared_questions(surveys_path: str) -> List[Dict]:
+    """Return the questions of the shared sections every screener is rendered with"""
+    questions = []
+    for rel_path in discover_sources(surveys_path):
+        if rel_path.startswith(f"{SHARED_SECTIONS_DIR}/"):
+            try:
+                _, body = read_survey_file(os.path.join(surveys_path, rel_path))
+            except (OSError, SurveyParseError):
+                continue  # reported as a parse error when the file itself is validated
+            questions.extend(body.get('questions') or [])
+    return questions
+
+
+def load_shared_index(surveys_path: str) -> AnswerIndex:
+    """Build the answer index of the shared sections every screener is rendered with"""
+    return answer_index(load_shared_questions(surveys_path))
+
+
+# Per-process state, set once by _init_worker
+_WORKER: Dict = {}
+
+
+def _init_worker(surveys_path: str, shared_index: AnswerIndex,
+                 shared_unique_ids: Dict[str, FrozenSet[str]]) -> None:
+    _WORKER["surveys_path"] = surveys_path
+    _WORKER["shared_index"] = shared_index
+    _WORKER["shared_unique_ids"] = shared_unique_ids
+
+
+def _validate_source(rel_path: str) -> Tuple[str, List[Dict], int]:
+    """Worker entry point: validate one file and return (path, issues, question count)"""
+    try:
+        _, body = read_survey_file(os.path.join(_WORKER["surveys_path"], rel_path))
+    except SurveyParseError as e:
+        return rel_path, [_issue(rel_path, "parse-error", str(e))], 0
+    except (OSError, UnicodeDecodeError) as e:
+        return rel_path, [_issue(rel_path, "parse-error", f"Cannot read file: {e}")], 0
+
+    is_shared = rel_path.startswith(f"{SHARED_SECTIONS_DIR}/")
+    shared = [] if is_shared else _WORKER["shared_index"]
+    shared_unique_ids = None if is_shared else _WORKER["shared_unique_ids"]
+    try:
+        issues = validate_document(body, rel_path, shared, shared_unique_ids=shared_unique_ids)
+    except ValueError as e:
+        issues = [_issue(rel_path, "unknown-schema", str(e))]
+    questions = body.get('questions')
+    return rel_path, issues, len(questions) if isinstance(questions, list) else 0
+
+
+def validate_catalog(surveys_path: str = os.path.join("..", "surveys"), jobs: Optional[int] = None) -> Dict:
+    """
+    Validate every survey under surveys_path and return the report.
+
+    jobs is the number of worker processes (default: CPU count); small catalogs
+    and jobs=1 are validated in-process.
+    """
+    started = time.perf_counter()
+    sources = discover_sources(surveys_path)
+    shared_questions = load_shared_questions(surveys_path)
+    shared_index = answer_index(shared_questions)
+    shared_unique_ids = unique_id_index(shared_questions)
+    jobs = jobs or os.cpu_count() or 1
+
+    if jobs == 1 or len(sources) < PARALLEL_THRESHOLD:
+        _init_worker(surveys_path, shared_index, shared_unique_ids)
+        results = [_validate_source(rel_path) for rel_path in sources]
+        workers = 1
+    else:
+        workers = min(jobs, len(sources))
+        chunksize = max(1, len(sources) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(surveys_path, shared_index, shared_unique_ids)) as executor:
+            results = list(executor.map(_validate_source, sources, chunksize=chunksize))
+
+    issues = [issue for _, file_issues, _ in results for issue in file_issues]
+    return {
+        "version": REPORT_VERSION,
+        "surveys_path": os.path.abspath(surveys_path),
+        "files": len(results),
+        "questions": sum(count for _, _, count in results),
+        "errors": len(issues),
+        "valid": not issues,
+        "workers": workers,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "issues": issues
+    }
+
+
+def write_report(report: Dict, report_path: str) -> None:
+    """Write a validation report as JSON"""
+    from file_utils import atomic_write
+
+    atomic_write(report_path, json.dumps(report, indent=2).encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate every survey definition in the catalog")
+    parser.add_argument('--surveys', default=os.path.join("..", "surveys"), help='Surveys directory to validate')
+    parser.add_argument('--jobs', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--report', help='Write the JSON report to this path instead of stdout')
+    args = parser.parse_args()
+
+    report = validate_catalog(args.surveys, args.jobs)
+    if args.report:
+        write_report(report, args.report)
+    else:
+        print(json.dumps(report, indent=2))
+    sys.exit(0 if report["valid"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,62 @@ Usage:
 
 import unittest
 import json
+import re
+import os
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from universal_form_generator import UniversalFormGenerator
 from state_selector import StateSelector
 from embed_handler import EmbedHandler
+import form_data_loader
+from form_data_loader import FormDataLoader
+from form_catalog import FormCatalog
+import form_snapshot
+from question_registry import QuestionRegistry, short_question_ids
+from form_data_loader import read_survey_file
+from notion_import import NotionImporter, ExportParseError, iter_export_rows
+from notion_sync import NotionSync, DirectoryExportSource, NotionApiSource
+from survey_validator import validate_catalog, validate_document
+from form_model import Form, Question
+import enhanced_form_generator
+from enhanced_form_generator import EnhancedFormGenerator
+from html_templates import compile_template
+from render_context import RenderContext
+
+REPO_SURVEYS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "surveys")
+
+
+class ScratchSurveysTestCase(unittest.TestCase):
+    """Base for tests that modify survey files: each test gets its own copy of the surveys tree"""
+    # Copy only this subdirectory of surveys/ (e.g. "all-forms"), or the whole tree when None
+    surveys_subdir = None
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.surveys_path = os.path.join(self.tmp_dir, "surveys")
+        source, target = REPO_SURVEYS, self.surveys_path
+        if self.surveys_subdir:
+            source, target = os.path.join(source, self.surveys_subdir), os.path.join(target, self.surveys_subdir)
+        # Leave out generated files (forms, compressed siblings, bundles) and dotfile indexes
+        shutil.copytree(source, target, ignore=shutil.ignore_patterns(".*", "*.html", "*.gz", "*.br", "assets"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def survey_rows(surveys_path):
+    """Flatten a surveys tree back into Notion database rows (form rows followed by their questions)"""
+    rows = []
+    for category_dir in sorted(os.listdir(surveys_path)):
+        for filename in sorted(os.listdir(os.path.join(surveys_path, category_dir))):
+            _, body = read_survey_file(os.path.join(surveys_path, category_dir, filename))
+            questions = body.pop("questions")
+            body.pop("form", None)
+            rows.append(body)
+            rows.extend(questions)
+    return rows
 
 
 class TestUniversalFormGenerator(unittest.TestCase):
@@ -248,6 +301,1313 @@ class TestEmbedHandler(unittest.TestCase):
         self.assertIn("type_3", info["embed_types"])
 
 
+class TestFormDataLoader(ScratchSurveysTestCase):
+    surveys_subdir = "all-forms"
+
+    def setUp(self):
+        super().setUp()
+        self.base_path = os.path.join(self.tmp_dir, "python-forms")
+        os.makedirs(self.base_path)
+        form_data_loader.clear_section_cache()
+
+    def tearDown(self):
+        super().tearDown()
+        form_data_loader.clear_section_cache()
+
+    def test_general_sections_cached_across_loaders(self):
+        """Test shared sections are parsed once per process"""
+        first = FormDataLoader(self.base_path).load_general_sections()
+        second = FormDataLoader(self.base_path).load_general_sections()
+
+        self.assertEqual(first, second)
+        self.assertEqual(set(first), {"Patient Profile", "Medical History", "Verification"})
+        info = form_data_loader.section_cache_info()
+        self.assertEqual(info["misses"], 3)
+        self.assertEqual(info["hits"], 3)
+
+    def test_general_sections_cache_invalidated_on_change(self):
+        """Test a modified section file is re-read"""
+        FormDataLoader(self.base_path).load_general_sections()
+
+        path = os.path.join(self.tmp_dir, "surveys", "all-forms", "verification.json")
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content.replace("Upload government ID", "Upload a government ID"))
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        sections = FormDataLoader(self.base_path).load_general_sections()
+        texts = [q["questionText"] for q in sections["Verification"]]
+        self.assertTrue(any(t.startswith("Upload a government ID") for t in texts))
+        self.assertEqual(form_data_loader.section_cache_info()["misses"], 4)
+
+    def test_cache_hits_cannot_be_mutated_through(self):
+        """Test answer lists handed out on a cache hit are immutable"""
+        first = FormDataLoader(self.base_path).load_general_sections()
+        question = first["Verification"][0]
+        self.assertIsInstance(question["safeAnswers"], tuple)
+        question["questionId"] = "SQXXXX"
+
+        second = FormDataLoader(self.base_path).load_general_sections()
+        self.assertNotEqual(second["Verification"][0]["questionId"], "SQXXXX")
+        self.assertIsInstance(second["Verification"][0]["parentIds"], tuple)
+
+    def test_parse_survey_text_with_metadata_header(self):
+        """Test the header and questions objects are split in one pass"""
+        text = '{\n  "form": {"name": "Verification"},\n{\n  "questions": [{"id": "a-b"}]\n}\n'
+        header, body = form_data_loader.parse_survey_text(text)
+
+        self.assertEqual(header, {"name": "Verification"})
+        self.assertEqual(body["questions"], [{"id": "a-b"}])
+
+    def test_malformed_section_reports_byte_offset(self):
+        """Test parse errors in shared sections are raised, not swallowed"""
+        path = os.path.join(self.tmp_dir, "surveys", "all-forms", "medical-history.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{\n  "form": {"name": "Medical History"},\n{"questions": [1,]}')
+
+        with self.assertRaises(form_data_loader.SurveyParseError) as ctx:
+            FormDataLoader(self.base_path).load_general_sections()
+        self.assertEqual(ctx.exception.byte_offset, 58)
+        self.assertIn("medical-history.json", str(ctx.exception))
+
+    def test_snapshot_served_until_source_changes(self):
+        """Test the compiled snapshot is used while fresh and ignored once stale"""
+        surveys_path = os.path.join(self.tmp_dir, "surveys")
+        stats = form_snapshot.build_snapshot(surveys_path)
+        self.assertEqual(stats["sources"], 3)
+
+        snapshot = form_snapshot.load_snapshot(stats["path"])
+        fresh = snapshot.get_questions("all-forms/verification.json")
+        self.assertEqual(fresh, FormDataLoader(self.base_path, use_snapshot=False)
+                         .load_general_sections()["Verification"])
+
+        path = os.path.join(surveys_path, "all-forms", "verification.json")
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content.replace("Upload government ID", "Upload a government ID"))
+
+        self.assertIsNone(snapshot.get_questions("all-forms/verification.json"))
+        self.assertEqual(snapshot.stale_sources(), ["all-forms/verification.json"])
+        form_data_loader.clear_section_cache()
+        sections = FormDataLoader(self.base_path).load_general_sections()
+        texts = [q["questionText"] for q in sections["Verification"]]
+        self.assertTrue(any(t.startswith("Upload a government ID") for t in texts))
+
+    def test_snapshot_restamps_touched_sources(self):
+        """Test a touched but unchanged source is re-hashed once, then trusted by its new stamp"""
+        surveys_path = os.path.join(self.tmp_dir, "surveys")
+        stats = form_snapshot.build_snapshot(surveys_path)
+        snapshot = form_snapshot.load_snapshot(stats["path"])
+
+        path = os.path.join(surveys_path, "all-forms", "verification.json")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        self.assertIsNotNone(snapshot.get_questions("all-forms/verification.json"))
+        self.assertEqual(snapshot.sources["all-forms/verification.json"]["mtime_ns"], os.stat(path).st_mtime_ns)
+
+    def test_snapshot_payload_is_not_unpickled(self):
+        """Test a snapshot file is read as JSON, so a pickled payload is rejected"""
+        import pickle
+        path = os.path.join(self.tmp_dir, "surveys", form_snapshot.SNAPSHOT_FILENAME)
+        header = form_snapshot._HEADER.pack(form_snapshot.SNAPSHOT_MAGIC, form_snapshot.SNAPSHOT_VERSION,
+                                            form_data_loader.CONVERTER_VERSION)
+        with open(path, 'wb') as f:
+            f.write(header + pickle.dumps({"created_at": 0, "sources": {}, "questions": {}}))
+
+        self.assertIsNone(form_snapshot.load_snapshot(path))
+
+class TestFormCatalog(ScratchSurveysTestCase):
+    def test_catalog_lists_forms(self):
+        """Test the catalog records category, name, consult type and question count"""
+        forms = FormCatalog(self.surveys_path).list_forms()
+        glp1 = next(f for f in forms if f["form_name"] == "GLP1")
+
+        self.assertEqual(glp1["category"], "Weightloss")
+        self.assertEqual(glp1["consult_type"], "async")
+        self.assertEqual(glp1["question_count"], 8)
+        self.assertEqual(len(glp1["sha256"]), 64)
+        self.assertTrue(os.path.exists(os.path.join(self.surveys_path, ".catalog.json")))
+
+    def test_catalog_picks_up_new_category(self):
+        """Test a fresh catalog instance sees forms added after the index was written"""
+        FormCatalog(self.surveys_path).list_forms()
+
+        os.makedirs(os.path.join(self.surveys_path, "hairloss"))
+        with open(os.path.join(self.surveys_path, "hairloss", "Finasteride-screener.json"), 'w') as f:
+            json.dump({"property_consult_type": "sync", "questions": [{"id": "a"}]}, f)
+
+        entry = FormCatalog(self.surveys_path).get_form("Hairloss", "Finasteride")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry["consult_type"], "sync")
+        self.assertEqual(entry["question_count"], 1)
+
+    def test_warm_catalog_is_not_rewritten(self):
+        """Test writing the index (which bumps the surveys/ mtime) does not make the next listing rebuild it"""
+        FormCatalog(self.surveys_path).list_forms()
+        index_path = os.path.join(self.surveys_path, ".catalog.json")
+        before = os.stat(index_path)
+
+        FormCatalog(self.surveys_path).list_forms()
+        after = os.stat(index_path)
+        self.assertEqual((before.st_ino, before.st_mtime_ns), (after.st_ino, after.st_mtime_ns))
+
+class TestQuestionRegistry(unittest.TestCase):
+    def setUp(self):
+        surveys_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "surveys")
+        self.registry = QuestionRegistry.from_surveys(surveys_path)
+
+    def test_lookup_and_subtree(self):
+        """Test forms and questions resolve by full UUID with parent/child links"""
+        form = self.registry.find_form("GLP1")
+        questions = self.registry.form_questions(form["id"])
+
+        self.assertEqual(len(questions), 8)
+        self.assertEqual([q["property_order"] for q in questions], sorted(q["property_order"] for q in questions))
+        first = self.registry.get(questions[0]["id"])
+        self.assertEqual(self.registry.parents_of(first["id"])[0]["name"], "GLP1")
+        self.assertEqual(len(list(self.registry.iter_subtree(form["id"]))), 8)
+
+    def test_short_ids_extend_on_collision(self):
+        """Test truncated SQ IDs are lengthened only where they would collide"""
+        ids = short_question_ids([
+            "27382abf-7eae-804a-8b06-eea950c3a868",
+            "27382abf-7eae-8048-a2de-eea9d0cf319c",
+            "27382abf-7eae-8074-b68a-e0a22c9818f3"
+        ])
+
+        self.assertEqual(ids["27382abf-7eae-804a-8b06-eea950c3a868"], "SQEEA95")
+        self.assertEqual(ids["27382abf-7eae-8048-a2de-eea9d0cf319c"], "SQEEA9D")
+        self.assertEqual(ids["27382abf-7eae-8074-b68a-e0a22c9818f3"], "SQE0A2")
+
+    def test_reserved_short_ids_are_not_reused(self):
+        """Test a question colliding with an already assigned ID is the one extended"""
+        ids = short_question_ids(["27382abf-7eae-8048-a2de-eea9d0cf319c"], reserved={"SQEEA9"})
+
+        self.assertEqual(ids["27382abf-7eae-8048-a2de-eea9d0cf319c"], "SQEEA9D")
+
+    def test_shared_section_ids_stable_across_forms(self):
+        """Test shared-section questions keep their ID whichever assessment they are rendered with"""
+        base_path = os.path.dirname(os.path.abspath(__file__))
+        loader = FormDataLoader(base_path)
+        forms = [loader.generate_complete_form_data(form["category"], form["form_name"])
+                 for form in loader.list_available_forms()]
+        shared_ids = [{q["notionId"]: q["questionId"] for name in form_data_loader.SHARED_SECTIONS
+                       for q in form_data["sections"].get(name, [])} for form_data in forms]
+
+        self.assertGreater(len(forms), 1)
+        for ids in shared_ids[1:]:
+            self.assertEqual(ids, shared_ids[0])
+        # The registry hands out the same IDs the rendered form uses
+        for question in forms[0]["sections"]["Assessment"]:
+            self.assertEqual(self.registry.short_id(question["notionId"]), question["questionId"])
+
+    def test_find_form_follows_renames(self):
+        """Test the name index is updated when a form row is re-added under a new name"""
+        form = dict(self.registry.find_form("GLP1"))
+        form["name"] = "GLP-1"
+        self.registry.add(form)
+
+        self.assertIsNone(self.registry.find_form("GLP1"))
+        self.assertEqual(self.registry.find_form("GLP-1")["id"], form["id"])
+
+    def test_complete_form_has_unique_question_ids(self):
+        """Test question IDs are unique across all sections of a generated form"""
+        base_path = os.path.dirname(os.path.abspath(__file__))
+        form_data = FormDataLoader(base_path).generate_complete_form_data("Weightloss", "GLP1")
+        question_ids = [q["questionId"] for qs in form_data["sections"].values() for q in qs]
+
+        self.assertEqual(len(question_ids), len(set(question_ids)))
+
+class TestNotionImport(ScratchSurveysTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rows = survey_rows(self.surveys_path)
+
+    def test_stream_json_array_across_chunks(self):
+        """Test array exports decode identically with tiny read chunks"""
+        export_path = os.path.join(self.tmp_dir, "export.json")
+        with open(export_path, 'w', encoding='utf-8') as f:
+            json.dump(self.rows, f, indent=2)
+
+        self.assertEqual(list(iter_export_rows(export_path, chunk_size=7)), self.rows)
+
+    def test_export_errors_report_byte_offset(self):
+        """Test decode errors and oversized rows are reported at their byte offset"""
+        export_path = os.path.join(self.tmp_dir, "export.json")
+        with open(export_path, 'w', encoding='utf-8') as f:
+            f.write('[{"name": "Ä"}, {"name": }]')
+        with self.assertRaises(ExportParseError) as ctx:
+            list(iter_export_rows(export_path, chunk_size=4))
+        self.assertEqual(ctx.exception.byte_offset, len('[{"name": "Ä"}, {"name": '.encode('utf-8')))
+
+        with open(export_path, 'w', encoding='utf-8') as f:
+            f.write('[{"a": 1}, {"name": "' + 'x' * 100 + '"}]')
+        with self.assertRaises(ExportParseError) as ctx:
+            list(iter_export_rows(export_path, chunk_size=8, max_row_size=32))
+        self.assertEqual(ctx.exception.byte_offset, len('[{"a": 1}, '))
+
+    def test_reimport_only_rewrites_changed_forms(self):
+        """Test re-importing the same rows is byte-identical and edits touch one file"""
+        importer = NotionImporter(self.surveys_path)
+        result = importer.ingest(self.rows)
+        self.assertEqual(result["written"], [])
+        self.assertEqual(len(result["unchanged"]), 6)
+
+        changed = next(r for r in self.rows if r.get("property_section") == "Verification")
+        changed["property_disqualify_message"] = "Updated message"
+        result = importer.ingest(self.rows)
+        self.assertEqual(result["written"], ["all-forms/verification.json"])
+
+        _, body = read_survey_file(os.path.join(self.surveys_path, "all-forms", "verification.json"))
+        updated = next(q for q in body["questions"] if q["id"] == changed["id"])
+        self.assertEqual(updated["property_disqualify_message"], "Updated message")
+
+    def test_document_path_stays_inside_surveys(self):
+        """Test Notion names with separators or ".." cannot point outside the surveys tree"""
+        importer = NotionImporter(self.surveys_path)
+        rel_path, _ = importer.document_path({"id": "f1", "name": "../../etc/GLP1",
+                                              "property_category": "../weightloss",
+                                              "property_form_type": "screener"})
+
+        self.assertEqual(rel_path, "weightloss/etc-GLP1-screener.json")
+        self.assertEqual(importer.document_path({"id": "f2", "name": "..", "property_form_type": "screener"})[0],
+                         "general/f2-screener.json")
+
+
+class TestNotionSync(ScratchSurveysTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rows = survey_rows(self.surveys_path)
+        for index, row in enumerate(self.rows):
+            row["property_last_updated"] = f"2025-09-01T{index // 60:02d}:{index % 60:02d}:00.000Z"
+        self.export_dir = os.path.join(self.tmp_dir, "exports")
+        os.makedirs(self.export_dir)
+        self._write_export()
+
+    def _write_export(self):
+        with open(os.path.join(self.export_dir, "forms-db.jsonl"), 'w', encoding='utf-8') as f:
+            for row in self.rows:
+                f.write(json.dumps(row) + "\n")
+
+    def test_sync_pulls_only_rows_after_cursor(self):
+        """Test the cursor advances and later syncs merge only changed rows (plus the boundary row)"""
+        sync = NotionSync(DirectoryExportSource(self.export_dir), self.surveys_path)
+        first = sync.sync("forms-db")
+        self.assertEqual(first["rows"], len(self.rows))
+        self.assertEqual(sync.get_cursor("forms-db"), self.rows[-1]["property_last_updated"])
+
+        changed = next(r for r in self.rows if r.get("property_section") == "Assessment")
+        changed["property_disqualify_message"] = "Edited in Notion"
+        changed["property_last_updated"] = "2025-09-02T10:00:00.000Z"
+        self._write_export()
+
+        second = sync.sync("forms-db")
+        self.assertEqual(second["rows"], 2)
+        self.assertEqual(len(second["written"]), 1)
+        self.assertEqual(sync.get_cursor("forms-db"), "2025-09-02T10:00:00.000Z")
+
+        third = sync.sync("forms-db")
+        self.assertEqual(third["rows"], 1)
+        self.assertEqual(third["written"], [])
+
+    def test_rows_sharing_the_cursor_minute_are_synced(self):
+        """Test a row edited in the same minute as the cursor row is still picked up"""
+        sync = NotionSync(DirectoryExportSource(self.export_dir), self.surveys_path)
+        second = [r for r in self.rows if r.get("property_section") == "Assessment"][1]
+        for row in self.rows:
+            row["property_last_updated"] = "2025-09-01T00:00:00.000Z"
+        self._write_export()
+        sync.sync("forms-db")
+
+        # Edited after the sync, but Notion still reports the cursor's minute
+        second["property_disqualify_message"] = "Edited in the same minute"
+        self._write_export()
+        result = sync.sync("forms-db")
+
+        self.assertEqual(len(result["written"]), 1)
+        self.assertEqual(sync.get_cursor("forms-db"), "2025-09-01T00:00:00.000Z")
+        _, body = read_survey_file(os.path.join(self.surveys_path, result["written"][0]))
+        edited = next(q for q in body["questions"] if q["id"] == second["id"])
+        self.assertEqual(edited["property_disqualify_message"], "Edited in the same minute")
+
+    def test_question_before_its_form_in_one_batch(self):
+        """Test a new form is applied before its questions, whatever the row order"""
+        sync = NotionSync(DirectoryExportSource(self.export_dir), self.surveys_path)
+        sync.sync("forms-db")
+
+        question = {"id": "new-q-0001", "name": "Any side effects?", "property_order": 1,
+                    "property_parent_item": ["new-form-0001"],
+                    "property_last_updated": "2025-09-03T00:00:00.000Z"}
+        form = {"id": "new-form-0001", "name": "Tesamorelin", "property_form_type": "screener",
+                "property_category": "Hormone", "property_last_updated": "2025-09-03T00:00:00.000Z"}
+        self.rows.extend([question, form])
+        self._write_export()
+        result = sync.sync("forms-db")
+
+        self.assertEqual(result["unplaced"], [])
+        _, body = read_survey_file(os.path.join(self.surveys_path, "hormone", "Tesamorelin-screener.json"))
+        self.assertEqual([q["id"] for q in body["questions"]], ["new-q-0001"])
+        self.assertEqual(body["property_sub_item"], ["new-q-0001"])
+
+    def test_parentless_section_row_is_merged(self):
+        """Test a shared-section row without a parent link lands in its section's form"""
+        sync = NotionSync(DirectoryExportSource(self.export_dir), self.surveys_path)
+        sync.sync("forms-db")
+
+        section_row = {"id": "new-q-0002", "name": "Do you have a photo ID?", "property_order": 99,
+                       "property_section": "Verification", "property_last_updated": "2025-09-03T00:00:00.000Z"}
+        self.rows.append(section_row)
+        self._write_export()
+        result = sync.sync("forms-db")
+
+        self.assertEqual(result["written"], ["all-forms/verification.json"])
+        _, body = read_survey_file(os.path.join(self.surveys_path, "all-forms", "verification.json"))
+        self.assertEqual(body["questions"][-1]["id"], "new-q-0002")
+
+    def test_cursor_held_at_unplaced_row(self):
+        """Test a row whose form is unknown is retried instead of skipped by the cursor"""
+        sync = NotionSync(DirectoryExportSource(self.export_dir), self.surveys_path)
+        sync.sync("forms-db")
+
+        orphan = {"id": "new-q-0003", "name": "Orphan", "property_parent_item": ["missing-form"],
+                  "property_last_updated": "2025-09-03T00:00:00.000Z"}
+        later = dict(next(r for r in self.rows if r.get("property_section") == "Assessment"),
+                     property_disqualify_message="Edited later",
+                     property_last_updated="2025-09-04T00:00:00.000Z")
+        self.rows = [r for r in self.rows if r["id"] != later["id"]] + [orphan, later]
+        self._write_export()
+        result = sync.sync("forms-db")
+
+        self.assertEqual([r["id"] for r in result["unplaced"]], ["new-q-0003"])
+        self.assertEqual(len(result["written"]), 1)
+        self.assertEqual(sync.get_cursor("forms-db"), "2025-09-03T00:00:00.000Z")
+
+    def test_rows_without_timestamp_are_synced(self):
+        """Test rows missing property_last_updated are not dropped once a cursor exists"""
+        sync = NotionSync(DirectoryExportSource(self.export_dir), self.surveys_path)
+        sync.sync("forms-db")
+
+        changed = next(r for r in self.rows if r.get("property_section") == "Assessment")
+        changed["property_disqualify_message"] = "No timestamp"
+        del changed["property_last_updated"]
+        self._write_export()
+
+        self.assertEqual(len(sync.sync("forms-db")["written"]), 1)
+
+    def test_api_source_against_local_stand_in(self):
+        """Test the API source paginates and sends the cursor filter"""
+        requests_seen = []
+
+        class StandIn(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                requests_seen.append(body)
+                page = {
+                    "id": "page-2" if body.get("start_cursor") else "page-1",
+                    "last_edited_time": "2025-09-03T00:00:00.000Z",
+                    "properties": {
+                        "Name": {"type": "title", "title": [{"plain_text": "Question"}]},
+                        "Parent item": {"type": "relation", "relation": [{"id": "form-1"}]},
+                        "Safe Answers": {"type": "multi_select", "multi_select": [{"name": "no"}]}
+                    }
+                }
+                result = {"results": [page], "has_more": not body.get("start_cursor"), "next_cursor": "c2"}
+                data = json.dumps(result).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(("127.0.0.1", 0), StandIn)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            source = NotionApiSource("token", f"http://127.0.0.1:{server.server_port}")
+            rows = list(source.iter_changed_rows("db", "2025-09-01T00:00:00.000Z"))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual([r["id"] for r in rows], ["page-1", "page-2"])
+        self.assertEqual(rows[0]["property_parent_item"], ["form-1"])
+        self.assertEqual(rows[0]["property_safe_answers"], ["no"])
+        self.assertEqual(requests_seen[0]["filter"]["last_edited_time"]["on_or_after"], "2025-09-01T00:00:00.000Z")
+        self.assertEqual(requests_seen[1]["start_cursor"], "c2")
+
+class TestSurveyValidator(unittest.TestCase):
+    def setUp(self):
+        self.surveys_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "surveys")
+        _, self.screener = read_survey_file(os.path.join(self.surveys_path, "hormone", "Sermorelin-screener.json"))
+
+    def test_catalog_report(self):
+        """Test the curated catalog only fails on its if_SQ-N_yes references and the report is machine-readable"""
+        report = validate_catalog(self.surveys_path, jobs=1)
+        # The exports carry no Notion unique IDs, so these conditions cannot be resolved
+        dangling = sorted(issue["message"].split("'")[1] for issue in report["issues"]
+                          if issue["code"] == "unresolved-condition")
+        self.assertEqual(dangling, ["if_SQ-57_yes", "if_SQ-59_yes", "if_SQ-63_yes", "if_SQ-67_yes", "if_SQ-68_yes"])
+        self.assertEqual(report["errors"], 5)
+        self.assertEqual(report["files"], 6)
+        json.dumps(report)
+
+    def test_detects_broken_questions(self):
+        """Test unknown types, overlapping answers and dangling conditions are reported"""
+        questions = self.screener["questions"]
+        questions[0]["property_question_type"] = "slider"
+        questions[2]["property_flag_answers"] = ["no"]
+        questions[0]["property_show_condition"] = "if_SQ-99_yes"
+        questions[4]["property_show_condition"] = "when_moon_full"
+
+        codes = sorted(issue["code"] for issue in validate_document(self.screener, "hormone/x.json"))
+        # questions[0] plus the three existing if_SQ-N_yes references without unique IDs
+        self.assertEqual(codes, ["overlapping-answers", "unknown-condition", "unknown-question-type"]
+                         + ["unresolved-condition"] * 4)
+
+    def test_reference_conditions_resolve_by_unique_id(self):
+        """Test if_SQ-N_yes resolves only to question SQ-N, and only when it accepts yes"""
+        questions = self.screener["questions"]
+        yes_no = next(q for q in questions if "yes" in (q.get("property_safe_answers") or [])
+                      + (q.get("property_flag_answers") or []) + (q.get("property_disqualify_answers") or []))
+        other = next(q for q in questions if q is not yes_no and q.get("property_question_type") == "text")
+        for question in questions:
+            question.pop("property_show_condition", None)
+        yes_no["property_unique_id"] = 57
+        other["property_unique_id"] = "SQ-58"
+        questions[-1]["property_show_condition"] = "if_SQ-57_yes"
+        self.assertEqual(validate_document(self.screener, "hormone/x.json"), [])
+
+        questions[-1]["property_show_condition"] = "if_SQ-58_yes"
+        issues = validate_document(self.screener, "hormone/x.json")
+        self.assertEqual([i["code"] for i in issues], ["unresolved-condition"])
+        self.assertIn("no 'yes' answer", issues[0]["message"])
+
+        questions[-1]["property_show_condition"] = "if_SQ-99_yes"
+        self.assertIn("not a question", validate_document(self.screener, "hormone/x.json")[0]["message"])
+
+class TestFormModel(unittest.TestCase):
+    def setUp(self):
+        self.form_data = FormDataLoader().generate_complete_form_data("Weightloss", "GLP1")
+        self.form = Form.from_form_data(self.form_data)
+
+    def test_question_compiles_answer_types(self):
+        """Test options are de-duplicated, sorted and typed once at compile time"""
+        question = Question.from_dict({
+            "questionId": "SQ1", "questionText": "Alcohol?", "questionType": "radio",
+            "safeAnswers": ["none_of_the_above", "0-2_weekly"], "flagAnswers": ["1-2_daily"],
+            "disqualifyAnswers": ["2+_daily", "0-2_weekly"]
+        })
+        self.assertEqual([o.value for o in question.options],
+                         ["0-2_weekly", "1-2_daily", "2+_daily", "none_of_the_above"])
+        self.assertEqual(question.answer_type("0-2_weekly"), "disqualify")
+        self.assertEqual(question.answer_type("1-2_daily"), "flag")
+        self.assertEqual(question.answer_type("unknown"), "safe")
+        with self.assertRaises(AttributeError):
+            question.text = "changed"
+
+    def test_generators_render_model_and_dicts_identically(self):
+        """Test the compiled model renders exactly like the loader dicts"""
+        self.assertEqual([s.title for s in self.form.sections], list(self.form_data["sections"]))
+        self.assertEqual(EnhancedFormGenerator().generate_notion_form(self.form),
+                         EnhancedFormGenerator().generate_notion_form(self.form_data))
+
+        html = UniversalFormGenerator().generate_form(self.form)
+        self.assertIn('data-form-type="multi-step"', html)
+        self.assertIn('data-answer-type="disqualify"', html)
+
+    def test_answer_vocabulary_shares_repeated_values(self):
+        """Test identical answer lists and values are one object across forms"""
+        sermorelin = FormDataLoader(use_snapshot=False).load_form("hormone", "Sermorelin")
+        glp1_no = next(q for q in self.form.iter_questions() if q.safe_answers == ("no",))
+        sermorelin_no = next(q for q in sermorelin.iter_questions() if q.safe_answers == ("no",))
+        self.assertIs(glp1_no.safe_answers, sermorelin_no.safe_answers)
+        self.assertIs(glp1_no.safe_answers[0], sermorelin_no.safe_answers[0])
+
+        stats = form_data_loader.vocabulary_info()
+        self.assertGreater(stats["hits"], 0)
+        self.assertGreater(stats["profile_hits"], 0)
+        self.assertLess(stats["answer_profiles"], sum(1 for _ in self.form.iter_questions()))
+
+    def test_loader_dicts_hold_shared_answer_tuples(self):
+        """Test the loader stores the vocabulary's tuple itself rather than a copy"""
+        from answer_vocabulary import VOCABULARY
+
+        question = next(q for qs in self.form_data["sections"].values() for q in qs if q["safeAnswers"] == ("no",))
+        self.assertIs(question["safeAnswers"], VOCABULARY.answer_tuple(["no"]))
+
+    def test_answer_vocabulary_is_bounded(self):
+        """Test a full vocabulary stops growing but still returns correct values"""
+        from answer_vocabulary import AnswerVocabulary
+
+        vocab = AnswerVocabulary(max_entries=2)
+        for value in ("a", "b", "c", "d"):
+            self.assertEqual(vocab.intern(value), value)
+        self.assertEqual(vocab.answer_tuple(["x", "y"]), ("x", "y"))
+        self.assertEqual(len(vocab), 2)
+        self.assertEqual(vocab.stats()["overflow"], 4)
+
+class TestAssetCache(unittest.TestCase):
+    def setUp(self):
+        enhanced_form_generator.clear_asset_cache()
+
+    def tearDown(self):
+        enhanced_form_generator.clear_asset_cache()
+
+    def test_script_block_cached_per_form_parameters(self):
+        """Test repeated renders reuse the script block and different forms do not share it"""
+        generator = EnhancedFormGenerator()
+        first = generator.generate_form_javascript("weightloss", "async", "GLP1", 4)
+        again = EnhancedFormGenerator().generate_form_javascript("weightloss", "async", "GLP1", 4)
+        other = generator.generate_form_javascript("weightloss", "sync", "GLP1", 4)
+
+        self.assertIs(first, again)
+        self.assertIn("'sync'", other)
+        info = enhanced_form_generator.asset_cache_info()["scripts"]
+        self.assertEqual((info["hits"], info["misses"]), (1, 2))
+
+        generator.sync_only_states = ['AR']
+        self.assertNotEqual(generator.generate_form_javascript("weightloss", "async", "GLP1", 4), first)
+
+    def test_script_cache_is_bounded(self):
+        """Test the least recently used block is evicted past the limit"""
+        generator = EnhancedFormGenerator()
+        for index in range(enhanced_form_generator.ASSET_CACHE_SIZE + 1):
+            generator.generate_form_javascript("weightloss", "async", f"Form{index}", 4)
+
+        info = enhanced_form_generator.asset_cache_info()["scripts"]
+        self.assertEqual(info["entries"], enhanced_form_generator.ASSET_CACHE_SIZE)
+        self.assertEqual(info["evictions"], 1)
+
+    def test_block_cache_shared_between_threads(self):
+        """Test concurrent lookups keep the LRU consistent and every thread gets the same block"""
+        cache = enhanced_form_generator._BlockCache(4)
+        results = []
+
+        def worker():
+            for index in range(200):
+                results.append(cache.get_or_build((index % 6,), lambda i=index % 6: f"block-{i}"))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        info = cache.info()
+        self.assertEqual(len(results), 1600)
+        self.assertEqual(set(results), {f"block-{i}" for i in range(6)})
+        self.assertEqual(info["hits"] + info["misses"], 1600)
+        self.assertEqual(info["entries"], 4)
+
+    def test_shared_sections_rendered_once(self):
+        """Test shared sections are spliced from the fragment cache into the next form"""
+        enhanced_form_generator.clear_fragment_cache()
+        loader = FormDataLoader()
+        glp1 = EnhancedFormGenerator().generate_notion_form(loader.load_form("Weightloss", "GLP1"))
+        sermorelin = EnhancedFormGenerator().generate_notion_form(loader.load_form("Hormone", "Sermorelin"))
+
+        info = enhanced_form_generator.fragment_cache_info()
+        self.assertEqual((info["hits"], info["misses"]), (3, 5))
+
+        enhanced_form_generator.clear_fragment_cache()
+        self.assertEqual(EnhancedFormGenerator().generate_notion_form(loader.load_form("Hormone", "Sermorelin")),
+                         sermorelin)
+        self.assertNotEqual(glp1, sermorelin)
+
+    def test_questions_without_ids_bypass_fragment_cache(self):
+        """Test sections numbered from the generator's counter are not cached"""
+        enhanced_form_generator.clear_fragment_cache()
+        section = enhanced_form_generator.FormSection(
+            title="Patient Profile", questions=[{"questionText": "Name", "questionType": "text"}],
+            order=1, is_standard=True
+        )
+        first = EnhancedFormGenerator().generate_all_sections([section])
+
+        self.assertIn('data-question-id="q_1"', first)
+        self.assertEqual(enhanced_form_generator.fragment_cache_info()["entries"], 0)
+
+
+class TestHtmlTemplates(unittest.TestCase):
+    def test_render_into_shared_buffer(self):
+        """Test templates append pieces to one buffer and keep escaped braces"""
+        option = compile_template('<option value="{value}">{label}</option>{{x}}')
+        out = []
+        for value in ("a", "b"):
+            option.render_to(out, value=value, label=value.upper())
+
+        self.assertEqual(''.join(out), '<option value="a">A</option>{x}<option value="b">B</option>{x}')
+        self.assertEqual(option.fields, {"value", "label"})
+        self.assertIs(compile_template('<option value="{value}">{label}</option>{{x}}'), option)
+
+    def test_rejects_expressions(self):
+        """Test fields must be plain names without format specs"""
+        with self.assertRaises(ValueError):
+            compile_template('{count:>4}')
+        with self.assertRaises(ValueError):
+            compile_template("{metadata['title']}")
+
+    def test_state_lists_render_from_option_template(self):
+        """Test the state dropdown and state selector render every option into one buffer"""
+        generator = EnhancedFormGenerator()
+        out = []
+        generator.write_dropdown_input(out, {"questionText": "Your state", "questionType": "dropdown"}, "SQ1")
+        dropdown = ''.join(out)
+
+        self.assertEqual(dropdown.count('<option'), 52)
+        self.assertIn('<option value="DC">District of Columbia</option>', dropdown)
+        selector = generator.generate_state_selector()
+        self.assertEqual(selector.count('<option'), 51)
+        self.assertNotIn('value="DC"', selector)
+
+class TestStreamingRender(unittest.TestCase):
+    def test_iter_notion_form_matches_full_render(self):
+        """Test the streamed chunks join to the full document, one chunk per section"""
+        form = FormDataLoader().load_form("Weightloss", "GLP1")
+        chunks = list(EnhancedFormGenerator().iter_notion_form(form))
+
+        self.assertEqual(''.join(chunks), EnhancedFormGenerator().generate_notion_form(form))
+        self.assertEqual(len(chunks), len(form.sections) + 2)
+        self.assertIn('<style>', chunks[0])
+        self.assertIn('id="section-1"', chunks[1])
+        self.assertIn('<script>', chunks[-1])
+
+    def test_stream_form_route(self):
+        """Test the Flask route streams the universal form"""
+        from flask_app import app
+
+        form_data = {"title": "Streamed", "questions": [{"text": "Name", "type": "text"}]}
+        response = app.test_client().post('/api/stream-form', json={"form_data": form_data})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.get_data(as_text=True),
+                         UniversalFormGenerator().generate_form(form_data, 'form-container', {}))
+
+    def test_streamed_minify_matches_full_render(self):
+        """Test per-chunk minification gives the same bytes and sizes as minifying the whole form"""
+        form = FormDataLoader().load_form("Weightloss", "GLP1")
+        generator = EnhancedFormGenerator()
+        context = RenderContext()
+        streamed = ''.join(generator.iter_notion_form(form, {"minify": True}, context))
+
+        self.assertEqual(streamed, generator.generate_notion_form(form, {"minify": True}))
+        self.assertEqual(context.size_report.total_after, len(streamed.encode('utf-8')))
+
+    def test_streaming_rejects_budget(self):
+        """Test a byte budget is refused before anything is streamed"""
+        from flask_app import app
+
+        form = FormDataLoader().load_form("Weightloss", "GLP1")
+        with self.assertRaises(ValueError):
+            EnhancedFormGenerator().iter_notion_form(form, {"max_bytes": 60_000})
+
+        form_data = {"title": "Streamed", "questions": [{"text": "Name", "type": "text"}]}
+        response = app.test_client().post('/api/stream-form',
+                                          json={"form_data": form_data, "options": {"maxBytes": 1000}})
+        self.assertEqual(response.status_code, 400)
+        response = app.test_client().post('/api/stream-form',
+                                          json={"form_data": form_data, "options": {"minify": True}})
+        self.assertEqual(response.get_data(as_text=True),
+                         UniversalFormGenerator().generate_form(form_data, 'form-container', {"minify": True}))
+
+class TestExternalAssets(unittest.TestCase):
+    def setUp(self):
+        self.asset_dir = tempfile.mkdtemp()
+        self.form = FormDataLoader().load_form("Weightloss", "GLP1")
+
+    def tearDown(self):
+        shutil.rmtree(self.asset_dir, ignore_errors=True)
+
+    def test_forms_link_shared_hashed_assets(self):
+        """Test external mode writes hashed bundles once and links them from each form"""
+        from form_assets import load_manifest
+
+        options = {"asset_dir": self.asset_dir, "asset_url": "../assets/"}
+        html = EnhancedFormGenerator().generate_notion_form(self.form, options)
+        other = EnhancedFormGenerator().generate_notion_form(
+            FormDataLoader().load_form("Hormone", "Sermorelin"), options)
+
+        manifest = load_manifest(self.asset_dir)
+        css = manifest["assets"]["form.css"]["file"]
+        js = manifest["assets"]["form.js"]["file"]
+        written = [name for name in os.listdir(self.asset_dir) if not name.endswith(('.gz', '.br', '.sha256'))]
+        self.assertEqual(sorted(written), sorted([css, js, "manifest.json"]))
+        self.assertTrue(os.path.exists(os.path.join(self.asset_dir, js + ".gz")))
+        self.assertRegex(css, r'^form-[0-9a-f]{12}\.css$')
+
+        for page in (html, other):
+            self.assertIn(f'href="../assets/{css}"', page)
+            self.assertIn(f'<script src="../assets/{js}"></script>', page)
+            self.assertNotIn('<style>', page)
+        self.assertIn('"formName": "GLP1"', html)
+        self.assertIn('"formName": "Sermorelin"', other)
+
+        with open(os.path.join(self.asset_dir, js), encoding='utf-8') as f:
+            runtime = f.read()
+        self.assertIn('FORM_CONFIG.totalSections', runtime)
+        self.assertNotIn('medicalForm_GLP1', runtime)
+
+    def test_minified_assets_count_in_size_report(self):
+        """Test --minify also minifies the published bundles and the report counts their bytes"""
+        from form_assets import load_manifest
+        from form_minifier import FormBudgetError
+
+        context = RenderContext()
+        options = {"asset_dir": self.asset_dir, "minify": True}
+        EnhancedFormGenerator().generate_notion_form(self.form, options, context)
+
+        js = load_manifest(self.asset_dir)["assets"]["form.js"]
+        with open(os.path.join(self.asset_dir, js["file"]), encoding='utf-8') as f:
+            runtime = f.read()
+        self.assertNotIn('\n    ', runtime)
+        before, after = context.size_report.components["js file"]
+        self.assertEqual(after, js["bytes"])
+        self.assertLess(after, before)
+        self.assertIn("css file", context.size_report.components)
+
+        with self.assertRaises(FormBudgetError):
+            EnhancedFormGenerator().generate_notion_form(self.form, dict(options, max_bytes=after))
+
+    def test_inline_mode_unchanged(self):
+        """Test the default mode still embeds the styles and script"""
+        html = EnhancedFormGenerator().generate_notion_form(self.form)
+
+        self.assertIn('<style>', html)
+        self.assertIn("const storageKey = 'medicalForm_GLP1_Weightloss';", html)
+        self.assertEqual(os.listdir(self.asset_dir), [])
+
+class TestMinifier(unittest.TestCase):
+    def test_minify_css_and_js(self):
+        """Test comments and whitespace are removed without touching strings or regexes"""
+        from form_minifier import minify_css, minify_js
+
+        css = "/* layout */\n.a > .b ,  .c:hover {\n    color: red;\n    content: \"  x  \";\n}\n"
+        self.assertEqual(minify_css(css), '.a>.b,.c:hover{color:red;content:"  x  "}')
+
+        js = """
+            // counter
+            let total = a + +b;  /* unary plus */
+            const text = 'keep  //  this';
+            value = input.replace(/\\D/g, '')
+            return `${ total }  items`
+        """
+        self.assertEqual(minify_js(js),
+                         "let total=a+ +b;const text='keep  //  this';value=input.replace(/\\D/g,'')\n"
+                         "return`${total}  items`")
+
+    def test_division_after_increment_is_not_a_regex(self):
+        """Test "/" after a postfix ++/-- is minified as division, after a lone + as a regex"""
+        from form_minifier import minify_js
+        self.assertEqual(minify_js("x = i++ / 2 / k;\ny = a + /b c/.test(s);"), "x=i++/2/k;y=a+/b c/.test(s);")
+
+    def test_minify_html_keeps_pre_and_reports_components(self):
+        """Test markup collapsing skips <pre>/<textarea> and the report covers every byte"""
+        from form_minifier import minify_html
+
+        html = ("<div>\n    <!-- note -->\n    <p>Hello   world</p>\n</div>\n"
+                "<pre>  a\n    b</pre><textarea>  x  </textarea>\n"
+                "<style> p { color: red; } </style><script> let  x = 1; </script>")
+        minified, report = minify_html(html)
+
+        self.assertIn("<p>Hello world</p>", minified)
+        self.assertNotIn("note", minified)
+        self.assertIn("<pre>  a\n    b</pre><textarea>  x  </textarea>", minified)
+        self.assertIn("<style>p{color:red}</style><script>let x=1;</script>", minified)
+        self.assertEqual(report.total_before, len(html))
+        self.assertEqual(report.total_after, len(minified))
+        self.assertEqual(set(report.components), {"markup", "css", "js"})
+
+    def test_generator_budget(self):
+        """Test the generator minifies on request and fails a form over its budget"""
+        from form_minifier import FormBudgetError
+
+        form = FormDataLoader().load_form("Weightloss", "GLP1")
+        generator = EnhancedFormGenerator()
+        full = generator.generate_notion_form(form)
+        context = RenderContext()
+        minified = generator.generate_notion_form(form, {"minify": True}, context)
+
+        self.assertLess(len(minified), len(full) * 0.7)
+        self.assertEqual(context.size_report.total_before, len(full.encode('utf-8')))
+        self.assertIn('id="section-4"', minified)
+
+        with self.assertRaises(FormBudgetError) as raised:
+            generator.generate_notion_form(form, {"minify": True, "max_bytes": 10_000})
+        self.assertEqual(raised.exception.report.total_after, len(minified.encode('utf-8')))
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "weightloss", "GLP1-screener-live.html")
+        self.html = ("<html>" + "<p>screening question</p>" * 200 + "</html>").encode('utf-8')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_siblings_written_once(self):
+        """Test .gz siblings are written with the file and skipped while its hash is unchanged"""
+        import gzip
+        from precompress import brotli, write_with_siblings
+
+        status = write_with_siblings(self.path, self.html)
+        self.assertEqual(status["file"], "written")
+        self.assertEqual(status["gzip"], "written")
+        self.assertEqual(status["br"], "written" if brotli else "unavailable")
+        with open(self.path + ".gz", 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), self.html)
+
+        status = write_with_siblings(self.path, self.html)
+        self.assertEqual(status["file"], "unchanged")
+        self.assertEqual(status["gzip"], "unchanged")
+
+        status = write_with_siblings(self.path, self.html + b"<!-- v2 -->")
+        self.assertEqual(status["gzip"], "written")
+
+    def test_freshness_follows_content_not_mtime(self):
+        """Test a sibling is stale once the file's content changes, even if the file looks older"""
+        from precompress import is_fresh, write_with_siblings
+
+        write_with_siblings(self.path, self.html)
+        os.utime(self.path, ns=(0, 0))
+        self.assertTrue(is_fresh(self.path, ".gz"))
+
+        with open(self.path, 'wb') as f:
+            f.write(self.html + b"<!-- restored from elsewhere -->")
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(is_fresh(self.path, ".gz"))
+
+        # Writing the original bytes back makes the existing sibling valid again
+        status = write_with_siblings(self.path, self.html)
+        self.assertEqual((status["file"], status["gzip"]), ("written", "unchanged"))
+        self.assertTrue(is_fresh(self.path, ".gz"))
+
+    def test_atomic_write_concurrent_writers(self):
+        """Test threads writing the same file each use their own temp file and leave none behind"""
+        from file_utils import atomic_write
+
+        payloads = [self.html + str(i).encode('utf-8') for i in range(8)]
+        threads = [threading.Thread(target=atomic_write, args=(self.path, data)) for data in payloads]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open(self.path, 'rb') as f:
+            self.assertIn(f.read(), payloads)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["GLP1-screener-live.html"])
+
+    def test_flask_serves_by_accept_encoding(self):
+        """Test /forms/ returns the gzip sibling only to clients that accept it"""
+        import gzip
+        import flask_app
+        from precompress import write_with_siblings
+
+        write_with_siblings(self.path, self.html)
+        original_dir = flask_app.SURVEYS_DIR
+        flask_app.SURVEYS_DIR = self.temp_dir
+        try:
+            client = flask_app.app.test_client()
+            compressed = client.get('/forms/weightloss/GLP1-screener-live.html',
+                                    headers={'Accept-Encoding': 'gzip'})
+            plain = client.get('/forms/weightloss/GLP1-screener-live.html')
+            missing = client.get('/forms/weightloss/Other-screener-live.html')
+            other_type = client.get('/forms/weightloss/GLP1-screener.json')
+        finally:
+            flask_app.SURVEYS_DIR = original_dir
+
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed.mimetype, 'text/html')
+        self.assertEqual(gzip.decompress(compressed.data), self.html)
+        self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(plain.data, self.html)
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(other_type.status_code, 404)
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.surveys = tempfile.mkdtemp()
+        for rel_path, body in [("all-forms/patient-profile.json", '{"questions": []}'),
+                               ("weightloss/GLP1-screener.json", '{"name": "GLP1"}'),
+                               ("weightloss/GLP1-screener-live.html", "<html></html>")]:
+            os.makedirs(os.path.join(self.surveys, os.path.dirname(rel_path)), exist_ok=True)
+            with open(os.path.join(self.surveys, rel_path), 'w') as f:
+                f.write(body)
+        self.source = os.path.join(self.surveys, "weightloss/GLP1-screener.json")
+        self.output = os.path.join(self.surveys, "weightloss/GLP1-screener-live.html")
+
+    def tearDown(self):
+        shutil.rmtree(self.surveys, ignore_errors=True)
+
+    def _record(self, options=None):
+        from build_manifest import BuildManifest
+
+        manifest = BuildManifest(self.surveys)
+        manifest.record(self.source, self.output, options)
+        manifest.save()
+
+    def _is_current(self, options=None):
+        from build_manifest import BuildManifest
+
+        return BuildManifest(self.surveys).is_current(self.source, options)
+
+    def test_unchanged_inputs_are_current(self):
+        """Test a recorded output stays current across runs until an input changes"""
+        self.assertFalse(self._is_current())
+        self._record({"minify": True})
+
+        self.assertTrue(self._is_current({"minify": True}))
+        self.assertFalse(self._is_current({"minify": False}))
+
+    def test_shared_section_edit_invalidates(self):
+        """Test editing a shared section (not just touching it) makes the form stale"""
+        self._record()
+        shared = os.path.join(self.surveys, "all-forms/patient-profile.json")
+        os.utime(shared, ns=(0, 0))
+        self.assertTrue(self._is_current())
+
+        with open(shared, 'w') as f:
+            f.write('{"questions": [{"id": "q1"}]}')
+        self.assertFalse(self._is_current())
+
+    def test_new_shared_section_or_modified_output_invalidates(self):
+        """Test new shared files and hand-edited or deleted outputs trigger a rebuild"""
+        self._record()
+        with open(self.output, 'a') as f:
+            f.write("<!-- edited -->")
+        self.assertFalse(self._is_current())
+
+        self._record()
+        with open(os.path.join(self.surveys, "all-forms/verification.json"), 'w') as f:
+            f.write('{"questions": []}')
+        self.assertFalse(self._is_current())
+
+        self._record()
+        os.remove(self.output)
+        self.assertFalse(self._is_current())
+
+    def test_siblings_and_asset_bundles_are_outputs(self):
+        """Test a missing or modified sibling, bundle or asset manifest triggers a rebuild"""
+        from build_manifest import BuildManifest
+        from precompress import write_with_siblings
+
+        asset_dir = os.path.join(self.surveys, "assets")
+        bundle = [os.path.join(asset_dir, name) for name in ("form-abc.css", "form-abc.js")]
+        for path in [self.output, *bundle]:
+            write_with_siblings(path, b"body { color: red }" * 50)
+        asset_manifest = os.path.join(asset_dir, "manifest.json")
+        with open(asset_manifest, 'w') as f:
+            f.write('{"version": 1}')
+
+        def record():
+            manifest = BuildManifest(self.surveys)
+            manifest.record(self.source, self.output, extra_outputs=[*bundle, asset_manifest])
+            manifest.save()
+
+        record()
+        self.assertTrue(self._is_current())
+        for victim in (self.output + ".gz", bundle[0], bundle[1] + ".gz", asset_manifest):
+            with open(victim, 'rb') as f:
+                content = f.read()
+            os.remove(victim)
+            self.assertFalse(self._is_current(), victim)
+            with open(victim, 'wb') as f:
+                f.write(content)
+            record()
+            self.assertTrue(self._is_current())
+
+class TestParallelBatch(ScratchSurveysTestCase):
+    def setUp(self):
+        # generate_form works on ../surveys, so run it from a scratch copy of the tree
+        super().setUp()
+        os.mkdir(os.path.join(self.tmp_dir, "python-forms"))
+        self.cwd = os.getcwd()
+        os.chdir(os.path.join(self.tmp_dir, "python-forms"))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        super().tearDown()
+
+    def _outputs(self):
+        outputs = {}
+        for category in sorted(os.listdir("../surveys")):
+            if not os.path.isdir(os.path.join("../surveys", category)):
+                continue
+            for name in sorted(os.listdir(os.path.join("../surveys", category))):
+                if name.endswith("-live.html"):
+                    with open(os.path.join("../surveys", category, name), 'rb') as f:
+                        outputs[f"{category}/{name}"] = f.read()
+        return outputs
+
+    def test_parallel_matches_serial(self):
+        """Test --jobs output is byte-identical to a serial build and is recorded in the manifest"""
+        import io
+        from contextlib import redirect_stdout
+        from generate_form import batch_generate_all
+
+        log = io.StringIO()
+        with redirect_stdout(log):
+            self.assertTrue(batch_generate_all(jobs=2))
+        parallel = self._outputs()
+        self.assertEqual(len(parallel), 3)
+        self.assertIn("Per-form timings", log.getvalue())
+        self.assertIn("(2 workers)", log.getvalue())
+
+        with redirect_stdout(io.StringIO()) as log:
+            self.assertTrue(batch_generate_all(jobs=2))
+        self.assertIn("Up to date (skipped): 3 forms", log.getvalue())
+
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(batch_generate_all(force=True))
+        self.assertEqual(self._outputs(), parallel)
+
+class TestRenderContext(unittest.TestCase):
+    def setUp(self):
+        self.form_data = {
+            'title': 'Intake',
+            'questions': [
+                {'text': 'Full name', 'type': 'text'},
+                {'text': 'Email address', 'type': 'email'},
+                {'text': 'Any allergies?', 'type': 'radio', 'options': ['Yes', 'No']}
+            ]
+        }
+
+    def test_question_ids_are_per_render(self):
+        """Test generated question IDs restart for every render of a shared generator"""
+        generator = UniversalFormGenerator()
+        first = generator.generate_form(self.form_data)
+        second = generator.generate_form(self.form_data)
+
+        self.assertEqual(first, second)
+        self.assertIn('id="q_full_name_1"', first)
+        self.assertIn('id="q_any_allergies_3"', first)
+
+        context = RenderContext()
+        generator.generate_form(self.form_data, options={}, context=context)
+        self.assertEqual(context.question_counter, 3)
+        self.assertEqual(context.form_config.metadata['title'], 'Intake')
+
+    def test_concurrent_renders(self):
+        """Test one generator instance renders identical HTML from many threads at once"""
+        generator = UniversalFormGenerator()
+        expected = generator.generate_form(self.form_data)
+        form = FormDataLoader().load_form("Weightloss", "GLP1")
+        enhanced = EnhancedFormGenerator()
+        expected_enhanced = enhanced.generate_notion_form(form)
+
+        results = []
+        barrier = threading.Barrier(8)
+
+        def render():
+            barrier.wait()
+            for _ in range(5):
+                results.append((generator.generate_form(self.form_data), enhanced.generate_notion_form(form)))
+
+        threads = [threading.Thread(target=render) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 40)
+        for html, enhanced_html in results:
+            self.assertEqual(html, expected)
+            self.assertEqual(enhanced_html, expected_enhanced)
+
+
+class TestShowConditions(unittest.TestCase):
+    def setUp(self):
+        self.generator = EnhancedFormGenerator()
+
+    def _conditions(self, html):
+        start = html.index('<script type="application/json" id="show-conditions">')
+        body = html[html.index('>', start) + 1:html.index('</script>', start)]
+        return json.loads(body)
+
+    def test_conditions_resolved_at_generation(self):
+        """Test each show condition is resolved to the inputs that trigger it"""
+        form = FormDataLoader().load_form("Weightloss", "GLP1")
+        sections = self.generator.build_five_section_structure(form)
+        conditions = self.generator.build_show_conditions(sections)
+
+        self.assertEqual(conditions["dependents"]["SQF24B"], [["SQCFA9", "female"]])
+        self.assertEqual(conditions["dependents"]["SQE24A"], [["SQF06B", "yes"]])
+        self.assertIn(["SQFFC7", "other_glp1"], conditions["dependents"]["SQE77A"])
+        self.assertEqual(conditions["triggers"]["SQD6F6"], ["SQCE76"])
+
+        html = self.generator.generate_notion_form(form)
+        self.assertEqual(self._conditions(html), conditions)
+        self.assertNotIn("querySelectorAll('input[type=\"radio\"][value=\"yes\"]:checked')", html)
+        self.assertEqual(self._conditions(self.generator.generate_notion_form(form, {"minify": True})),
+                         conditions)
+
+    def test_unresolved_condition_has_no_triggers(self):
+        """Test a condition that matches no input leaves its question without triggers"""
+        questions = [
+            {"questionId": "Q1", "questionText": "Do you smoke?", "questionType": "radio",
+             "safeAnswers": ["yes", "no"]},
+            {"questionId": "Q2", "questionText": "How much?", "questionType": "text",
+             "showCondition": "if_SQ-99_yes"}
+        ]
+        sections = [enhanced_form_generator.FormSection("Only", questions, 1, False)]
+        conditions = self.generator.build_show_conditions(sections)
+        self.assertEqual(conditions, {"dependents": {"Q2": []}, "triggers": {}})
+
+    def test_reference_condition_resolves_by_unique_id(self):
+        """Test if_SQ-N_yes is shown by the yes option of the question carrying unique ID SQ-N"""
+        loader = FormDataLoader()
+        converted = loader._convert_questions([
+            {"id": "aaaa-0001", "name": "Taking medication?", "property_question_type": "radio",
+             "property_safe_answers": ["yes", "no"], "property_unique_id": 57},
+            {"id": "aaaa-0002", "name": "Which ones?", "property_question_type": "text",
+             "property_show_condition": "if_SQ-57_yes"}
+        ])
+        self.assertEqual(converted[0]["uniqueId"], "SQ-57")
+
+        sections = [enhanced_form_generator.FormSection("Only", converted, 1, False)]
+        conditions = self.generator.build_show_conditions(sections)
+        trigger, dependent = converted[0]["questionId"], converted[1]["questionId"]
+        self.assertEqual(conditions, {"dependents": {dependent: [[trigger, "yes"]]},
+                                      "triggers": {trigger: [dependent]}})
+
+    def test_validator_and_generator_share_rules(self):
+        """Test both sides read one rule table, so they agree on what a condition matches"""
+        from show_conditions import CONDITION_RULES
+        from survey_validator import compile_schema
+
+        self.assertEqual(compile_schema().keyword_conditions, CONDITION_RULES)
+        # Only "allergies" questions trigger if_allergies_yes, in the validator as in the generator
+        body = {"id": "f", "name": "F", "property_form_type": "screener", "property_category": "x", "questions": [
+            {"id": "q1", "name": "Any allergic reaction to NAD?", "property_question_type": "radio",
+             "property_safe_answers": ["yes", "no"]},
+            {"id": "q2", "name": "List them", "property_question_type": "text",
+             "property_show_condition": "if_allergies_yes"}
+        ]}
+        self.assertEqual([i["code"] for i in validate_document(body, "x/f.json")], ["unresolved-condition"])
+        self.assertNotIn("updateConditionalQuestions", self.generator.generate_form_javascript("x", "async", "F", 4))
+
+    def test_field_bindings(self):
+        """Test the BMI inputs and displays are bound by ID instead of found by scanning the DOM"""
+        form = FormDataLoader().load_form("Weightloss", "GLP1")
+        bindings = self.generator.build_field_bindings(self.generator.build_five_section_structure(form))
+        self.assertEqual(bindings, {"heightFeet": "SQFA2B", "heightInches": "SQEC6B", "weight": "SQ2BFB",
+                                    "bmiResults": ["patient-profile-bmi"]})
+
+        html = self.generator.generate_notion_form(form)
+        self.assertIn('<script type="application/json" id="field-bindings">' + json.dumps(bindings), html)
+        self.assertIn('id="patient-profile-bmi"', html)
+        self.assertNotIn("Array.from(document.querySelectorAll('input'))", html)
+
+        # Height/weight rendered as separate questions, plus a formula display
+        questions = [
+            {"questionId": "H1", "questionText": "Height (feet)", "questionType": "height_feet"},
+            {"questionId": "W1", "questionText": "Weight", "questionType": "weight_pounds"},
+            {"questionId": "F1", "questionText": "BMI", "questionType": "formula"}
+        ]
+        sections = [enhanced_form_generator.FormSection("Only", questions, 1, False)]
+        self.assertEqual(self.generator.build_field_bindings(sections),
+                         {"heightFeet": "H1", "heightInches": None, "weight": "W1", "bmiResults": ["F1"]})
+
+
+class TestFieldManifest(unittest.TestCase):
+    def test_manifest_roles(self):
+        """Test every input is mapped to its payload role, label and section"""
+        generator = EnhancedFormGenerator()
+        form = FormDataLoader().load_form("Weightloss", "GLP1")
+        manifest = generator.build_field_manifest(generator.build_five_section_structure(form))
+
+        self.assertEqual(manifest["SQE0A2"], ["name", "Full Name", "Patient Profile"])
+        self.assertEqual(manifest["SQE322"], ["state", "State", "Verification"])
+        self.assertEqual(manifest["SQD08E"][0], "address2")
+        self.assertEqual(manifest["SQF786"][0], "address1")
+        self.assertEqual(manifest["SQFA11"][0], "mentalHealth")
+        self.assertEqual(manifest["SQCAB0"][0], "idVerification")
+        self.assertEqual(manifest["SQE24A"][0], None)  # "If yes, please list your allergies" is a plain answer
+
+        roles = [role for role, _, _ in manifest.values() if role]
+        self.assertEqual(len(roles), len(set(roles)))
+
+        html = generator.generate_notion_form(form)
+        self.assertIn('<script type="application/json" id="field-manifest">', html)
+        self.assertNotIn("formAnswers['Do you have any allergies?']", html)
+
+    def test_grouped_inputs_without_ids(self):
+        """Test grouped height/weight inputs without IDs are listed under their rendered names"""
+        questions = [
+            {"questionText": "Height (feet)", "questionType": "height_feet"},
+            {"questionText": "Height (inches)", "questionType": "height_inches"},
+            {"questionText": "Weight (pounds)", "questionType": "weight_pounds"}
+        ]
+        sections = [enhanced_form_generator.FormSection("Profile", questions, 1, True)]
+        manifest = EnhancedFormGenerator().build_field_manifest(sections)
+        self.assertEqual(list(manifest), ["height_feet", "height_inches", "weight"])
+        self.assertEqual(manifest["weight"], ["weight", "Weight (pounds)", "Profile"])
+
+
+class TestDelegatedEvents(unittest.TestCase):
+    def test_delegated_markup(self):
+        """Test delegate_events drops inline handlers for data-action attributes and marks the form"""
+        generator = EnhancedFormGenerator()
+        form = FormDataLoader().load_form("Weightloss", "GLP1")
+        inline = generator.generate_notion_form(form)
+        delegated = generator.generate_notion_form(form, {"delegate_events": True})
+
+        self.assertIn('onchange="handleAnswerChange(this)"', inline)
+        self.assertNotIn('data-events="delegated"', inline)
+        for handler in ('onchange="', 'oninput="'):
+            self.assertNotIn(handler, delegated)
+        self.assertIn('data-events="delegated"', delegated)
+        self.assertIn('data-action="format-phone"', delegated)
+        self.assertIn('data-action="bmi"', delegated)
+        self.assertLess(len(delegated), len(inline))
+
+        # Both modes share one script; cached sections are kept apart per mode
+        script = lambda html: html[html.rindex('<script>'):]
+        self.assertEqual(script(inline), script(delegated))
+        self.assertEqual(generator.generate_notion_form(form), inline)
+
+    def test_build_flags(self):
+        """Test the mode is part of the recorded build options"""
+        from build_manifest import build_flags
+        from generate_form import render_options
+        self.assertEqual(render_options("../surveys/weightloss", delegate_events=True), {"delegate_events": True})
+        self.assertTrue(build_flags(delegate_events=True)["delegate_events"])
+
+
+class TestLazySections(unittest.TestCase):
+    def test_lazy_markup(self):
+        """Test lazy_sections keeps Section 1 live and wraps later sections in templates"""
+        generator = EnhancedFormGenerator()
+        form = FormDataLoader().load_form("Weightloss", "GLP1")
+        eager = generator.generate_notion_form(form)
+        lazy = generator.generate_notion_form(form, {"lazy_sections": True})
+
+        self.assertNotIn('<template id=', eager)
+        self.assertNotIn('id="section-template-1"', lazy)
+        for number in range(2, len(form.sections) + 1):
+            self.assertRegex(lazy, rf'<template id="section-template-{number}">\s*<div class="section" id="section-{number}"')
+        self.assertEqual(lazy.count('</template>'), len(form.sections) - 1)
+
+        # Same sections and script, only wrapped
+        unwrapped = re.sub(r'<template id="section-template-\d+">', '', lazy).replace('</template>', '')
+        self.assertEqual(unwrapped, eager)
+        self.assertIn('function materializeSection(number)', lazy)
+
+    def test_build_flags(self):
+        """Test the mode is part of the recorded build options"""
+        from build_manifest import build_flags
+        from generate_form import render_options
+        self.assertEqual(render_options("../surveys/weightloss", lazy_sections=True), {"lazy_sections": True})
+        self.assertTrue(build_flags(lazy_sections=True)["lazy_sections"])
+
+
 class TestIntegration(unittest.TestCase):
     def test_end_to_end_flow(self):
         """Test complete end-to-end flow"""
@@ -295,6 +1655,26 @@ def run_tests():
     test_suite.addTest(unittest.makeSuite(TestUniversalFormGenerator))
     test_suite.addTest(unittest.makeSuite(TestStateSelector))
     test_suite.addTest(unittest.makeSuite(TestEmbedHandler))
+    test_suite.addTest(unittest.makeSuite(TestFormDataLoader))
+    test_suite.addTest(unittest.makeSuite(TestFormCatalog))
+    test_suite.addTest(unittest.makeSuite(TestQuestionRegistry))
+    test_suite.addTest(unittest.makeSuite(TestNotionImport))
+    test_suite.addTest(unittest.makeSuite(TestNotionSync))
+    test_suite.addTest(unittest.makeSuite(TestSurveyValidator))
+    test_suite.addTest(unittest.makeSuite(TestFormModel))
+    test_suite.addTest(unittest.makeSuite(TestAssetCache))
+    test_suite.addTest(unittest.makeSuite(TestHtmlTemplates))
+    test_suite.addTest(unittest.makeSuite(TestStreamingRender))
+    test_suite.addTest(unittest.makeSuite(TestExternalAssets))
+    test_suite.addTest(unittest.makeSuite(TestMinifier))
+    test_suite.addTest(unittest.makeSuite(TestPrecompress))
+    test_suite.addTest(unittest.makeSuite(TestBuildManifest))
+    test_suite.addTest(unittest.makeSuite(TestParallelBatch))
+    test_suite.addTest(unittest.makeSuite(TestRenderContext))
+    test_suite.addTest(unittest.makeSuite(TestShowConditions))
+    test_suite.addTest(unittest.makeSuite(TestFieldManifest))
+    test_suite.addTest(unittest.makeSuite(TestDelegatedEvents))
+    test_suite.addTest(unittest.makeSuite(TestLazySections))
     test_suite.addTest(unittest.makeSuite(TestIntegration))
     
     # Run tests
@@ -11,9 +11,113 @@ Usage:
 
 import json
 import re
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional
 from dataclasses import dataclass
 
+from form_minifier import SizeReport, finish_document, stream_document
+from form_model import Form, Question
+from html_templates import compile_template
+from render_context import RenderContext
+
+
+# Markup templates, compiled once and rendered into a single output buffer (see html_templates.py)
+_FORM_HEADER = compile_template('''
+        <div id="{container_id}" class="universal-form-container" data-form-type="{form_type}">
+            <!-- Form Header -->
+            <div class="form-header">
+                <h1 class="form-title">{title}</h1>
+                {subtitle_block}
+            </div>
+        ''')
+
+_FORM_OPEN = compile_template('''
+            <form id="universalForm" class="universal-form" data-category="{category}">
+        ''')
+
+_FORM_CLOSE = compile_template('''
+                <!-- Navigation -->
+                {navigation}
+                
+                <!-- Loading indicator -->
+                <div class="loading" id="loadingIndicator" style="display: none;">
+                    <div class="spinner"></div>
+                    <p>Submitting your form...</p>
+                </div>
+
+                <!-- Success message -->
+                <div id="successMessage" class="success-message" style="display: none;">
+                    <h3>✅ Form submitted successfully!</h3>
+                    <p>Redirecting you to the next step...</p>
+                </div>
+
+                <!-- Disqualification message -->
+                <div id="disqualificationMessage" class="disqualification-container" style="display: none;">
+                    <h2 class="disqualification-title">Not Eligible for Treatment</h2>
+                    <p id="disqualificationText">Based on your answers, you are not eligible for this treatment at this time.</p>
+                    <div class="crisis-resources">
+                        <p><strong>Need Help?</strong></p>
+                        <p>If you're experiencing a mental health crisis, please contact:</p>
+                        <ul>
+                            <li><strong>National Suicide Prevention Lifeline:</strong> 988</li>
+                            <li><strong>Crisis Text Line:</strong> Text HOME to 741741</li>
+                            <li><strong>Emergency:</strong> 911</li>
+                        </ul>
+                    </div>
+                </div>
+            </form>
+        </div>
+        ''')
+
+_STEP_OPEN = compile_template('''
+            <div class="form-step {active}" id="step-{index}" data-step="{index}">
+                <div class="step-content">
+                    <h2 class="step-title">{title}</h2>
+                    <div class="questions-container">
+                        ''')
+
+_STEP_CLOSE = '''
+                    </div>
+                </div>
+            </div>
+        '''
+
+_SINGLE_OPEN = '''
+            <div class="questions-container">
+                '''
+
+_SINGLE_CLOSE = '''
+            </div>
+        '''
+
+_QUESTION_OPEN = compile_template('''
+            <div class="question" id="{question_id}_container" data-question-type="{question_type}">
+                <label class="question-label" for="{question_id}">
+                    {text}{required_marker}
+                </label>
+        ''')
+
+_QUESTION_CLOSE = compile_template('''
+            <div class="error-message" id="{question_id}_error" style="display: none;">Please answer this question</div>
+        </div>
+        ''')
+
+_RADIO_OPTION = compile_template('''
+                <div class="option-item">
+                    <input type="radio" id="{option_id}" name="{field_name}" value="{value}" 
+                           data-answer-type="{answer_type}" data-question-id="{question_id}">
+                    <label for="{option_id}">{label}</label>
+                </div>
+            ''')
+
+_CHECKBOX_OPTION = compile_template('''
+                <div class="option-item">
+                    <input type="checkbox" id="{option_id}" name="{field_name}" value="{value}">
+                    <label for="{option_id}">{label}</label>
+                </div>
+            ''')
+
+_SELECT_OPTION = compile_template('<option value="{value}" data-answer-type="{answer_type}">{label}</option>')
+
 
 @dataclass
 class FormConfig:
@@ -24,12 +128,9 @@ class FormConfig:
 
 
 class UniversalFormGenerator:
+    # Holds configuration only; each render keeps its state in a RenderContext,
+    # so one instance can serve concurrent requests
     def __init__(self):
-        self.current_form_data = None
-        self.form_config = None
-        self.question_id_counter = 0
-        self.disqualification_triggered = False
-        
         # Supported question types
         self.question_types = [
             'text', 'email', 'phone', 'number', 'date', 'radio', 
@@ -39,29 +140,57 @@ class UniversalFormGenerator:
         # Answer types for logic
         self.answer_types = ['safe', 'flag', 'disqualify']
 
-    def generate_form(self, form_data: Dict, container_id: str = 'form-container', options: Dict = None) -> str:
+    def generate_form(self, form_data: Dict, container_id: str = 'form-container', options: Dict = None,
+                      context: Optional[RenderContext] = None) -> str:
         """
         Generate form from any JSON data structure
         
         Args:
-            form_data: The form data (any structure)
+            form_data: The form data (any structure, or a compiled Form)
             container_id: Container element ID
-            options: Additional options
+            options: Additional options ("minify": True, "maxBytes": budget, ...)
+            context: Per-render state; pass one in to read its size_report afterwards
             
         Returns:
             Complete HTML form string
         """
+        context = context or RenderContext()
+        html = ''.join(self._iter_form_document(form_data, container_id, options, context))
+        if options and (options.get('minify') or options.get('maxBytes')):
+            html, context.size_report = finish_document(
+                html, options.get('minify', False), options.get('maxBytes'), str(context.form_config.metadata['title'])
+            )
+        return html
+
+    def iter_form(self, form_data: Dict, container_id: str = 'form-container', options: Dict = None,
+                  context: Optional[RenderContext] = None) -> Iterator[str]:
+        """
+        Generate the same HTML as generate_form, chunk by chunk
+
+        Yields the header, then each step (or the single question list), then the
+        navigation and closing markup, so a response can be streamed while it renders.
+        "minify" is applied per chunk; "maxBytes" needs the whole form and raises
+        ValueError immediately (use generate_form when a budget applies).
+        """
+        options = options or {}
+        context = context or RenderContext()
+        if options.get('minify'):
+            context.size_report = SizeReport()
+        return stream_document(self._iter_form_document(form_data, container_id, options, context),
+                               options.get('minify', False), options.get('maxBytes'), context.size_report)
+
+    def _iter_form_document(self, form_data: Dict, container_id: str, options: Optional[Dict],
+                            context: RenderContext) -> Iterator[str]:
         if options is None:
             options = {}
-            
+
         try:
-            self.current_form_data = form_data
-            self.form_config = self.analyze_form_structure(form_data)
+            context.form_data = form_data
+            context.options = options
+            context.form_config = self.analyze_form_structure(form_data)
             
             # Generate the form HTML
-            form_html = self.build_form_html(container_id, options)
-            
-            return form_html
+            yield from self.iter_form_html(container_id, options, context)
             
         except Exception as error:
             print(f'Error generating form: {error}')
@@ -76,7 +205,20 @@ class UniversalFormGenerator:
             metadata={}
         )
 
-        if isinstance(form_data, list):
+        if isinstance(form_data, Form):
+            # Compiled form from FormDataLoader.load_form
+            config.metadata = {
+                'title': form_data.name,
+                'subtitle': '',
+                'category': form_data.category
+            }
+            if len(form_data.sections) > 1:
+                config.type = 'multi-step'
+                config.sections = [{'title': s.title, 'questions': s.questions, 'id': self.sanitize_value(s.title)}
+                                   for s in form_data.sections]
+            elif form_data.sections:
+                config.questions = form_data.sections[0].questions
+        elif isinstance(form_data, list):
             # Simple array of questions
             config.type = 'single'
             config.questions = form_data
@@ -117,74 +259,51 @@ class UniversalFormGenerator:
 
         return config
 
-    def build_form_html(self, container_id: str, options: Dict) -> str:
-        """Build the complete form HTML"""
+    def build_form_html(self, container_id: str, options: Dict, context: RenderContext) -> str:
+        """Build the complete form HTML for the form analysed into context.form_config"""
+        return ''.join(self.iter_form_html(container_id, options, context))
+
+    def iter_form_html(self, container_id: str, options: Dict, context: RenderContext) -> Iterator[str]:
+        """Yield the complete form HTML: header, one chunk per step, then navigation"""
         show_progress = options.get('showProgress', True)
         allow_back_navigation = options.get('allowBackNavigation', True)
         submit_text = options.get('submitText', 'Submit Form')
         theme = options.get('theme', 'default')
 
-        metadata = self.form_config.metadata
-        form_type = self.form_config.type
-        sections = self.form_config.sections
-        questions = self.form_config.questions
-
-        html = f'''
-        <div id="{container_id}" class="universal-form-container" data-form-type="{form_type}">
-            <!-- Form Header -->
-            <div class="form-header">
-                <h1 class="form-title">{metadata['title']}</h1>
-                {f'<p class="form-subtitle">{metadata["subtitle"]}</p>' if metadata['subtitle'] else ''}
-            </div>
-        '''
+        metadata = context.form_config.metadata
+        form_type = context.form_config.type
+        sections = context.form_config.sections
+        questions = context.form_config.questions
+
+        out: List[str] = []
+        subtitle = metadata['subtitle']
+        _FORM_HEADER.render_to(
+            out,
+            container_id=str(container_id),
+            form_type=form_type,
+            title=str(metadata['title']),
+            subtitle_block=f'<p class="form-subtitle">{subtitle}</p>' if subtitle else ''
+        )
 
         if form_type == 'multi-step' and show_progress:
-            html += self.generate_progress_bar(len(sections))
+            out.append(self.generate_progress_bar(len(sections)))
 
-        html += f'''
-            <form id="universalForm" class="universal-form" data-category="{metadata['category']}">
-        '''
+        _FORM_OPEN.render_to(out, category=str(metadata['category']))
+        yield ''.join(out)
 
         if form_type == 'multi-step':
-            html += self.generate_multi_step_form(sections)
+            for index, section in enumerate(sections):
+                out = []
+                self.write_step(out, index, section, context)
+                yield ''.join(out)
         else:
-            html += self.generate_single_form(questions)
-
-        html += f'''
-                <!-- Navigation -->
-                {self.generate_navigation(form_type, len(sections) if sections else 0, submit_text)}
-                
-                <!-- Loading indicator -->
-                <div class="loading" id="loadingIndicator" style="display: none;">
-                    <div class="spinner"></div>
-                    <p>Submitting your form...</p>
-                </div>
-
-                <!-- Success message -->
-                <div id="successMessage" class="success-message" style="display: none;">
-                    <h3>✅ Form submitted successfully!</h3>
-                    <p>Redirecting you to the next step...</p>
-                </div>
+            out = []
+            self.write_single_form(out, questions, context)
+            yield ''.join(out)
 
-                <!-- Disqualification message -->
-                <div id="disqualificationMessage" class="disqualification-container" style="display: none;">
-                    <h2 class="disqualification-title">Not Eligible for Treatment</h2>
-                    <p id="disqualificationText">Based on your answers, you are not eligible for this treatment at this time.</p>
-                    <div class="crisis-resources">
-                        <p><strong>Need Help?</strong></p>
-                        <p>If you're experiencing a mental health crisis, please contact:</p>
-                        <ul>
-                            <li><strong>National Suicide Prevention Lifeline:</strong> 988</li>
-                            <li><strong>Crisis Text Line:</strong> Text HOME to 741741</li>
-                            <li><strong>Emergency:</strong> 911</li>
-                        </ul>
-                    </div>
-                </div>
-            </form>
-        </div>
-        '''
-
-        return html
+        yield _FORM_CLOSE.render(
+            navigation=self.generate_navigation(form_type, len(sections) if sections else 0, submit_text)
+        )
 
     def generate_progress_bar(self, total_steps: int) -> str:
         """Generate progress bar for multi-step forms"""
@@ -199,26 +318,42 @@ class UniversalFormGenerator:
             </div>
         '''
 
-    def generate_multi_step_form(self, sections: List[Dict]) -> str:
+    def generate_multi_step_form(self, sections: List[Dict], context: Optional[RenderContext] = None) -> str:
         """Generate multi-step form"""
-        return ''.join([f'''
-            <div class="form-step {'active' if index == 0 else ''}" id="step-{index}" data-step="{index}">
-                <div class="step-content">
-                    <h2 class="step-title">{section['title']}</h2>
-                    <div class="questions-container">
-                        {''.join([self.generate_question_html(question) for question in section['questions']])}
-                    </div>
-                </div>
-            </div>
-        ''' for index, section in enumerate(sections)])
-
-    def generate_single_form(self, questions: List[Dict]) -> str:
+        out: List[str] = []
+        self.write_multi_step_form(out, sections, context)
+        return ''.join(out)
+
+    def write_multi_step_form(self, out: List[str], sections: List[Dict],
+                              context: Optional[RenderContext] = None) -> None:
+        """Render a multi-step form into the output buffer"""
+        context = context or RenderContext()
+        for index, section in enumerate(sections):
+            self.write_step(out, index, section, context)
+
+    def write_step(self, out: List[str], index: int, section: Dict, context: Optional[RenderContext] = None) -> None:
+        """Render one step of a multi-step form into the output buffer"""
+        context = context or RenderContext()
+        _STEP_OPEN.render_to(out, active='active' if index == 0 else '', index=str(index),
+                             title=str(section['title']))
+        for question in section['questions']:
+            self.write_question_html(out, question, context)
+        out.append(_STEP_CLOSE)
+
+    def generate_single_form(self, questions: List[Dict], context: Optional[RenderContext] = None) -> str:
         """Generate single form"""
-        return f'''
-            <div class="questions-container">
-                {''.join([self.generate_question_html(question) for question in questions])}
-            </div>
-        '''
+        out: List[str] = []
+        self.write_single_form(out, questions, context)
+        return ''.join(out)
+
+    def write_single_form(self, out: List[str], questions: List[Dict],
+                          context: Optional[RenderContext] = None) -> None:
+        """Render a single-page form into the output buffer"""
+        context = context or RenderContext()
+        out.append(_SINGLE_OPEN)
+        for question in questions:
+            self.write_question_html(out, question, context)
+        out.append(_SINGLE_CLOSE)
 
     def generate_navigation(self, form_type: str, total_steps: int, submit_text: str) -> str:
         """Generate navigation buttons"""
@@ -245,30 +380,45 @@ class UniversalFormGenerator:
                 </div>
             '''
 
-    def generate_question_html(self, question: Dict) -> str:
+    def generate_question_html(self, question: Dict, context: Optional[RenderContext] = None) -> str:
         """Generate HTML for a single question"""
-        question_id = self.generate_question_id(question)
+        out: List[str] = []
+        self.write_question_html(out, question, context)
+        return ''.join(out)
+
+    def write_question_html(self, out: List[str], question: Dict, context: Optional[RenderContext] = None) -> None:
+        """Render a single question into the output buffer"""
+        question_id = self.generate_question_id(question, context)
         field_name = self.get_field_name(question)
         is_required = self.is_question_required(question)
         question_type = self.detect_question_type(question)
 
-        html = f'''
-            <div class="question" id="{question_id}_container" data-question-type="{question_type}">
-                <label class="question-label" for="{question_id}">
-                    {question.get('text') or question.get('questionText') or question.get('name')}{' *' if is_required else ''}
-                </label>
-        '''
+        _QUESTION_OPEN.render_to(
+            out,
+            question_id=question_id,
+            question_type=question_type,
+            text=str(self.get_question_text(question)),
+            required_marker=' *' if is_required else ''
+        )
 
         # Generate input field based on type
-        html += self.generate_input_field(question, question_id, field_name, question_type)
+        self.write_input_field(out, question, question_id, field_name, question_type)
 
         # Add error message
-        html += f'''
-            <div class="error-message" id="{question_id}_error" style="display: none;">Please answer this question</div>
-        </div>
-        '''
-
-        return html
+        _QUESTION_CLOSE.render_to(out, question_id=question_id)
+
+    def write_input_field(self, out: List[str], question: Dict, question_id: str, field_name: str,
+                          question_type: str) -> None:
+        """Render an input field into the output buffer; option lists are written piece by piece"""
+        writer = {
+            'radio': self.write_radio_input,
+            'checkbox': self.write_checkbox_input,
+            'select': self.write_select_input
+        }.get(question_type)
+        if writer:
+            writer(out, question, question_id, field_name)
+        else:
+            out.append(self.generate_input_field(question, question_id, field_name, question_type))
 
     def generate_input_field(self, question: Dict, question_id: str, field_name: str, question_type: str) -> str:
         """Generate input field based on question type"""
@@ -292,7 +442,7 @@ class UniversalFormGenerator:
 
     def generate_text_input(self, question: Dict, question_id: str, field_name: str) -> str:
         """Generate text input"""
-        placeholder = question.get('placeholder', '')
+        placeholder = self.get_question_setting(question, 'placeholder', '')
         required = 'required' if self.is_question_required(question) else ''
         return f'''
             <input type="text" id="{question_id}" name="{field_name}" class="text-input" 
@@ -317,9 +467,9 @@ class UniversalFormGenerator:
 
     def generate_number_input(self, question: Dict, question_id: str, field_name: str) -> str:
         """Generate number input"""
-        min_val = question.get('min', '')
-        max_val = question.get('max', '')
-        placeholder = question.get('placeholder', '')
+        min_val = self.get_question_setting(question, 'min', '')
+        max_val = self.get_question_setting(question, 'max', '')
+        placeholder = self.get_question_setting(question, 'placeholder', '')
         required = 'required' if self.is_question_required(question) else ''
         
         min_attr = f'min="{min_val}"' if min_val else ''
@@ -340,67 +490,75 @@ class UniversalFormGenerator:
 
     def generate_radio_input(self, question: Dict, question_id: str, field_name: str) -> str:
         """Generate radio input"""
-        options = self.get_question_options(question)
-        html = '<div class="option-group">'
-
-        for index, option in enumerate(options):
-            option_id = f"{question_id}_{index}"
-            option_value = self.sanitize_value(option)
-            option_label = self.format_label(option)
-            answer_type = self.get_answer_type(option, question)
-
-            html += f'''
-                <div class="option-item">
-                    <input type="radio" id="{option_id}" name="{field_name}" value="{option_value}" 
-                           data-answer-type="{answer_type}" data-question-id="{question_id}">
-                    <label for="{option_id}">{option_label}</label>
-                </div>
-            '''
-
-        html += '</div>'
-        return html
+        out: List[str] = []
+        self.write_radio_input(out, question, question_id, field_name)
+        return ''.join(out)
+
+    def write_radio_input(self, out: List[str], question: Dict, question_id: str, field_name: str) -> None:
+        """Render radio options into the output buffer"""
+        out.append('<div class="option-group">')
+
+        for index, option in enumerate(self.get_question_options(question)):
+            _RADIO_OPTION.render_to(
+                out,
+                option_id=f"{question_id}_{index}",
+                field_name=field_name,
+                value=self.sanitize_value(option),
+                answer_type=self.get_answer_type(option, question),
+                question_id=question_id,
+                label=self.format_label(option)
+            )
+
+        out.append('</div>')
 
     def generate_checkbox_input(self, question: Dict, question_id: str, field_name: str) -> str:
         """Generate checkbox input"""
-        options = self.get_question_options(question)
-        html = '<div class="option-group">'
+        out: List[str] = []
+        self.write_checkbox_input(out, question, question_id, field_name)
+        return ''.join(out)
 
-        for index, option in enumerate(options):
-            option_id = f"{question_id}_{index}"
-            option_value = self.sanitize_value(option)
-            option_label = self.format_label(option)
+    def write_checkbox_input(self, out: List[str], question: Dict, question_id: str, field_name: str) -> None:
+        """Render checkbox options into the output buffer"""
+        out.append('<div class="option-group">')
 
-            html += f'''
-                <div class="option-item">
-                    <input type="checkbox" id="{option_id}" name="{field_name}" value="{option_value}">
-                    <label for="{option_id}">{option_label}</label>
-                </div>
-            '''
+        for index, option in enumerate(self.get_question_options(question)):
+            _CHECKBOX_OPTION.render_to(
+                out,
+                option_id=f"{question_id}_{index}",
+                field_name=field_name,
+                value=self.sanitize_value(option),
+                label=self.format_label(option)
+            )
 
-        html += '</div>'
-        return html
+        out.append('</div>')
 
     def generate_select_input(self, question: Dict, question_id: str, field_name: str) -> str:
         """Generate select input"""
-        options = self.get_question_options(question)
+        out: List[str] = []
+        self.write_select_input(out, question, question_id, field_name)
+        return ''.join(out)
+
+    def write_select_input(self, out: List[str], question: Dict, question_id: str, field_name: str) -> None:
+        """Render a select input into the output buffer"""
         required = 'required' if self.is_question_required(question) else ''
-        
-        html = f'<select id="{question_id}" name="{field_name}" class="text-input" {required}>'
-        html += '<option value="">Select an option</option>'
 
-        for option in options:
-            option_value = self.sanitize_value(option)
-            option_label = self.format_label(option)
-            answer_type = self.get_answer_type(option, question)
-            html += f'<option value="{option_value}" data-answer-type="{answer_type}">{option_label}</option>'
+        out.append(f'<select id="{question_id}" name="{field_name}" class="text-input" {required}>')
+        out.append('<option value="">Select an option</option>')
 
-        html += '</select>'
-        return html
+        for option in self.get_question_options(question):
+            _SELECT_OPTION.render_to(
+                out,
+                value=self.sanitize_value(option),
+                answer_type=self.get_answer_type(option, question),
+                label=self.format_label(option)
+            )
+
+        out.append('</select>')
 
     def generate_textarea_input(self, question: Dict, question_id: str, field_name: str) -> str:
         """Generate textarea input"""
-        rows = question.get('rows', 4)
-        placeholder = question.get('placeholder', '')
+        rows = self.get_question_setting(question, 'rows', 4)
+        placeholder = self.get_question_setting(question, 'placeholder', '')
         required = 'required' if self.is_question_required(question) else ''
         
         return f'''
@@ -410,7 +568,7 @@ class UniversalFormGenerator:
 
     def generate_file_input(self, question: Dict, question_id: str, field_name: str) -> str:
         """Generate file input"""
-        accept = question.get('accept', 'image/*,.pdf')
+        accept = self.get_question_setting(question, 'accept', 'image/*,.pdf')
         required = 'required' if self.is_question_required(question) else ''
         
         return f'''
@@ -449,6 +607,9 @@ class UniversalFormGenerator:
 
     def detect_question_type(self, question: Dict) -> str:
         """Detect question type from question data"""
+        if isinstance(question, Question):
+            return question.question_type.lower()
+
         # Check explicit type first
         if question.get('type') or question.get('questionType'):
             return (question.get('type') or question.get('questionType')).lower()
@@ -487,6 +648,8 @@ class UniversalFormGenerator:
 
     def get_question_options(self, question: Dict) -> List[str]:
         """Get question options from various possible structures"""
+        if isinstance(question, Question):
+            return [option.value for option in question.options]
         return (question.get('options') or 
                 question.get('safeAnswers') or 
                 question.get('safe') or 
@@ -496,6 +659,8 @@ class UniversalFormGenerator:
 
     def is_question_required(self, question: Dict) -> bool:
         """Check if question is required"""
+        if isinstance(question, Question):
+            return question.required
         return (question.get('required') is True or 
                 question.get('required') == 'true' or 
                 question.get('required') == 1 or
@@ -503,6 +668,8 @@ class UniversalFormGenerator:
 
     def get_field_name(self, question: Dict) -> str:
         """Get field name from question"""
+        if isinstance(question, Question):
+            return self.sanitize_value(question.text)
         if question.get('name'):
             return question['name']
         if question.get('field'):
@@ -511,17 +678,23 @@ class UniversalFormGenerator:
         text = question.get('text') or question.get('questionText') or ''
         return self.sanitize_value(text)
 
-    def generate_question_id(self, question: Dict) -> str:
-        """Generate unique question ID"""
+    def generate_question_id(self, question: Dict, context: Optional[RenderContext] = None) -> str:
+        """Generate unique question ID; questions without one are numbered per render"""
+        if isinstance(question, Question):
+            if question.question_id:
+                return question.question_id
+            question = {'text': question.text}
         if question.get('id'):
             return question['id']
         
         text = question.get('text') or question.get('questionText') or question.get('name') or 'question'
-        self.question_id_counter += 1
-        return f"q_{self.sanitize_value(text)}_{self.question_id_counter}"
+        number = (context or RenderContext()).next_question_number()
+        return f"q_{self.sanitize_value(text)}_{number}"
 
     def get_answer_type(self, answer: str, question: Dict) -> str:
         """Get answer type (safe, disqualify, flag)"""
+        if isinstance(question, Question):
+            return question.answer_type(answer)
         if question.get('safeAnswers') and answer in question['safeAnswers']:
             return 'safe'
         if question.get('disqualifyAnswers') and answer in question['disqualifyAnswers']:
@@ -534,6 +707,18 @@ class UniversalFormGenerator:
             return 'disqualify'
         return 'safe'
 
+    def get_question_text(self, question: Dict) -> str:
+        """Get the display text of a question"""
+        if isinstance(question, Question):
+            return question.text
+        return question.get('text') or question.get('questionText') or question.get('name')
+
+    def get_question_setting(self, question: Dict, key: str, default: Any = '') -> Any:
+        """Get an optional rendering setting (placeholder, min, rows...); compiled questions use the defaults"""
+        if isinstance(question, Question):
+            return default
+        return question.get(key, default)
+
     def sanitize_value(self, value: str) -> str:
         """Sanitize value for use as HTML attribute"""
         return re.sub(r'[^a-z0-9]', '_', str(value).lower()).replace('_+', '_').strip('_')